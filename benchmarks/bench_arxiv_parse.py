@@ -0,0 +1,168 @@
+"""
+arXiv Atom 解析基准：对比原先的 ET.fromstring + 多次 find 解析与 sources.arxiv.parse_feed 的增量解析。
+
+用法（在项目根目录）:
+    python benchmarks/bench_arxiv_parse.py --entries 2000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models import Paper  # noqa: E402
+from src.sources.arxiv import parse_feed  # noqa: E402
+
+
+def build_feed(entries: int, seed: int = 0) -> bytes:
+    """
+    生成与 arXiv API 响应结构一致的 Atom 文档。
+    """
+    rng = random.Random(seed)
+    words = [f"word{i}" for i in range(3000)]
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        '  <link href="http://arxiv.org/api/query?search_query=all:bench" rel="self" type="application/atom+xml"/>\n'
+        '  <title type="html">ArXiv Query: search_query=all:bench</title>\n'
+        "  <id>http://arxiv.org/api/bench</id>\n"
+        "  <updated>2024-05-01T00:00:00-04:00</updated>\n"
+        f'  <opensearch:totalResults xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{entries}</opensearch:totalResults>\n'
+    ]
+    for i in range(entries):
+        arxiv_id = f"http://arxiv.org/abs/2405.{i:05d}v{rng.randint(1, 3)}"
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(6, 14)))
+        summary = " ".join(rng.choice(words) for _ in range(rng.randint(120, 250)))
+        authors = "".join(
+            f"    <author>\n      <name>Author {rng.randint(0, 99999)}</name>\n"
+            + (
+                '      <arxiv:affiliation xmlns:arxiv="http://arxiv.org/schemas/atom">Some University</arxiv:affiliation>\n'
+                if rng.random() < 0.3
+                else ""
+            )
+            + "    </author>\n"
+            for _ in range(rng.randint(1, 12))
+        )
+        categories = "".join(
+            f'    <category term="cs.{c}" scheme="http://arxiv.org/schemas/atom"/>\n'
+            for c in rng.sample(["CL", "LG", "AI", "CV", "IR", "NE"], rng.randint(1, 3))
+        )
+        doi = (
+            f'    <arxiv:doi xmlns:arxiv="http://arxiv.org/schemas/atom">10.1000/bench.{i}</arxiv:doi>\n'
+            f'    <link title="doi" href="http://dx.doi.org/10.1000/bench.{i}" rel="related"/>\n'
+            if rng.random() < 0.3
+            else ""
+        )
+        parts.append(
+            "  <entry>\n"
+            f"    <id>{arxiv_id}</id>\n"
+            "    <updated>2024-05-02T10:00:00Z</updated>\n"
+            "    <published>2024-05-01T17:59:59Z</published>\n"
+            f"    <title>{title}</title>\n"
+            f"    <summary>  {summary}\n</summary>\n"
+            f"{authors}{doi}"
+            '    <arxiv:comment xmlns:arxiv="http://arxiv.org/schemas/atom">12 pages, 4 figures</arxiv:comment>\n'
+            '    <arxiv:journal_ref xmlns:arxiv="http://arxiv.org/schemas/atom">J. Bench. 1 (2024) 1-12</arxiv:journal_ref>\n'
+            f'    <link href="{arxiv_id}" rel="alternate" type="text/html"/>\n'
+            f'    <link title="pdf" href="{arxiv_id.replace("/abs/", "/pdf/")}" rel="related" type="application/pdf"/>\n'
+            '    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>\n'
+            f"{categories}"
+            "  </entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts).encode("utf-8")
+
+
+def parse_legacy(body: bytes) -> List[Paper]:
+    """
+    原先的实现：整体解码为 str 后 ET.fromstring，逐字段带命名空间 find。
+    """
+
+    def _text(elem, tag: str) -> Optional[str]:
+        found = elem.find(f"{ns}{tag}")
+        return found.text if found is not None else None
+
+    ns = "{http://www.w3.org/2005/Atom}"
+    root = ET.fromstring(body.decode("utf-8"))
+    papers = []
+    for entry in root.findall("atom:entry", {"atom": "http://www.w3.org/2005/Atom"}):
+        arxiv_id = _text(entry, "id") or ""
+        authors = [
+            (a.find(f"{ns}name").text or "").strip()
+            for a in entry.findall(f"{ns}author")
+            if a.find(f"{ns}name") is not None
+        ]
+        published_raw = _text(entry, "published")
+        published_at = datetime.fromisoformat(published_raw.replace("Z", "+00:00")) if published_raw else None
+        papers.append(
+            Paper(
+                id=arxiv_id,
+                title=(_text(entry, "title") or "").strip().replace("\n", " "),
+                abstract=(_text(entry, "summary") or "").strip(),
+                authors=authors,
+                published_at=published_at,
+                source="arxiv",
+                url=arxiv_id,
+                extra={"pdf_url": arxiv_id.replace("/abs/", "/pdf/") + ".pdf"},
+            )
+        )
+    return papers
+
+
+def parse_streaming(body: bytes) -> List[Paper]:
+    return list(parse_feed(io.BytesIO(body)))
+
+
+def consume_streaming(body: bytes) -> int:
+    # 逐条消费（如写入存储）时不保留结果列表，体现增量解析的内存优势
+    count = 0
+    for _ in parse_feed(io.BytesIO(body)):
+        count += 1
+    return count
+
+
+def measure(label: str, fn: Callable[[bytes], object], body: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<32} {best * 1000:8.1f} ms   峰值内存 {peak / 1e6:6.1f} MB")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="arXiv Atom 解析基准")
+    parser.add_argument("--entries", type=int, default=2000, help="每份文档的 entry 数（arXiv 单页上限 2000）")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    body = build_feed(args.entries)
+    print(f"文档大小 {len(body) / 1e6:.1f} MB，{args.entries} 条 entry")
+
+    legacy = parse_legacy(body)
+    streaming = parse_streaming(body)
+    assert [(p.id, p.title, p.authors) for p in legacy] == [(p.id, p.title, p.authors) for p in streaming]
+
+    base = measure("ET.fromstring + find（原实现）", parse_legacy, body, args.repeat)
+    fast = measure("parse_feed（收集为列表）", parse_streaming, body, args.repeat)
+    measure("parse_feed（逐条消费）", consume_streaming, body, args.repeat)
+    print(f"加速比 {base / fast:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
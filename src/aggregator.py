@@ -1,83 +1,561 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Optional, Sequence
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+from . import http_client, metrics
+from .cache import QueryCache, build_cache
+from .dedup import Deduplicator
+from .merge import merge_papers
 from .models import Paper
-from .rate_limiter import SimpleRateLimiter
-from .sources.arxiv import ArxivSource
+from .rate_limiter import RateLimiterRegistry, build_rate_limiters
 from .sources.base import BaseSource
-from .sources.crossref import CrossRefSource
-from .sources.semantic_scholar import SemanticScholarSource
+from .sources.registry import get_source_class, import_source_modules, list_sources
+
+
+@dataclass
+class SourceStatus:
+    """
+    单个数据源在一次聚合检索中的执行情况。
+
+    state 取值：
+        ok       正常完成
+        error    抛出异常（error 字段为异常信息）
+        timeout  超过整体截止时间，count 为截止前已返回的条数
+        skipped  串行模式下截止时间已到，未开始执行
+    cached 表示结果来自缓存，未请求上游接口。
+    """
+
+    name: str
+    state: str = "pending"
+    count: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False
+
+
+@dataclass
+class AggregateResult:
+    """
+    聚合检索结果：去重后的论文列表 + 各数据源的执行状态。
+    """
+
+    papers: List[Paper] = field(default_factory=list)
+    statuses: List[SourceStatus] = field(default_factory=list)
 
 
 def build_sources(config: Dict) -> List[BaseSource]:
     """
     根据配置初始化启用的数据源实例。
+
+    数据源按名称在注册表（sources.registry）中查找，只导入被启用的数据源模块；
+    未登记或加载失败的名称打印一次警告后跳过。
     """
-    enabled = config.get("enabled_sources", ["arxiv", "crossref"])
-    rate_cfg = config.get("rate_limit", {}) or {}
-    rpm = int(rate_cfg.get("requests_per_minute", 20))
-    limiter = SimpleRateLimiter(max_calls=max(1, rpm), period=60.0)
+    http_client.configure(config.get("http"))
+    import_source_modules(config.get("source_modules") or [])
 
-    sources_cfg = config.get("sources", {}) or {}
+    enabled = config.get("enabled_sources", ["arxiv", "crossref"])
+    # 每个上游主机一个令牌桶，各 API 按各自的速率上限运行
+    limiters = build_rate_limiters(config)
 
     instances: List[BaseSource] = []
     for name in enabled:
-        name_lower = name.lower()
-        if name_lower == "arxiv":
-            instances.append(ArxivSource(rate_limiter=limiter, config=sources_cfg.get("arxiv") or {}))
-        elif name_lower == "crossref":
-            instances.append(CrossRefSource(rate_limiter=limiter, config=sources_cfg.get("crossref") or {}))
-        elif name_lower in ("semantic_scholar", "semanticscholar"):
-            instances.append(
-                SemanticScholarSource(
-                    rate_limiter=limiter,
-                    config=sources_cfg.get("semantic_scholar") or {},
-                )
-            )
-        else:
-            # 未知源暂时忽略
-            continue
+        src = build_source(name, config, limiters)
+        if src is not None:
+            instances.append(src)
     return instances
 
 
+def build_source(name: str, config: Dict, limiters: RateLimiterRegistry) -> Optional[BaseSource]:
+    """
+    按名称创建单个数据源实例；未登记或加载失败时打印一次警告并返回 None。
+    """
+    try:
+        cls = get_source_class(name)
+    except Exception as e:
+        _warn_once(name, f"[WARN] Failed to load source {name}: {e}")
+        return None
+    if cls is None:
+        available = ", ".join(entry.name for entry in list_sources())
+        _warn_once(name, f"[WARN] Unknown source {name!r} ignored (available: {available})")
+        return None
+    return cls.from_config(config, limiters)
+
+
+_warned_sources: Set[str] = set()
+
+
+def _warn_once(name: str, message: str) -> None:
+    # 同一名称只提示一次（Web 服务可能按请求中的数据源名称多次创建）
+    if name not in _warned_sources:
+        _warned_sources.add(name)
+        print(message)
+
+
+def search_options(config: Dict) -> Dict:
+    """
+    从配置的 search / cache 节点读取聚合检索参数（concurrent / deadline / cache / fuzzy_dedup），
+    返回值可直接作为关键字参数传给 aggregate_search。
+    """
+    search_cfg = config.get("search", {}) or {}
+    deadline = search_cfg.get("deadline")
+    return {
+        "concurrent": bool(search_cfg.get("concurrent", True)),
+        "deadline": float(deadline) if deadline else None,
+        "cache": build_cache(config),
+        "fuzzy_dedup": bool(search_cfg.get("fuzzy_dedup", True)),
+    }
+
+
 def aggregate_search(
     query: str,
     sources: Sequence[BaseSource],
     max_results: int = 50,
     from_year: Optional[int] = None,
+    concurrent: bool = True,
+    deadline: Optional[float] = None,
+    cache: Optional[QueryCache] = None,
+    fuzzy_dedup: bool = True,
 ) -> List[Paper]:
     """
     在多个数据源上执行搜索，并将结果合并为一个列表。
-    简单去重策略：按 (doi 或 标题+年份+首位作者) 去重。
+    去重策略见 dedup.Deduplicator：DOI 相同或标题相近（且年份、首位作者不冲突）视为同一论文，
+    fuzzy_dedup 为 False 时只按 DOI / 规范化标题精确匹配；
+    重复记录不丢弃，按字段的来源优先级合并为一条（见 merge.merge_papers）。
+
+    concurrent 为 True 时所有数据源同时查询，耗时取决于最慢的源；
+    deadline（秒）为整体截止时间，到时只返回已拿到的结果；
+    cache 不为空时先查缓存，仅对未命中的数据源发起请求。
+    """
+    return aggregate_search_detailed(
+        query=query,
+        sources=sources,
+        max_results=max_results,
+        from_year=from_year,
+        concurrent=concurrent,
+        deadline=deadline,
+        cache=cache,
+        fuzzy_dedup=fuzzy_dedup,
+    ).papers
+
+
+def aggregate_search_detailed(
+    query: str,
+    sources: Sequence[BaseSource],
+    max_results: int = 50,
+    from_year: Optional[int] = None,
+    concurrent: bool = True,
+    deadline: Optional[float] = None,
+    cache: Optional[QueryCache] = None,
+    fuzzy_dedup: bool = True,
+) -> AggregateResult:
+    """
+    与 aggregate_search 相同，但同时返回每个数据源的执行状态。
+
+    无论各源完成先后，结果都按 sources 的顺序合并去重，保证输出顺序稳定。
+    """
+    result = AggregateResult()
+    dedup = Deduplicator(fuzzy=fuzzy_dedup)
+
+    for status, batch in iter_source_results(
+        query=query,
+        sources=sources,
+        max_results=max_results,
+        from_year=from_year,
+        concurrent=concurrent,
+        deadline=deadline,
+        ordered=True,
+        cache=cache,
+    ):
+        _merge_batch(result, dedup, status, batch)
+
+    return result
+
+
+async def aaggregate_search_detailed(
+    query: str,
+    sources: Sequence[BaseSource],
+    max_results: int = 50,
+    from_year: Optional[int] = None,
+    deadline: Optional[float] = None,
+    cache: Optional[QueryCache] = None,
+    fuzzy_dedup: bool = True,
+) -> AggregateResult:
+    """
+    aggregate_search_detailed 的异步版本：通过各数据源的 asearch 并发查询，
+    不阻塞事件循环，适合在 FastAPI 的 async 路由中直接 await。
+    """
+    result = AggregateResult()
+    dedup = Deduplicator(fuzzy=fuzzy_dedup)
+
+    async for status, batch in aiter_source_results(
+        query=query,
+        sources=sources,
+        max_results=max_results,
+        from_year=from_year,
+        deadline=deadline,
+        ordered=True,
+        cache=cache,
+    ):
+        _merge_batch(result, dedup, status, batch)
+
+    return result
+
+
+async def aiter_deduplicated_batches(
+    query: str,
+    sources: Sequence[BaseSource],
+    max_results: int = 50,
+    from_year: Optional[int] = None,
+    deadline: Optional[float] = None,
+    cache: Optional[QueryCache] = None,
+    fuzzy_dedup: bool = True,
+) -> AsyncIterator[Tuple[SourceStatus, List[Paper]]]:
+    """
+    流式聚合：按数据源完成先后产出 (状态, 该源中此前未出现过的论文)。
+
+    与 aaggregate_search_detailed 的区别是不等待所有源完成，适合边检索边输出的场景
+    （如 CSV 流式下载）；代价是输出顺序取决于各源的响应速度，
+    且已输出的记录无法再合并后到的重复记录，重复记录直接丢弃。
+    """
+    dedup = Deduplicator(fuzzy=fuzzy_dedup)
+    async for status, batch in aiter_source_results(
+        query=query,
+        sources=sources,
+        max_results=max_results,
+        from_year=from_year,
+        deadline=deadline,
+        ordered=False,
+        cache=cache,
+    ):
+        fresh = [paper for paper in batch if dedup.add(paper) is None]
+        if len(fresh) < len(batch):
+            metrics.DEDUP_DUPLICATES.inc(status.name, value=len(batch) - len(fresh))
+        yield status, fresh
+
+
+def aggregate_harvest(
+    query: str,
+    sources: Sequence[BaseSource],
+    limit: int = 1000,
+    from_year: Optional[int] = None,
+    fuzzy_dedup: bool = True,
+) -> Iterator[Paper]:
     """
-    all_papers: List[Paper] = []
-    seen_keys: Dict[str, bool] = {}
+    深度检索：依次对每个数据源分页获取最多 limit 条结果，去重后以生成器逐条产出。
 
+    各源内部按页预取，整体只保留去重所需的索引（DOI、规范化标题、LSH 桶），
+    不保存论文本身；某个源失败时打印警告并继续下一个源（已产出的结果不受影响）。
+    """
+    dedup = Deduplicator(fuzzy=fuzzy_dedup)
     for src in sources:
         try:
-            for paper in src.search(query=query, max_results=max_results, from_year=from_year):
-                key = _dedup_key(paper)
-                if key in seen_keys:
+            papers = src.harvest(query=query, limit=limit, from_year=from_year)
+            for paper in src.apply_filters(papers, from_year):
+                metrics.SOURCE_RESULTS.inc(src.name)
+                if dedup.add(paper) is not None:
+                    metrics.DEDUP_DUPLICATES.inc(src.name)
                     continue
-                seen_keys[key] = True
-                all_papers.append(paper)
+                yield paper
         except Exception as e:
+            metrics.SOURCE_ERRORS.inc(src.name, type(e).__name__)
+            print(f"[WARN] Source {src.name} failed: {e}")
+
+
+def _merge_batch(
+    result: AggregateResult,
+    dedup: Deduplicator,
+    status: SourceStatus,
+    batch: Iterable[Paper],
+) -> None:
+    # dedup 的记录序号与 result.papers 的下标一一对应
+    result.statuses.append(status)
+    duplicates = 0
+    for paper in batch:
+        idx = dedup.add(paper)
+        if idx is None:
+            result.papers.append(paper)
+        else:
+            result.papers[idx] = merge_papers(result.papers[idx], paper)
+            duplicates += 1
+    if duplicates:
+        metrics.DEDUP_DUPLICATES.inc(status.name, value=duplicates)
+
+
+def _record_status(status: SourceStatus, exc: Optional[BaseException] = None) -> None:
+    """
+    记录一个数据源本次检索的指标（状态、耗时、条数、错误类型）。
+    """
+    metrics.SOURCE_SEARCHES.inc(status.name, status.state)
+    if status.state == "skipped":
+        return
+    if not status.cached:
+        metrics.SOURCE_SEARCH_SECONDS.observe(status.elapsed, status.name)
+    metrics.SOURCE_RESULTS.inc(status.name, value=status.count)
+    if status.state == "timeout":
+        metrics.SOURCE_ERRORS.inc(status.name, "timeout")
+    elif exc is not None:
+        metrics.SOURCE_ERRORS.inc(status.name, type(exc).__name__)
+
+
+def iter_source_results(
+    query: str,
+    sources: Sequence[BaseSource],
+    max_results: int = 50,
+    from_year: Optional[int] = None,
+    concurrent: bool = True,
+    deadline: Optional[float] = None,
+    ordered: bool = True,
+    cache: Optional[QueryCache] = None,
+) -> Iterator[Tuple[SourceStatus, List[Paper]]]:
+    """
+    逐个数据源产出 (状态, 论文列表)，未去重。
+
+    ordered 为 True 时按 sources 顺序产出（先完成的源会暂存，等前面的源完成后再输出）；
+    为 False 时按完成先后产出，适合需要尽早拿到首批结果的流式场景。
+    """
+    if not sources:
+        return
+    if concurrent and len(sources) > 1:
+        yield from _iter_concurrent(query, sources, max_results, from_year, deadline, ordered, cache)
+    else:
+        yield from _iter_serial(query, sources, max_results, from_year, deadline, cache)
+
+
+def _iter_serial(
+    query: str,
+    sources: Sequence[BaseSource],
+    max_results: int,
+    from_year: Optional[int],
+    deadline: Optional[float],
+    cache: Optional[QueryCache],
+) -> Iterator[Tuple[SourceStatus, List[Paper]]]:
+    end_at = time.monotonic() + deadline if deadline else None
+    for src in sources:
+        status = SourceStatus(name=src.name)
+        if end_at is not None and time.monotonic() >= end_at:
+            status.state = "skipped"
+            _record_status(status)
+            yield status, []
+            continue
+        buf: List[Paper] = []
+        started = time.monotonic()
+        error: Optional[Exception] = None
+        try:
+            status.cached = _collect(src, buf, query, max_results, from_year, cache)
+            status.state = "ok"
+        except Exception as e:
+            error = e
+            status.state = "error"
+            status.error = str(e)
             # 日志可以后续接入 logging，这里简单打印或忽略
             print(f"[WARN] Source {src.name} failed: {e}")
+        status.elapsed = time.monotonic() - started
+        status.count = len(buf)
+        _record_status(status, error)
+        yield status, buf
+
+
+class _ConcurrentRun:
+    """
+    并发检索一组数据源时的公共簿记：整体截止时间、各源的结果缓冲与状态、按顺序输出的进度。
+
+    _iter_concurrent（线程池 + futures.wait）与 aiter_source_results（asyncio.wait）共用此类，
+    两者只在提交任务和等待完成的方式上不同。complete / expire 返回此刻可以产出的 (状态, 论文列表)。
+    """
+
+    def __init__(self, sources: Sequence[BaseSource], deadline: Optional[float], ordered: bool) -> None:
+        self.started = time.monotonic()
+        self.end_at = self.started + deadline if deadline else None
+        self.ordered = ordered
+        self.buffers: List[List[Paper]] = [[] for _ in sources]
+        self.statuses = [SourceStatus(name=src.name) for src in sources]
+        self._finished: Set[int] = set()
+        self._next_idx = 0
+
+    def remaining(self) -> Optional[float]:
+        """
+        距截止时间的秒数（等待超时），未设置截止时间时为 None。
+        """
+        if self.end_at is None:
+            return None
+        return max(0.0, self.end_at - time.monotonic())
+
+    def complete(
+        self, idx: int, exc: Optional[BaseException], cached: bool
+    ) -> List[Tuple[SourceStatus, List[Paper]]]:
+        """
+        记录第 idx 个数据源已结束（exc 为其抛出的异常）。
+        """
+        status = self.statuses[idx]
+        status.elapsed = time.monotonic() - self.started
+        if exc is None:
+            status.state = "ok"
+            status.cached = cached
+        else:
+            status.state = "error"
+            status.error = str(exc)
+            print(f"[WARN] Source {status.name} failed: {exc}")
+        status.count = len(self.buffers[idx])
+        _record_status(status, exc)
+        self._finished.add(idx)
+        if not self.ordered:
+            return [(status, self.buffers[idx])]
+        ready = []
+        while self._next_idx < len(self.statuses) and self._next_idx in self._finished:
+            ready.append((self.statuses[self._next_idx], self.buffers[self._next_idx]))
+            self._next_idx += 1
+        return ready
+
+    def expire(self) -> List[Tuple[SourceStatus, List[Paper]]]:
+        """
+        等待结束（全部完成或截止时间已到）：未完成的源标记为超时，返回剩余待输出的结果。
+        """
+        ready = []
+        for idx, status in enumerate(self.statuses):
+            if idx in self._finished:
+                continue
+            status.state = "timeout"
+            status.elapsed = time.monotonic() - self.started
+            status.count = len(self.buffers[idx])
+            _record_status(status)
+            print(f"[WARN] Source {status.name} timed out after {status.elapsed:.1f}s")
+            if not self.ordered:
+                ready.append((status, list(self.buffers[idx])))
+        if self.ordered:
+            # 超时源及排在其后的已完成源在此按顺序补齐输出（超时源只取截止前的部分结果）
+            while self._next_idx < len(self.statuses):
+                ready.append((self.statuses[self._next_idx], list(self.buffers[self._next_idx])))
+                self._next_idx += 1
+        return ready
 
-    return all_papers
 
+def _iter_concurrent(
+    query: str,
+    sources: Sequence[BaseSource],
+    max_results: int,
+    from_year: Optional[int],
+    deadline: Optional[float],
+    ordered: bool,
+    cache: Optional[QueryCache],
+) -> Iterator[Tuple[SourceStatus, List[Paper]]]:
+    run = _ConcurrentRun(sources, deadline, ordered)
+    executor = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="source")
+    futures: Dict[Future, int] = {}
+    try:
+        for idx, src in enumerate(sources):
+            fut = executor.submit(_collect, src, run.buffers[idx], query, max_results, from_year, cache)
+            futures[fut] = idx
 
-def _dedup_key(paper: Paper) -> str:
-    if paper.doi:
-        return f"doi:{paper.doi.lower()}"
-    first_author = paper.authors[0].lower() if paper.authors else ""
-    year = paper.published_at.year if paper.published_at else 0
-    return f"title:{paper.title.lower()}|author:{first_author}|year:{year}"
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=run.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                # 截止时间已到，剩余的源在 expire 中标记为超时
+                break
+            for fut in done:
+                exc = fut.exception()
+                yield from run.complete(futures[fut], exc, fut.result() if exc is None else False)
 
+        yield from run.expire()
+    finally:
+        # 不等待仍在运行的源（它们会在各自的 HTTP 超时后自行结束）
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
+async def aiter_source_results(
+    query: str,
+    sources: Sequence[BaseSource],
+    max_results: int = 50,
+    from_year: Optional[int] = None,
+    deadline: Optional[float] = None,
+    ordered: bool = True,
+    cache: Optional[QueryCache] = None,
+) -> AsyncIterator[Tuple[SourceStatus, List[Paper]]]:
+    """
+    iter_source_results 的异步版本，各数据源通过 asearch 并发执行。
+    """
+    if not sources:
+        return
 
+    run = _ConcurrentRun(sources, deadline, ordered)
+    tasks: Dict[asyncio.Task, int] = {}
+    for idx, src in enumerate(sources):
+        coro = _acollect(src, run.buffers[idx], query, max_results, from_year, cache)
+        tasks[asyncio.ensure_future(coro)] = idx
+
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=run.remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break
+            for task in done:
+                exc = task.exception()
+                for item in run.complete(tasks[task], exc, task.result() if exc is None else False):
+                    yield item
+
+        for item in run.expire():
+            yield item
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _collect(
+    src: BaseSource,
+    buf: List[Paper],
+    query: str,
+    max_results: int,
+    from_year: Optional[int],
+    cache: Optional[QueryCache] = None,
+) -> bool:
+    """
+    执行单个数据源的检索并把结果写入 buf，返回是否命中缓存。
+    """
+    if cache is not None:
+        cached = cache.get(src.name, query, max_results, from_year)
+        metrics.CACHE_REQUESTS.inc(src.name, "miss" if cached is None else "hit")
+        if cached is not None:
+            buf.extend(cached)
+            return True
+
+    # 逐条追加，截止时间到达时可以拿到已解析的部分结果；未下推到上游的过滤条件在这里统一处理
+    papers = src.search(query=query, max_results=max_results, from_year=from_year)
+    for paper in src.apply_filters(papers, from_year):
+        buf.append(paper)
+
+    if cache is not None:
+        cache.put(src.name, query, max_results, from_year, buf)
+    return False
+
+
+async def _acollect(
+    src: BaseSource,
+    buf: List[Paper],
+    query: str,
+    max_results: int,
+    from_year: Optional[int],
+    cache: Optional[QueryCache] = None,
+) -> bool:
+    """
+    _collect 的异步版本，远程检索通过 asearch 执行。
+
+    缓存读写涉及 SQLite I/O（可能因其他进程写锁而等待），放到线程池中执行，不阻塞事件循环；
+    使用 asyncio 默认线程池而非数据源 I/O 线程池，缓存命中不必排在限速等待的检索之后。
+    """
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, src.name, query, max_results, from_year)
+        metrics.CACHE_REQUESTS.inc(src.name, "miss" if cached is None else "hit")
+        if cached is not None:
+            buf.extend(cached)
+            return True
 
+    await src.asearch(query=query, max_results=max_results, from_year=from_year, into=buf)
 
+    if cache is not None:
+        await asyncio.to_thread(cache.put, src.name, query, max_results, from_year, buf)
+    return False
@@ -0,0 +1,557 @@
+"""
+检索结果缓存。
+
+缓存位于 aggregate_search 与各数据源之间，按 (数据源, 查询词, max_results, from_year) 缓存单个源的结果：
+- 进程内 LRU 层：命中时无需任何 IO；
+- 磁盘 SQLite 层：多个 uvicorn worker / 命令行进程共享，进程重启后仍然有效；
+- 每个数据源可单独设置 TTL，两层都有条目数上限，超出后按最近访问时间淘汰；
+- stats() 返回各层的命中/未命中计数，便于观察缓存效果。
+
+另提供 OAStatusCache：以 DOI 为键缓存 Unpaywall 的开放获取查询结果，
+开放获取（正向）与非开放获取（负向）结果使用不同的 TTL。
+
+ResultSnapshotStore 保存一次聚合检索的完整结果（快照），供 /api/search 分页读取，
+翻页时不再重新请求各数据源。
+"""
+
+from __future__ import annotations
+
+import json
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Paper
+
+
+DEFAULT_TTL = 3600.0
+DEFAULT_OA_POSITIVE_TTL = 30 * 86400.0
+DEFAULT_OA_NEGATIVE_TTL = 86400.0
+DEFAULT_SNAPSHOT_TTL = 1800.0
+
+_shared_lock = threading.Lock()
+_shared_caches: Dict[Tuple, "QueryCache"] = {}
+_shared_oa_caches: Dict[Tuple, "OAStatusCache"] = {}
+_shared_snapshot_stores: Dict[Tuple, "ResultSnapshotStore"] = {}
+
+
+class QueryCache:
+    """
+    两级（内存 LRU + SQLite）检索结果缓存，线程安全。
+
+    参数:
+        path: SQLite 文件路径，为 None 时只使用内存层
+        memory_entries: 内存层最多缓存的查询数
+        disk_entries: 磁盘层最多缓存的查询数
+        ttl: 各数据源的缓存时长（秒），键为数据源名称，"default" 为默认值
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_entries: int = 256,
+        disk_entries: int = 10000,
+        ttl: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.memory_entries = max(0, int(memory_entries))
+        self.disk_entries = max(0, int(disk_entries))
+        self.ttl = {k: float(v) for k, v in (ttl or {}).items()}
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, List[dict]]]" = OrderedDict()
+        self._counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._puts_since_trim = 0
+        if path:
+            db_path = Path(path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(db_path), timeout=10.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_cache (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    payload TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_query_cache_accessed ON query_cache(accessed_at)")
+            self._conn.commit()
+
+    def ttl_for(self, source: str) -> float:
+        return self.ttl.get(source, self.ttl.get("default", DEFAULT_TTL))
+
+    def get(
+        self,
+        source: str,
+        query: str,
+        max_results: int,
+        from_year: Optional[int],
+    ) -> Optional[List[Paper]]:
+        """
+        查询缓存，未命中或已过期时返回 None。
+        """
+        key = make_key(source, query, max_results, from_year)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, records = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return [Paper.from_dict(r) for r in records]
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT expires_at, payload FROM query_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    self._conn.execute("UPDATE query_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    records = json.loads(row[1])
+                    self._remember(key, row[0], records)
+                    self._counters["disk_hits"] += 1
+                    return [Paper.from_dict(r) for r in records]
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(
+        self,
+        source: str,
+        query: str,
+        max_results: int,
+        from_year: Optional[int],
+        papers: List[Paper],
+    ) -> None:
+        """
+        写入缓存（同时写内存层和磁盘层）。
+        """
+        ttl = self.ttl_for(source)
+        if ttl <= 0:
+            return
+        key = make_key(source, query, max_results, from_year)
+        now = time.time()
+        records = [p.to_dict() for p in papers]
+
+        with self._lock:
+            self._remember(key, now + ttl, records)
+            self._counters["writes"] += 1
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_cache (key, source, expires_at, accessed_at, payload) VALUES (?, ?, ?, ?, ?)",
+                (key, source, now + ttl, now, json.dumps(records, ensure_ascii=False)),
+            )
+            self._puts_since_trim += 1
+            # 淘汰有一定开销，每写入若干条才检查一次
+            if self._puts_since_trim >= 50:
+                self._trim_disk(now)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM query_cache")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        返回命中/未命中计数及当前各层条目数。
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            if self._conn is not None:
+                stats["disk_entries"] = self._conn.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(self, key: str, expires_at: float, records: List[dict]) -> None:
+        if self.memory_entries <= 0:
+            return
+        self._memory[key] = (expires_at, records)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _trim_disk(self, now: float) -> None:
+        self._puts_since_trim = 0
+        cur = self._conn.execute("DELETE FROM query_cache WHERE expires_at <= ?", (now,))
+        removed = cur.rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM query_cache").fetchone()[0]
+        if count > self.disk_entries:
+            cur = self._conn.execute(
+                "DELETE FROM query_cache WHERE key IN "
+                "(SELECT key FROM query_cache ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.disk_entries,),
+            )
+            removed += cur.rowcount
+        self._counters["evictions"] += max(0, removed)
+
+
+class OAStatusCache:
+    """
+    DOI → 开放获取查询结果的持久化缓存（SQLite，多进程共享），线程安全。
+
+    参数:
+        path: SQLite 文件路径
+        positive_ttl: 开放获取结果的缓存时长（秒）
+        negative_ttl: 非开放获取结果的缓存时长（秒），通常短于 positive_ttl
+    """
+
+    def __init__(
+        self,
+        path: str,
+        positive_ttl: float = DEFAULT_OA_POSITIVE_TTL,
+        negative_ttl: float = DEFAULT_OA_NEGATIVE_TTL,
+    ) -> None:
+        self.positive_ttl = float(positive_ttl)
+        self.negative_ttl = float(negative_ttl)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {"hits": 0, "misses": 0, "writes": 0}
+
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), timeout=10.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS oa_status (
+                doi TEXT PRIMARY KEY,
+                is_oa INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                payload TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, dois: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """
+        批量查询，返回命中的 DOI → 结果（非开放获取的负向结果值为 None）。
+        未命中或已过期的 DOI 不出现在返回值中。DOI 需已规范化（小写、无前缀）。
+        """
+        keys = list(dict.fromkeys(d for d in dois if d))
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, Optional[dict]] = {}
+        with self._lock:
+            # SQLite 单条语句的参数数量有限，分批查询
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT doi, is_oa, payload FROM oa_status WHERE doi IN ({placeholders}) AND expires_at > ?",
+                    (*chunk, now),
+                ).fetchall()
+                for doi, is_oa, payload in rows:
+                    found[doi] = json.loads(payload) if is_oa and payload else None
+            self._counters["hits"] += len(found)
+            self._counters["misses"] += len(keys) - len(found)
+        return found
+
+    def get(self, doi: str) -> Tuple[bool, Optional[dict]]:
+        """
+        查询单个 DOI，返回 (是否命中, 结果)。
+        """
+        found = self.get_many([doi])
+        return (doi in found), found.get(doi)
+
+    def put_many(self, results: Dict[str, Optional[dict]]) -> None:
+        """
+        批量写入查询结果；值为 None 或 is_oa 为假时按负向结果缓存。
+        """
+        if not results:
+            return
+        now = time.time()
+        rows = []
+        for doi, result in results.items():
+            if not doi:
+                continue
+            is_oa = bool(result and result.get("is_oa"))
+            ttl = self.positive_ttl if is_oa else self.negative_ttl
+            payload = json.dumps(result, ensure_ascii=False) if is_oa else None
+            rows.append((doi, int(is_oa), now + ttl, payload))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO oa_status (doi, is_oa, expires_at, payload) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("DELETE FROM oa_status WHERE expires_at <= ?", (now,))
+            self._conn.commit()
+            self._counters["writes"] += len(rows)
+
+    def put(self, doi: str, result: Optional[dict]) -> None:
+        self.put_many({doi: result})
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM oa_status").fetchone()[0]
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ResultSnapshotStore:
+    """
+    检索结果快照（内存 LRU + SQLite，多进程共享），线程安全。
+
+    快照一经创建不再修改，id 随机生成且不可猜测；相同检索条件在有效期内复用同一快照。
+
+    参数:
+        path: SQLite 文件路径，为 None 时只使用内存层（多 worker 部署时翻页请求可能落到其他进程而失效）
+        ttl: 快照有效期（秒）
+        memory_entries: 内存层最多保留的快照数
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = DEFAULT_SNAPSHOT_TTL,
+        memory_entries: int = 64,
+    ) -> None:
+        self.ttl = float(ttl)
+        self.memory_entries = max(1, int(memory_entries))
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, List[dict], List[dict]]]" = OrderedDict()
+        # 检索条件 → 内存层中的快照 id，及其反向映射；只登记仍在内存层中的快照，随其淘汰或过期一并移除
+        self._by_request: Dict[str, str] = {}
+        self._request_keys: Dict[str, str] = {}
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            db_path = Path(path)
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(db_path), timeout=10.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS result_snapshots (
+                    id TEXT PRIMARY KEY,
+                    request_key TEXT,
+                    expires_at REAL NOT NULL,
+                    papers TEXT NOT NULL,
+                    statuses TEXT NOT NULL
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_result_snapshots_request ON result_snapshots(request_key, expires_at)"
+            )
+            self._conn.commit()
+
+    def create(self, papers: Iterable[Paper], statuses: Iterable[dict], request_key: Optional[str] = None) -> str:
+        """
+        保存一次检索的结果（按给定顺序），返回快照 id。
+        request_key 为 None 时该快照只能按 id 读取，不会被 find 复用（如部分数据源失败的结果）。
+        """
+        records = [p.to_dict() for p in papers]
+        status_list = list(statuses)
+        snapshot_id = secrets.token_urlsafe(12)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            for stale_id in [sid for sid, entry in self._memory.items() if entry[0] <= now]:
+                self._forget(stale_id)
+            self._remember(snapshot_id, expires_at, records, status_list, request_key)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO result_snapshots (id, request_key, expires_at, papers, statuses) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        snapshot_id,
+                        request_key,
+                        expires_at,
+                        json.dumps(records, ensure_ascii=False),
+                        json.dumps(status_list, ensure_ascii=False),
+                    ),
+                )
+                self._conn.execute("DELETE FROM result_snapshots WHERE expires_at <= ?", (now,))
+                self._conn.commit()
+        return snapshot_id
+
+    def find(self, request_key: str) -> Optional[str]:
+        """
+        返回相同检索条件下仍然有效的最新快照 id。
+        """
+        now = time.time()
+        with self._lock:
+            snapshot_id = self._by_request.get(request_key)
+            if snapshot_id is not None:
+                if self._memory[snapshot_id][0] > now:
+                    return snapshot_id
+                self._forget(snapshot_id)
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                """
+                SELECT id FROM result_snapshots WHERE request_key = ? AND expires_at > ?
+                ORDER BY expires_at DESC LIMIT 1
+                """,
+                (request_key, now),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, snapshot_id: str) -> Optional[Tuple[float, List[dict], List[dict]]]:
+        """
+        读取快照，返回 (过期时间, 论文字典列表, 数据源状态列表)；不存在或已过期时返回 None。
+        论文为 Paper.to_dict 格式，调用方不应修改返回的列表。
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(snapshot_id)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(snapshot_id)
+                    return entry
+                self._forget(snapshot_id)
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT expires_at, papers, statuses FROM result_snapshots WHERE id = ? AND expires_at > ?",
+                (snapshot_id, now),
+            ).fetchone()
+            if row is None:
+                return None
+            expires_at, papers, statuses = row
+            return self._remember(snapshot_id, expires_at, json.loads(papers), json.loads(statuses))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _remember(
+        self,
+        snapshot_id: str,
+        expires_at: float,
+        records: List[dict],
+        statuses: List[dict],
+        request_key: Optional[str] = None,
+    ):
+        # 调用方需持有 self._lock
+        entry = (expires_at, records, statuses)
+        self._memory[snapshot_id] = entry
+        self._memory.move_to_end(snapshot_id)
+        if request_key is not None:
+            previous = self._by_request.get(request_key)
+            if previous is not None and previous != snapshot_id:
+                self._request_keys.pop(previous, None)
+            self._by_request[request_key] = snapshot_id
+            self._request_keys[snapshot_id] = request_key
+        while len(self._memory) > self.memory_entries:
+            self._forget(next(iter(self._memory)))
+        return entry
+
+    def _forget(self, snapshot_id: str) -> None:
+        # 从内存层移除快照及其检索条件索引（SQLite 中的记录不受影响），调用方需持有 self._lock
+        self._memory.pop(snapshot_id, None)
+        request_key = self._request_keys.pop(snapshot_id, None)
+        if request_key is not None and self._by_request.get(request_key) == snapshot_id:
+            del self._by_request[request_key]
+
+
+def make_key(source: str, query: str, max_results: int, from_year: Optional[int]) -> str:
+    """
+    缓存键：查询词忽略大小写与多余空白。
+    """
+    normalized = " ".join(query.lower().split())
+    return f"{source}|{normalized}|{int(max_results)}|{from_year if from_year is not None else ''}"
+
+
+def build_cache(config: Dict) -> Optional[QueryCache]:
+    """
+    根据配置的 cache 节点返回进程内共享的 QueryCache；未启用时返回 None。
+
+    相同配置多次调用返回同一个实例，内存层与命中计数因此在请求之间保留。
+    """
+    cache_cfg = config.get("cache", {}) or {}
+    if not cache_cfg.get("enabled", True):
+        return None
+
+    path = cache_cfg.get("path", "data/cache/query_cache.sqlite3") or None
+    memory_entries = int(cache_cfg.get("memory_entries", 256))
+    disk_entries = int(cache_cfg.get("disk_entries", 10000))
+    ttl = dict(cache_cfg.get("ttl") or {})
+
+    signature = (path, memory_entries, disk_entries, tuple(sorted(ttl.items())))
+    with _shared_lock:
+        cache = _shared_caches.get(signature)
+        if cache is None:
+            cache = QueryCache(path=path, memory_entries=memory_entries, disk_entries=disk_entries, ttl=ttl)
+            _shared_caches[signature] = cache
+        return cache
+
+
+def build_oa_cache(config: Dict) -> Optional[OAStatusCache]:
+    """
+    根据配置的 cache.open_access 节点返回进程内共享的 OAStatusCache；未启用时返回 None。
+    """
+    cache_cfg = config.get("cache", {}) or {}
+    oa_cfg = cache_cfg.get("open_access", {}) or {}
+    if not oa_cfg.get("enabled", True):
+        return None
+
+    path = oa_cfg.get("path", "data/cache/open_access.sqlite3")
+    positive_ttl = float(oa_cfg.get("positive_ttl", DEFAULT_OA_POSITIVE_TTL))
+    negative_ttl = float(oa_cfg.get("negative_ttl", DEFAULT_OA_NEGATIVE_TTL))
+
+    signature = (path, positive_ttl, negative_ttl)
+    with _shared_lock:
+        cache = _shared_oa_caches.get(signature)
+        if cache is None:
+            cache = OAStatusCache(path=path, positive_ttl=positive_ttl, negative_ttl=negative_ttl)
+            _shared_oa_caches[signature] = cache
+        return cache
+
+
+def build_snapshot_store(config: Dict) -> ResultSnapshotStore:
+    """
+    根据配置的 cache.snapshots 节点返回进程内共享的 ResultSnapshotStore。
+    """
+    cache_cfg = config.get("cache", {}) or {}
+    snap_cfg = cache_cfg.get("snapshots", {}) or {}
+    path = snap_cfg.get("path", "data/cache/snapshots.sqlite3") or None
+    ttl = float(snap_cfg.get("ttl", DEFAULT_SNAPSHOT_TTL))
+    memory_entries = int(snap_cfg.get("memory_entries", 64))
+
+    signature = (path, ttl, memory_entries)
+    with _shared_lock:
+        store = _shared_snapshot_stores.get(signature)
+        if store is None:
+            store = ResultSnapshotStore(path=path, ttl=ttl, memory_entries=memory_entries)
+            _shared_snapshot_stores[signature] = store
+        return store
@@ -0,0 +1,462 @@
+"""
+按列存储的论文批次与列式导出。
+
+PaperBatch 按字段分列保存论文，不为每篇论文创建对象：
+- 字符串列为一段连续的 UTF-8 字节 + 偏移数组 + 有效位（与 Arrow 的布局相同），没有逐条的 str 对象开销；
+- authors 为列表列（每篇论文的作者区间偏移 + 作者字符串列）；
+- published_at 为 UTC 微秒时间戳（int64），source 按字典编码；
+- extra 序列化为 JSON 字符串列，空 extra 记为 null。
+
+列式导出使用固定 schema（SCHEMA），不随 extra 内容变化：
+- write_columnar / iter_columnar：无第三方依赖的分块二进制格式（.pcol），每块直接写出上述缓冲区；
+- write_parquet / iter_parquet：安装了 pyarrow 时导出为 Parquet，列与 SCHEMA 一致。
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .models import Paper
+
+
+# 固定 schema：(列名, 类型)
+SCHEMA: List[Tuple[str, str]] = [
+    ("id", "string"),
+    ("title", "string"),
+    ("abstract", "string"),
+    ("authors", "list<string>"),
+    ("published_at", "timestamp[us]"),
+    ("source", "dictionary<string>"),
+    ("url", "string"),
+    ("doi", "string"),
+    ("journal", "string"),
+    ("extra", "string"),  # JSON
+]
+
+DEFAULT_CHUNK_ROWS = 65536
+
+_MAGIC = b"PCOL\x01\n"
+_STRING_FIELDS = ("id", "title", "abstract", "url", "doi", "journal", "extra")
+_EPOCH = datetime(1970, 1, 1)
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class StringColumn:
+    """
+    可空字符串列：连续的 UTF-8 数据 + 偏移（n + 1 个）+ 有效位（每行 1 字节）。
+    """
+
+    __slots__ = ("data", "offsets", "valid")
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+        self.offsets = array("q", [0])
+        self.valid = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def append(self, value: Optional[str]) -> None:
+        if value is None:
+            self.valid.append(0)
+        else:
+            self.data += value.encode("utf-8")
+            self.valid.append(1)
+        self.offsets.append(len(self.data))
+
+    def __getitem__(self, idx: int) -> Optional[str]:
+        if not self.valid[idx]:
+            return None
+        return self.data[self.offsets[idx]:self.offsets[idx + 1]].decode("utf-8")
+
+    def to_list(self) -> List[Optional[str]]:
+        data = bytes(self.data)
+        offsets = self.offsets.tolist()
+        bounds = zip(offsets, offsets[1:])
+        if data.isascii():
+            # 纯 ASCII 时字节偏移即字符偏移，整段解码一次后切片
+            text = data.decode("ascii")
+            values: List[Optional[str]] = [text[start:end] for start, end in bounds]
+        else:
+            values = [data[start:end].decode("utf-8") for start, end in bounds]
+        if 0 in self.valid:
+            values = [value if ok else None for value, ok in zip(values, self.valid)]
+        return values
+
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets) + len(self.valid)
+
+
+class PaperBatch:
+    """
+    按列保存的一批论文，可逐条 append，也可按下标还原为 Paper。
+
+    published_at 统一换算为 UTC 后保存，还原时为不带时区的 UTC 时间。
+    """
+
+    __slots__ = ("strings", "author_offsets", "authors", "published", "published_valid", "source_codes", "source_values", "_source_index")
+
+    def __init__(self) -> None:
+        self.strings: Dict[str, StringColumn] = {name: StringColumn() for name in _STRING_FIELDS}
+        self.author_offsets = array("q", [0])
+        self.authors = StringColumn()
+        self.published = array("q")
+        self.published_valid = bytearray()
+        self.source_codes = array("H")
+        self.source_values: List[str] = []
+        self._source_index: Dict[str, int] = {}
+
+    @classmethod
+    def from_papers(cls, papers: Iterable[Paper]) -> "PaperBatch":
+        batch = cls()
+        batch.extend(papers)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.published_valid)
+
+    def append(self, paper: Paper) -> None:
+        strings = self.strings
+        strings["id"].append(paper.id)
+        strings["title"].append(paper.title)
+        strings["abstract"].append(paper.abstract)
+        strings["url"].append(paper.url)
+        strings["doi"].append(paper.doi)
+        strings["journal"].append(paper.journal)
+        strings["extra"].append(json.dumps(paper.extra, ensure_ascii=False) if paper.extra else None)
+
+        for name in paper.authors:
+            self.authors.append(name)
+        self.author_offsets.append(len(self.authors))
+
+        if paper.published_at is None:
+            self.published.append(0)
+            self.published_valid.append(0)
+        else:
+            self.published.append(_to_micros(paper.published_at))
+            self.published_valid.append(1)
+
+        code = self._source_index.get(paper.source)
+        if code is None:
+            code = self._source_index[paper.source] = len(self.source_values)
+            self.source_values.append(paper.source)
+        self.source_codes.append(code)
+
+    def extend(self, papers: Iterable[Paper]) -> None:
+        for paper in papers:
+            self.append(paper)
+
+    def __getitem__(self, idx: int) -> Paper:
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("PaperBatch index out of range")
+        strings = self.strings
+        extra = strings["extra"][idx]
+        return Paper(
+            id=strings["id"][idx],
+            title=strings["title"][idx],
+            abstract=strings["abstract"][idx],
+            authors=[self.authors[i] for i in range(self.author_offsets[idx], self.author_offsets[idx + 1])],
+            published_at=_from_micros(self.published[idx]) if self.published_valid[idx] else None,
+            source=self.source_values[self.source_codes[idx]],
+            url=strings["url"][idx],
+            doi=strings["doi"][idx],
+            journal=strings["journal"][idx],
+            extra=json.loads(extra) if extra else {},
+        )
+
+    def __iter__(self) -> Iterator[Paper]:
+        # 整列解码后按行组装，比逐条 __getitem__ 少做大量切片
+        strings = self.strings
+        authors = self.authors.to_list()
+        offsets = self.author_offsets.tolist()
+        rows = zip(
+            *(strings[name].to_list() for name in ("id", "title", "abstract", "url", "doi", "journal", "extra")),
+            offsets,
+            offsets[1:],
+            self.column("published_at"),
+            self.column("source"),
+        )
+        for id_, title, abstract, url, doi, journal, extra, start, end, published_at, source in rows:
+            yield Paper(
+                id=id_,
+                title=title,
+                abstract=abstract,
+                authors=authors[start:end],
+                published_at=published_at,
+                source=source,
+                url=url,
+                doi=doi,
+                journal=journal,
+                extra=json.loads(extra) if extra else {},
+            )
+
+    def column(self, name: str) -> list:
+        """
+        以 Python 列表返回一列（authors 为列表的列表，published_at 为 datetime）。
+        """
+        if name in self.strings:
+            return self.strings[name].to_list()
+        if name == "authors":
+            authors = self.authors.to_list()
+            offsets = self.author_offsets.tolist()
+            return [authors[start:end] for start, end in zip(offsets, offsets[1:])]
+        if name == "published_at":
+            return [_from_micros(v) if ok else None for v, ok in zip(self.published, self.published_valid)]
+        if name == "source":
+            return [self.source_values[c] for c in self.source_codes]
+        raise KeyError(name)
+
+    def nbytes(self) -> int:
+        """
+        各列缓冲区的字节数（近似内存占用）。
+        """
+        return (
+            sum(col.nbytes() for col in self.strings.values())
+            + self.authors.nbytes()
+            + self.author_offsets.itemsize * len(self.author_offsets)
+            + self.published.itemsize * len(self.published)
+            + len(self.published_valid)
+            + self.source_codes.itemsize * len(self.source_codes)
+        )
+
+
+def iter_batches(papers: Iterable[Paper], chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[PaperBatch]:
+    """
+    把论文流切分为最多 chunk_rows 条的 PaperBatch。
+    """
+    batch = PaperBatch()
+    for paper in papers:
+        batch.append(paper)
+        if len(batch) >= chunk_rows:
+            yield batch
+            batch = PaperBatch()
+    if len(batch):
+        yield batch
+
+
+def write_columnar(
+    papers: Union[Iterable[Paper], PaperBatch],
+    path: Union[str, Path],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    compress: bool = False,
+) -> int:
+    """
+    导出为分块二进制列式文件（.pcol），返回写入条数。
+
+    每块依次写出各列的缓冲区，读取时按块还原为 PaperBatch，无需逐行解析文本。
+    compress=True 时各缓冲区用 zlib 压缩（文件约为不压缩时的 40%，但导出 / 读取慢约十倍）。
+    """
+    batches = [papers] if isinstance(papers, PaperBatch) else iter_batches(papers, chunk_rows)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with path.open("wb") as f:
+        f.write(_MAGIC)
+        for batch in batches:
+            _write_chunk(f, batch, compress)
+            count += len(batch)
+        f.write(struct.pack("<Q", 0))
+    return count
+
+
+def iter_columnar(path: Union[str, Path]) -> Iterator[PaperBatch]:
+    """
+    按块读取 write_columnar 写出的文件。
+    """
+    with Path(path).open("rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a columnar paper file")
+        while True:
+            (rows,) = struct.unpack("<Q", _read_exact(f, 8))
+            if rows == 0:
+                return
+            yield _read_chunk(f, rows)
+
+
+def read_columnar(path: Union[str, Path]) -> Iterator[Paper]:
+    """
+    逐条读取列式文件中的论文。
+    """
+    for batch in iter_columnar(path):
+        yield from batch
+
+
+def write_parquet(
+    papers: Union[Iterable[Paper], PaperBatch],
+    path: Union[str, Path],
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> int:
+    """
+    导出为 Parquet（需要 pyarrow），每个 PaperBatch 写为一个 row group，返回写入条数。
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet 导出需要安装 pyarrow（pip install pyarrow），或改用无依赖的 columnar 格式") from e
+
+    schema = _arrow_schema(pa)
+    batches = [papers] if isinstance(papers, PaperBatch) else iter_batches(papers, chunk_rows)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with pq.ParquetWriter(str(path), schema) as writer:
+        for batch in batches:
+            published = [v if ok else None for v, ok in zip(batch.published, batch.published_valid)]
+            arrays = [
+                pa.array(batch.column(name), type=schema.field(name).type) if name != "published_at"
+                else pa.array(published, type=pa.timestamp("us"))
+                for name, _ in SCHEMA
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(batch)
+    return count
+
+
+def iter_parquet(path: Union[str, Path], batch_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Paper]:
+    """
+    逐条读取 write_parquet 写出的文件（需要 pyarrow）。
+    """
+    import pyarrow.parquet as pq
+
+    for record_batch in pq.ParquetFile(str(path)).iter_batches(batch_size=batch_rows):
+        columns = record_batch.to_pydict()
+        for idx in range(record_batch.num_rows):
+            extra = columns["extra"][idx]
+            yield Paper(
+                id=columns["id"][idx],
+                title=columns["title"][idx],
+                abstract=columns["abstract"][idx],
+                authors=list(columns["authors"][idx] or []),
+                published_at=columns["published_at"][idx],
+                source=columns["source"][idx],
+                url=columns["url"][idx],
+                doi=columns["doi"][idx],
+                journal=columns["journal"][idx],
+                extra=json.loads(extra) if extra else {},
+            )
+
+
+def _arrow_schema(pa):
+    return pa.schema(
+        [
+            ("id", pa.string()),
+            ("title", pa.string()),
+            ("abstract", pa.string()),
+            ("authors", pa.list_(pa.string())),
+            ("published_at", pa.timestamp("us")),
+            ("source", pa.dictionary(pa.int16(), pa.string())),
+            ("url", pa.string()),
+            ("doi", pa.string()),
+            ("journal", pa.string()),
+            ("extra", pa.string()),
+        ]
+    )
+
+
+def _to_micros(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+# ---- 二进制块格式 ----
+# 块 = 行数(u64) + 若干缓冲区；缓冲区 = 原始长度(u64) + 存储长度(u64) + 数据（存储长度小于原始长度时为 zlib 压缩）
+
+
+def _write_chunk(f: BinaryIO, batch: PaperBatch, compress: bool) -> None:
+    f.write(struct.pack("<Q", len(batch)))
+    for name in _STRING_FIELDS:
+        _write_string_column(f, batch.strings[name], compress)
+    _write_buffer(f, _array_bytes(batch.author_offsets), compress)
+    _write_string_column(f, batch.authors, compress)
+    _write_buffer(f, bytes(batch.published_valid), compress)
+    _write_buffer(f, _array_bytes(batch.published), compress)
+    _write_buffer(f, json.dumps(batch.source_values, ensure_ascii=False).encode("utf-8"), False)
+    _write_buffer(f, _array_bytes(batch.source_codes), compress)
+
+
+def _read_chunk(f: BinaryIO, rows: int) -> PaperBatch:
+    batch = PaperBatch()
+    for name in _STRING_FIELDS:
+        batch.strings[name] = _read_string_column(f)
+    batch.author_offsets = _read_array(f, "q")
+    batch.authors = _read_string_column(f)
+    batch.published_valid = bytearray(_read_buffer(f))
+    batch.published = _read_array(f, "q")
+    batch.source_values = json.loads(_read_buffer(f).decode("utf-8"))
+    batch._source_index = {value: idx for idx, value in enumerate(batch.source_values)}
+    batch.source_codes = _read_array(f, "H")
+    if len(batch) != rows or len(batch.strings["id"]) != rows:
+        raise ValueError("corrupted columnar chunk")
+    return batch
+
+
+def _write_string_column(f: BinaryIO, col: StringColumn, compress: bool) -> None:
+    _write_buffer(f, bytes(col.valid), compress)
+    _write_buffer(f, _array_bytes(col.offsets), compress)
+    _write_buffer(f, bytes(col.data), compress)
+
+
+def _read_string_column(f: BinaryIO) -> StringColumn:
+    col = StringColumn()
+    col.valid = bytearray(_read_buffer(f))
+    col.offsets = _read_array(f, "q")
+    col.data = bytearray(_read_buffer(f))
+    return col
+
+
+def _write_buffer(f: BinaryIO, data: bytes, compress: bool) -> None:
+    stored = zlib.compress(data, 1) if compress and len(data) > 64 else data
+    if len(stored) >= len(data):
+        stored = data
+    f.write(struct.pack("<QQ", len(data), len(stored)))
+    f.write(stored)
+
+
+def _read_buffer(f: BinaryIO) -> bytes:
+    raw_size, stored_size = struct.unpack("<QQ", _read_exact(f, 16))
+    data = _read_exact(f, stored_size)
+    if stored_size != raw_size:
+        data = zlib.decompress(data)
+        if len(data) != raw_size:
+            raise ValueError("corrupted columnar buffer")
+    return data
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("unexpected end of columnar file")
+    return data
+
+
+def _array_bytes(values: array) -> bytes:
+    # 文件内统一使用小端序
+    if _LITTLE_ENDIAN:
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _read_array(f: BinaryIO, typecode: str) -> array:
+    values = array(typecode)
+    values.frombytes(_read_buffer(f))
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
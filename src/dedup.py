@@ -0,0 +1,182 @@
+"""
+跨数据源的论文去重。
+
+精确去重（Paper.dedup_key）无法识别同一论文在不同来源中的版本：arXiv 预印本没有 DOI，
+published_at 是预印本日期，标题大小写、标点、空白也常与正式发表版本不同。
+
+Deduplicator 按以下顺序判断一条记录是否与已有记录重复：
+1. DOI 相同；
+2. 规范化标题（Unicode 归一、去标点、压缩空白）完全相同；
+3. 标题 MinHash 落入同一 LSH 桶，且词集合 Jaccard 相似度不低于阈值。
+2、3 两步还要求两条记录的 DOI、年份、首位作者不冲突。
+每条记录只与同桶的少量候选比较，整体耗时与记录数近似线性，适合 10 万条级别的深度检索结果。
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .merge import merge_papers
+from .models import Paper
+
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MAX_YEAR_GAP = 2
+
+# MinHash 签名长度 = bands * rows；rows 越大候选越少，bands 越多召回越高
+_BANDS = 8
+_ROWS = 3
+# 单个 LSH 桶最多比较的候选数，避免高频标题（如 "Introduction"）退化为两两比较
+_MAX_BUCKET_CANDIDATES = 64
+
+# 以“与随机掩码异或”模拟 MinHash 的随机排列：min(map(mask.__xor__, ...)) 在 C 层循环，
+# 比逐个做模乘快一个数量级；掩码与 crc32 都是确定的，同样的输入每次去重结果一致
+_rng = random.Random(20240101)
+_PERMUTATIONS: List[int] = [_rng.getrandbits(32) for _ in range(_BANDS * _ROWS)]
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """
+    标题规范化：NFKD 分解并去掉重音符号，统一大小写，标点替换为空格并压缩空白。
+    """
+    if not title:
+        return ""
+    text = title
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NON_WORD.sub(" ", text.casefold())
+    return " ".join(text.split())
+
+
+class Deduplicator:
+    """
+    增量去重器：逐条 add，返回该记录重复的已有记录序号（从 0 开始），新记录返回 None。
+
+    新记录的序号按加入顺序递增，调用方可以用同一序号维护自己的结果列表。
+
+    参数:
+        fuzzy: 为 False 时只做 DOI / 规范化标题的精确匹配
+        threshold: 标题词集合 Jaccard 相似度阈值
+        max_year_gap: 允许的年份差（预印本与正式发表版本通常相差 1~2 年）
+    """
+
+    def __init__(
+        self,
+        fuzzy: bool = True,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_year_gap: int = DEFAULT_MAX_YEAR_GAP,
+    ) -> None:
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.max_year_gap = max_year_gap
+        self._records: List[Tuple[Optional[str], Optional[int], Set[str], Set[str]]] = []
+        self._by_doi: Dict[str, int] = {}
+        self._by_title: Dict[str, List[int]] = defaultdict(list)
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, paper: Paper) -> Optional[int]:
+        doi = paper.doi.lower() if paper.doi else None
+        year = paper.published_at.year if paper.published_at else None
+        title = normalize_title(paper.title)
+        words = set(title.split())
+        author = _author_tokens(paper.authors[0]) if paper.authors else set()
+
+        if doi is not None and doi in self._by_doi:
+            return self._by_doi[doi]
+
+        record = (doi, year, words, author)
+        bands = _lsh_bands(title) if self.fuzzy and title else []
+        match = self._find(record, title, bands)
+        if match is not None:
+            # 重复记录补充的 DOI 同样指向该记录
+            if doi is not None:
+                self._by_doi.setdefault(doi, match)
+            return match
+
+        idx = len(self._records)
+        self._records.append(record)
+        if doi is not None:
+            self._by_doi[doi] = idx
+        if title:
+            self._by_title[title].append(idx)
+            for band in bands:
+                self._buckets[band].append(idx)
+        return None
+
+    def _find(self, record, title: str, bands: List[Tuple[int, Tuple[int, ...]]]) -> Optional[int]:
+        if not title:
+            return None
+        for idx in self._by_title.get(title, ()):
+            if self._compatible(record, self._records[idx]):
+                return idx
+        words = record[2]
+        best, best_score = None, self.threshold
+        checked: Set[int] = set()
+        for band in bands:
+            for idx in self._buckets.get(band, ())[:_MAX_BUCKET_CANDIDATES]:
+                if idx in checked:
+                    continue
+                checked.add(idx)
+                other = self._records[idx]
+                score = len(words & other[2]) / len(words | other[2])
+                if score >= best_score and self._compatible(record, other):
+                    best, best_score = idx, score
+        return best
+
+    def _compatible(self, a, b) -> bool:
+        doi_a, year_a, _, author_a = a
+        doi_b, year_b, _, author_b = b
+        if doi_a and doi_b and doi_a != doi_b:
+            return False
+        if year_a is not None and year_b is not None and abs(year_a - year_b) > self.max_year_gap:
+            return False
+        if author_a and author_b and not (author_a & author_b):
+            return False
+        return True
+
+
+def deduplicate(
+    papers: Iterable[Paper],
+    fuzzy: bool = True,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Paper]:
+    """
+    对一批论文去重，重复记录按字段来源优先级合并到首次出现的记录中（见 merge.merge_papers），保持原有顺序。
+    """
+    dedup = Deduplicator(fuzzy=fuzzy, threshold=threshold)
+    result: List[Paper] = []
+    for paper in papers:
+        idx = dedup.add(paper)
+        if idx is None:
+            result.append(paper)
+        else:
+            result[idx] = merge_papers(result[idx], paper)
+    return result
+
+
+def _author_tokens(name: str) -> Set[str]:
+    # 不同来源的作者格式不一（"Smith, J." / "John Smith"），取长度 >= 2 的词比较
+    return {t for t in normalize_title(name).split() if len(t) >= 2}
+
+
+def _lsh_bands(title: str) -> List[Tuple[int, Tuple[int, ...]]]:
+    words = title.split()
+    # 词二元组比单词更有区分度；过短的标题退化为单词
+    shingles = [f"{a} {b}" for a, b in zip(words, words[1:])] if len(words) >= 3 else words
+    hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles]
+    signature = [min(map(mask.__xor__, hashes)) for mask in _PERMUTATIONS]
+    return [
+        (band, tuple(signature[band * _ROWS:(band + 1) * _ROWS]))
+        for band in range(_BANDS)
+    ]
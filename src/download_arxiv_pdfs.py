@@ -1,22 +1,15 @@
 import os
-import re
 from pathlib import Path
 from typing import List, Optional
 
-import requests
-
-from .aggregator import aggregate_search, build_sources
+from .aggregator import aggregate_search, build_sources, search_options
 from .config import load_config
+from .download_manager import build_download_manager
+from .merge import paper_sources
 from .models import Paper
-from .rate_limiter import SimpleRateLimiter
-
-
-def _safe_filename(text: str, max_len: int = 80) -> str:
-    text = re.sub(r"[\\/:*?\"<>|]", "_", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    if len(text) > max_len:
-        text = text[: max_len - 3] + "..."
-    return text or "paper"
+from .pdf_downloader import PDFDownloader
+from .pdf_store import build_pdf_store
+from .rate_limiter import build_rate_limiters
 
 
 def download_arxiv_pdfs(
@@ -37,40 +30,32 @@ def download_arxiv_pdfs(
         sources=sources,
         max_results=max_results,
         from_year=from_year,
+        **search_options(cfg),
     )
 
-    arxiv_papers = [p for p in papers if p.source == "arxiv" and p.extra.get("pdf_url")]
+    # 合并后的记录 source 可能是其他数据源，按参与合并的来源判断
+    arxiv_papers = [p for p in papers if "arxiv" in paper_sources(p) and p.extra.get("pdf_url")]
     if not arxiv_papers:
         print("没有找到可下载的 arXiv 论文。")
         return
 
-    out_dir = Path(output_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    # 额外限速，避免请求过快
-    limiter = SimpleRateLimiter(max_calls=5, period=60.0)
-
-    print(f"共 {len(arxiv_papers)} 篇 arXiv 论文，将下载到: {out_dir.resolve()}")
-    for idx, p in enumerate(arxiv_papers, start=1):
-        pdf_url = p.extra["pdf_url"]
-        safe_title = _safe_filename(p.title or p.id)
-        filename = out_dir / f"{safe_title}.pdf"
-
-        if filename.exists():
-            print(f"[{idx}/{len(arxiv_papers)}] 已存在，跳过: {filename.name}")
-            continue
-
-        print(f"[{idx}/{len(arxiv_papers)}] 下载: {pdf_url}")
-        limiter.acquire()
-        try:
-            resp = requests.get(pdf_url, timeout=60)
-            resp.raise_for_status()
-            with open(filename, "wb") as f:
-                f.write(resp.content)
-        except Exception as e:
-            print(f"下载失败: {pdf_url} -> {e}")
-
-    print("下载完成。")
+    # PDF 按内容保存在 PDFStore 中（download.store_path），输出目录里是以标题命名的硬链接；
+    # 同一论文已下载过时不再请求，arxiv.org 的速率与并发由 rate_limit / download 配置控制
+    store = build_pdf_store(cfg)
+    downloader = PDFDownloader(
+        output_dir=output_dir,
+        store=store,
+        manager=build_download_manager(cfg, str(store.root), limiters=build_rate_limiters(cfg)),
+    )
+    already = sum(1 for p in arxiv_papers if store.has(p))
+
+    def _progress(done: int, total: int, title: str, success: bool) -> None:
+        print(f"[{done}/{total}] {'完成' if success else '失败'}: {title}")
+
+    print(f"共 {len(arxiv_papers)} 篇 arXiv 论文（其中 {already} 篇已下载过），将保存到: {Path(output_dir).resolve()}")
+    results = downloader.download_multiple(arxiv_papers, progress_callback=_progress)
+    failed = sum(1 for path in results.values() if path is None)
+    print(f"下载完成，失败 {failed} 篇。")
 
 
 if __name__ == "__main__":
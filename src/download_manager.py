@@ -0,0 +1,370 @@
+"""
+并发 PDF 下载管理器。
+
+- 有界线程池，同时限制每个主机的并发下载数（任务只在所属主机有空位时才提交，不占用空闲线程）；
+- 先写入 <文件名>.part，校验通过后原子重命名为目标文件，中断不会留下残缺的 PDF；
+- 中断后重新运行时，用 HTTP Range 从 .part 的已有长度继续下载；
+- 校验 %PDF 文件头、Content-Length 与最小体积，拦截登录页 / 错误页等非 PDF 响应；
+- 完成的下载追加记录到 manifest（JSON Lines），重复运行直接跳过已完成的文件。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from . import http_client, metrics
+from .rate_limiter import RateLimiter, RateLimiterRegistry
+
+
+PDF_MAGIC = b"%PDF"
+
+DEFAULT_DOWNLOAD_CONFIG: Dict = {
+    "max_workers": 8,  # 同时进行的下载总数
+    "per_host": 2,  # 每个主机同时进行的下载数
+    "retries": 3,  # 网络错误时的重试次数（每次从已下载的位置继续）
+    "min_size": 1024,  # 小于该字节数的文件视为无效
+    "max_size": 200 * 1024 * 1024,  # 大于该字节数的文件放弃下载
+    "read_timeout": 60,
+    "manifest": "manifest.jsonl",  # 相对于输出目录
+}
+
+_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class DownloadTask:
+    """
+    单个下载任务。key 用于 manifest 去重（默认为 url），label 仅用于进度显示。
+    """
+
+    url: str
+    path: Path
+    key: str = ""
+    label: str = ""
+
+    def __post_init__(self) -> None:
+        self.path = Path(self.path)
+        self.key = self.key or self.url
+        self.label = self.label or self.path.name
+
+
+@dataclass
+class DownloadResult:
+    """
+    下载结果。state 取值：
+        done     本次下载完成
+        skipped  manifest 中已记录完成（或目标文件已存在且有效），未发起请求
+        failed   下载失败（error 为原因）
+    """
+
+    task: DownloadTask
+    state: str
+    size: int = 0
+    sha256: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.state in ("done", "skipped")
+
+
+class DownloadManager:
+    """
+    参数:
+        limiters: 按主机取令牌桶的限速器集合
+        rate_limiter: 未提供 limiters 时所有主机共用的限速器（两者都为空时只受并发数约束）
+        max_workers / per_host / retries / min_size / max_size / read_timeout: 见 DEFAULT_DOWNLOAD_CONFIG
+        manifest_path: manifest 文件路径，为空时不记录（每次都会检查目标文件是否已存在）
+        headers: 额外的请求头
+    """
+
+    def __init__(
+        self,
+        limiters: Optional[RateLimiterRegistry] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_workers: int = DEFAULT_DOWNLOAD_CONFIG["max_workers"],
+        per_host: int = DEFAULT_DOWNLOAD_CONFIG["per_host"],
+        retries: int = DEFAULT_DOWNLOAD_CONFIG["retries"],
+        min_size: int = DEFAULT_DOWNLOAD_CONFIG["min_size"],
+        max_size: int = DEFAULT_DOWNLOAD_CONFIG["max_size"],
+        read_timeout: float = DEFAULT_DOWNLOAD_CONFIG["read_timeout"],
+        manifest_path: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.limiters = limiters
+        self.rate_limiter = rate_limiter
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self.retries = max(0, int(retries))
+        self.min_size = int(min_size)
+        self.max_size = int(max_size)
+        self.read_timeout = float(read_timeout)
+        self.headers = dict(headers or {})
+        self.manifest_path = Path(manifest_path) if manifest_path else None
+        self._manifest_lock = threading.Lock()
+        self._manifest: Dict[str, dict] = self._load_manifest()
+
+    def completed(self, task: DownloadTask) -> Optional[dict]:
+        """
+        manifest 中记录的已完成下载（目标文件仍存在且大小一致时才算数）。
+        """
+        entry = self._manifest.get(task.key)
+        if entry is None:
+            return None
+        path = Path(entry["path"])
+        try:
+            if path.stat().st_size == entry["size"]:
+                return entry
+        except OSError:
+            pass
+        return None
+
+    def download(
+        self,
+        tasks: Iterable[DownloadTask],
+        progress_callback: Optional[Callable[[int, int, DownloadResult], None]] = None,
+    ) -> List[DownloadResult]:
+        """
+        下载全部任务，结果顺序与 tasks 一致。
+        progress_callback(已完成数, 总数, 结果) 在每个任务结束时调用。
+        """
+        tasks = list(tasks)
+        results: Dict[int, DownloadResult] = {}
+        order = {id(task): idx for idx, task in enumerate(tasks)}
+        for done, result in enumerate(self.iter_download(tasks), start=1):
+            results[order[id(result.task)]] = result
+            if progress_callback:
+                progress_callback(done, len(tasks), result)
+        return [results[idx] for idx in range(len(tasks))]
+
+    def iter_download(self, tasks: Iterable[DownloadTask]) -> Iterator[DownloadResult]:
+        """
+        按完成先后产出下载结果。
+        """
+        # 按主机排队，轮流从各主机取任务，单个慢主机不会占满所有线程
+        queues: "OrderedDict[str, Deque[DownloadTask]]" = OrderedDict()
+        used_paths = set()
+        for task in tasks:
+            # 同一批次中目标路径相同的任务（如同名论文）依次加编号，避免写同一个 .part
+            path, n = task.path, 1
+            while path in used_paths:
+                n += 1
+                path = task.path.with_name(f"{task.path.stem}-{n}{task.path.suffix}")
+            task.path = path
+            used_paths.add(path)
+
+            entry = self.completed(task)
+            if entry is not None:
+                task.path = Path(entry["path"])
+                yield DownloadResult(task=task, state="skipped", size=entry["size"], sha256=entry.get("sha256"))
+                continue
+            host = urlparse(task.url).hostname or ""
+            queues.setdefault(host, deque()).append(task)
+
+        active: Dict[str, int] = {host: 0 for host in queues}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download")
+        futures: Dict[Future, str] = {}
+        try:
+            while queues or futures:
+                for host in list(queues):
+                    while queues[host] and active[host] < self.per_host and len(futures) < self.max_workers:
+                        futures[executor.submit(self.fetch, queues[host].popleft())] = host
+                        active[host] += 1
+                    if not queues[host]:
+                        del queues[host]
+                done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    active[futures.pop(fut)] -= 1
+                    yield fut.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def fetch(self, task: DownloadTask) -> DownloadResult:
+        """
+        下载单个文件（当前线程执行），网络错误时从已下载的位置重试。
+        """
+        result = self._fetch(task)
+        if metrics.enabled():
+            host = urlparse(task.url).hostname or ""
+            metrics.PDF_DOWNLOADS.inc(host, result.state)
+            if result.state == "done":
+                metrics.PDF_DOWNLOAD_BYTES.inc(host, value=result.size)
+                if result.elapsed > 0:
+                    metrics.PDF_DOWNLOAD_THROUGHPUT.observe(result.size / result.elapsed, host)
+        return result
+
+    def _fetch(self, task: DownloadTask) -> DownloadResult:
+        started = time.monotonic()
+        entry = self.completed(task)
+        if entry is not None:
+            task.path = Path(entry["path"])
+            return DownloadResult(task=task, state="skipped", size=entry["size"], sha256=entry.get("sha256"))
+        if task.path.exists() and _is_pdf(task.path) and task.path.stat().st_size >= self.min_size:
+            # 目标文件已存在（如 manifest 丢失），补记后跳过
+            size, digest = task.path.stat().st_size, sha256_file(task.path)
+            self._record(task, size, digest)
+            return DownloadResult(task=task, state="skipped", size=size, sha256=digest)
+
+        error = None
+        for attempt in range(self.retries + 1):
+            try:
+                size, digest = self._transfer(task)
+                self._record(task, size, digest)
+                return DownloadResult(
+                    task=task, state="done", size=size, sha256=digest, elapsed=time.monotonic() - started
+                )
+            except _InvalidDownload as e:
+                error = str(e)
+                break
+            except (requests.RequestException, OSError) as e:
+                error = str(e)
+                if attempt < self.retries:
+                    time.sleep(min(2.0 ** attempt, 30.0))
+        return DownloadResult(task=task, state="failed", error=error, elapsed=time.monotonic() - started)
+
+    def _transfer(self, task: DownloadTask):
+        task.path.parent.mkdir(parents=True, exist_ok=True)
+        part = task.path.with_name(task.path.name + ".part")
+        offset = part.stat().st_size if part.exists() else 0
+
+        headers = dict(self.headers)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        limiter = self.limiters.for_url(task.url) if self.limiters is not None else self.rate_limiter
+        resp = http_client.get(
+            task.url,
+            limiter=limiter,
+            headers=headers,
+            timeout=http_client.timeout(self.read_timeout),
+            stream=True,
+        )
+        try:
+            if resp.status_code == 416 and offset:
+                # .part 已是完整文件（上次在重命名前中断）
+                return self._finish(part, task)
+            if resp.status_code in (404, 410):
+                raise _InvalidDownload(f"HTTP {resp.status_code}")
+            resp.raise_for_status()
+
+            if resp.status_code != 206:
+                # 服务器不支持 Range，从头下载
+                offset = 0
+            length = resp.headers.get("Content-Length")
+            expected = offset + int(length) if length and length.isdigit() else None
+            if expected is not None and expected > self.max_size:
+                raise _InvalidDownload(f"file too large: {expected} bytes")
+
+            written = offset
+            with part.open("ab" if offset else "wb") as f:
+                for chunk in resp.iter_content(chunk_size=_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    if written == 0 and not chunk.startswith(PDF_MAGIC[: len(chunk)]):
+                        raise _InvalidDownload("response is not a PDF")
+                    f.write(chunk)
+                    written += len(chunk)
+                    if written > self.max_size:
+                        raise _InvalidDownload(f"file too large: > {self.max_size} bytes")
+        except _InvalidDownload:
+            part.unlink(missing_ok=True)
+            raise
+        finally:
+            resp.close()
+
+        if expected is not None and written != expected:
+            # 连接中途断开，保留 .part 供下次续传
+            raise requests.ConnectionError(f"incomplete download: {written}/{expected} bytes")
+        return self._finish(part, task)
+
+    def _finish(self, part: Path, task: DownloadTask):
+        size = part.stat().st_size
+        if size < self.min_size or not _is_pdf(part):
+            part.unlink(missing_ok=True)
+            raise _InvalidDownload(f"invalid PDF ({size} bytes)")
+        digest = sha256_file(part)
+        os.replace(part, task.path)
+        return size, digest
+
+    def _record(self, task: DownloadTask, size: int, digest: str) -> None:
+        entry = {
+            "key": task.key,
+            "url": task.url,
+            "path": str(task.path),
+            "size": size,
+            "sha256": digest,
+            "completed_at": time.time(),
+        }
+        with self._manifest_lock:
+            self._manifest[task.key] = entry
+            if self.manifest_path is not None:
+                self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.manifest_path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _load_manifest(self) -> Dict[str, dict]:
+        entries: Dict[str, dict] = {}
+        if self.manifest_path is None or not self.manifest_path.exists():
+            return entries
+        with self.manifest_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 上次写入中断留下的半行
+                    continue
+                entries[entry["key"]] = entry
+        return entries
+
+
+class _InvalidDownload(Exception):
+    """
+    内容无效（非 PDF、过大、资源不存在），重试没有意义。
+    """
+
+
+def _is_pdf(path: Path) -> bool:
+    with path.open("rb") as f:
+        return f.read(len(PDF_MAGIC)) == PDF_MAGIC
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_download_manager(
+    config: Dict,
+    output_dir: str,
+    limiters: Optional[RateLimiterRegistry] = None,
+) -> DownloadManager:
+    """
+    根据配置的 download 节点创建下载管理器，manifest 保存在 output_dir 下。
+    """
+    settings = dict(DEFAULT_DOWNLOAD_CONFIG)
+    settings.update({k: v for k, v in (config.get("download") or {}).items() if v is not None})
+    return DownloadManager(
+        limiters=limiters,
+        max_workers=settings["max_workers"],
+        per_host=settings["per_host"],
+        retries=settings["retries"],
+        min_size=settings["min_size"],
+        max_size=settings["max_size"],
+        read_timeout=settings["read_timeout"],
+        manifest_path=str(Path(output_dir) / settings["manifest"]) if settings["manifest"] else None,
+    )
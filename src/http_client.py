@@ -0,0 +1,195 @@
+"""
+进程级共享 HTTP 客户端。
+
+所有数据源、Unpaywall 与 PDF 下载都通过同一个 requests.Session 发请求：
+- 每个主机一个长连接池（urllib3 PoolManager），复用 TCP/TLS 连接，避免每次握手；
+- 连接池大小、连接/读取超时可通过配置文件的 http 节点调整；
+- 在 uvicorn 多 worker 部署中，每个 worker 进程各自持有一个 Session，进程内所有请求共享。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from . import metrics
+
+if TYPE_CHECKING:
+    import requests
+
+    from .rate_limiter import RateLimiter
+
+
+DEFAULT_HTTP_CONFIG: Dict = {
+    "pool_connections": 10,  # 缓存的主机连接池数量
+    "pool_maxsize": 20,  # 每个主机最多保持的连接数
+    "pool_block": False,  # 连接数达到上限时是否阻塞等待
+    "connect_timeout": 5.0,
+    "read_timeout": 30.0,
+    "user_agent": "AcademicPaperAggregator/0.1",
+    "max_retries": 2,  # 遇到 429 / 503 时的最大重试次数
+    "source_workers": 16,  # 异步检索（asearch）执行数据源阻塞 I/O 的线程数上限
+}
+
+# 上游返回 429 / 503 时的重试状态码
+RETRY_STATUS = (429, 503)
+
+_lock = threading.Lock()
+_settings: Dict = dict(DEFAULT_HTTP_CONFIG)
+_session: Optional[requests.Session] = None
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def configure(config: Optional[Dict] = None) -> None:
+    """
+    应用 http 配置。仅当连接池参数变化时才重建 Session，其余情况继续复用已有连接。
+    """
+    global _session, _executor
+    new_settings = dict(DEFAULT_HTTP_CONFIG)
+    new_settings.update({k: v for k, v in (config or {}).items() if v is not None})
+
+    with _lock:
+        pool_keys = ("pool_connections", "pool_maxsize", "pool_block")
+        pool_changed = any(new_settings[k] != _settings.get(k) for k in pool_keys)
+        workers_changed = new_settings["source_workers"] != _settings.get("source_workers")
+        _settings.clear()
+        _settings.update(new_settings)
+        if pool_changed and _session is not None:
+            _session.close()
+            _session = None
+        if workers_changed and _executor is not None:
+            # 已提交的任务在旧线程池中继续执行完毕
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def get_session() -> requests.Session:
+    """
+    返回进程内共享的 Session（首次调用时创建）。
+    """
+    global _session
+    session = _session
+    if session is not None:
+        return session
+    with _lock:
+        if _session is None:
+            _session = _build_session(_settings)
+        return _session
+
+
+def source_executor() -> ThreadPoolExecutor:
+    """
+    数据源阻塞 I/O 专用的有界线程池（首次调用时创建），供 asearch 等异步调用方使用。
+
+    不使用 asyncio 默认线程池：数据源在限速器上 sleep 时会长期占用线程，
+    放在默认线程池中会挤占事件循环其他 to_thread / run_in_executor 调用的线程。
+    """
+    global _executor
+    executor = _executor
+    if executor is not None:
+        return executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(_settings["source_workers"]),
+                thread_name_prefix="source-io",
+            )
+        return _executor
+
+
+def timeout(read: Optional[float] = None) -> Tuple[float, float]:
+    """
+    返回 requests 使用的 (连接超时, 读取超时)。read 为空时使用配置中的 read_timeout。
+    """
+    read_timeout = float(read) if read is not None else float(_settings["read_timeout"])
+    return float(_settings["connect_timeout"]), read_timeout
+
+
+def get(url: str, limiter: Optional["RateLimiter"] = None, **kwargs) -> requests.Response:
+    """
+    通过共享 Session 发送 GET 请求。
+
+    发送前先从 limiter 取令牌；上游返回 429 / 503 时按 Retry-After 暂停该限速器
+    （同一主机的其他请求也随之等待），然后重试，最多 max_retries 次。
+    """
+    kwargs.setdefault("timeout", timeout())
+    max_retries = int(_settings.get("max_retries", 2))
+    host = (urlparse(url).hostname or "") if metrics.enabled() else ""
+    attempt = 0
+    while True:
+        if limiter is not None:
+            waited = time.perf_counter()
+            limiter.acquire()
+            metrics.RATE_LIMIT_WAIT_SECONDS.observe(time.perf_counter() - waited, host)
+        started = time.perf_counter()
+        resp = get_session().get(url, **kwargs)
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, host)
+        if resp.status_code not in RETRY_STATUS or attempt >= max_retries:
+            return resp
+        metrics.HTTP_RETRIES.inc(host, str(resp.status_code))
+
+        delay = parse_retry_after(resp.headers.get("Retry-After"))
+        if delay is None:
+            delay = 2.0 ** attempt
+        resp.close()
+        if limiter is not None:
+            limiter.penalize(delay)
+        else:
+            time.sleep(delay)
+        attempt += 1
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数。
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def close() -> None:
+    """
+    关闭共享 Session，释放所有连接，并关闭数据源 I/O 线程池（应用退出时调用）。
+    """
+    global _session, _executor
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _build_session(settings: Dict) -> requests.Session:
+    # requests 在首次发请求时才导入，只查看配置或列出数据源的命令不必承担其导入开销
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=int(settings["pool_connections"]),
+        pool_maxsize=int(settings["pool_maxsize"]),
+        pool_block=bool(settings["pool_block"]),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = settings["user_agent"]
+    return session
@@ -0,0 +1,461 @@
+"""
+后台任务队列：把深度检索、批量下载 PDF 等耗时操作移出 HTTP 请求。
+
+- 任务保存在本地 SQLite（jobs.path）中，Web 进程只负责提交与查询，立即返回；
+- 独立的 worker 进程（python -m src.jobs --workers N）领取任务执行，并随时写回进度；
+- 领取任务时加租约，worker 定期续约；进程崩溃导致租约过期的任务会被其他 worker 重新领取，
+  超过最大尝试次数后标记为失败；续约、进度与结果的写入都校验领取者，
+  租约被接管的 worker 发现后立即中止，不再写入结果；
+- 任务结果写入 jobs.output_dir/<任务 id>/<第几次领取>/，每次领取使用独立目录，
+  被接管的旧 worker 不会覆盖新领取者的输出；结果路径记录在任务结果中，通过 /jobs/<id>/result 下载。
+
+用法:
+    python -m src.jobs --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .aggregator import aggregate_harvest, aggregate_search, build_sources, search_options
+from .cache import build_oa_cache
+from .config import load_config
+from .download_manager import build_download_manager
+from .models import Paper
+from .pdf_downloader import PDFDownloader
+from .pdf_store import build_pdf_store
+from .rate_limiter import build_rate_limiters, with_default_backend
+from .sources.unpaywall import UNPAYWALL_API_URL, UnpaywallClient
+from .sqlite_store import build_paper_store
+from .storage import save_papers
+
+
+DEFAULT_JOBS_PATH = "data/jobs.sqlite3"
+DEFAULT_OUTPUT_DIR = "data/jobs"
+DEFAULT_LEASE = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+_shared_lock = threading.Lock()
+_shared_queues: Dict[str, "JobQueue"] = {}
+
+
+class JobLostError(RuntimeError):
+    """
+    任务已不属于当前 worker（租约过期后被其他 worker 领取，或已结束）。
+    """
+
+
+class JobQueue:
+    """
+    SQLite 任务队列，可在多个进程间共享（每个进程各自创建实例）。
+
+    参数:
+        path: SQLite 文件路径
+        lease: 租约时长（秒），worker 超过该时间未续约视为已退出
+        max_attempts: 同一任务最多被领取的次数
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_JOBS_PATH,
+        lease: float = DEFAULT_LEASE,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> None:
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease = float(lease)
+        self.max_attempts = int(max_attempts)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                params TEXT NOT NULL,
+                state TEXT NOT NULL,
+                progress_done INTEGER NOT NULL DEFAULT 0,
+                progress_total INTEGER,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, created_at)")
+
+    def submit(self, kind: str, params: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, params, state, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), time.time()),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row is not None else None
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """
+        领取最早提交的待执行任务（或租约已过期的任务），没有任务时返回 None。
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                stale = now - self.lease
+                self._conn.execute(
+                    """
+                    UPDATE jobs SET state = 'failed', error = 'worker lost', finished_at = ?
+                    WHERE state = 'running' AND heartbeat < ? AND attempts >= ?
+                    """,
+                    (now, stale, self.max_attempts),
+                )
+                row = self._conn.execute(
+                    """
+                    SELECT id FROM jobs
+                    WHERE state = 'queued' OR (state = 'running' AND heartbeat < ?)
+                    ORDER BY created_at LIMIT 1
+                    """,
+                    (stale,),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    """
+                    UPDATE jobs SET state = 'running', worker = ?, attempts = attempts + 1,
+                        started_at = COALESCE(started_at, ?), heartbeat = ?
+                    WHERE id = ?
+                    """,
+                    (worker, now, now, row["id"]),
+                )
+                job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return _row_to_job(job)
+
+    # heartbeat / update_progress / finish / fail 只更新由 worker 领取且仍在执行的任务，
+    # 返回是否写入成功；返回 False 表示任务已被其他 worker 接管或已结束，调用方应中止
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        return self._update_owned(job_id, worker, "heartbeat = ?", (time.time(),))
+
+    def update_progress(
+        self, job_id: str, worker: str, done: int, total: Optional[int], message: Optional[str] = None
+    ) -> bool:
+        return self._update_owned(
+            job_id,
+            worker,
+            "progress_done = ?, progress_total = ?, message = ?, heartbeat = ?",
+            (done, total, message, time.time()),
+        )
+
+    def finish(self, job_id: str, worker: str, result: Dict) -> bool:
+        now = time.time()
+        return self._update_owned(
+            job_id,
+            worker,
+            "state = 'done', result = ?, finished_at = ?, heartbeat = ?",
+            (json.dumps(result, ensure_ascii=False), now, now),
+        )
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._update_owned(job_id, worker, "state = 'failed', error = ?, finished_at = ?", (error, time.time()))
+
+    def _update_owned(self, job_id: str, worker: str, assignments: str, params: tuple) -> bool:
+        with self._lock:
+            cur = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND worker = ? AND state = 'running'",
+                (*params, job_id, worker),
+            )
+        return cur.rowcount > 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict:
+    job = dict(row)
+    job["params"] = json.loads(job["params"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+class JobContext:
+    """
+    传给任务处理函数的上下文：输出目录与进度回调（写库频率做了节流）。
+    """
+
+    def __init__(self, queue: JobQueue, job: Dict, output_dir: Path) -> None:
+        self.queue = queue
+        self.job_id = job["id"]
+        self.worker = job["worker"]
+        self.output_dir = output_dir
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # 续约线程发现任务已被接管时置位，处理函数在下一次 progress 时中止
+        self.lost = threading.Event()
+        self._last_update = 0.0
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """
+        写回进度；任务已不属于当前 worker 时抛出 JobLostError。
+        """
+        if self.lost.is_set():
+            raise JobLostError(f"Job {self.job_id} is no longer owned by {self.worker}")
+        now = time.monotonic()
+        if now - self._last_update < 0.5 and (total is None or done < total):
+            return
+        self._last_update = now
+        if not self.queue.update_progress(self.job_id, self.worker, done, total, message):
+            self.lost.set()
+            raise JobLostError(f"Job {self.job_id} is no longer owned by {self.worker}")
+
+
+def run_harvest(params: Dict, config: Dict, ctx: JobContext) -> Dict:
+    """
+    深度检索：分页获取结果写入文件（csv / json / jsonl），同时写入本地论文库（local_index）。
+
+    params: query, sources, limit, from_year, format
+    """
+    cfg = dict(config)
+    if params.get("sources"):
+        cfg["enabled_sources"] = list(params["sources"])
+    sources = build_sources(cfg)
+    if not sources:
+        raise ValueError("没有启用任何数据源")
+    limit = int(params.get("limit", 1000))
+    backend = str(params.get("format", "csv"))
+    if backend not in ("csv", "json", "jsonl"):
+        raise ValueError(f"Unsupported format: {backend}")
+
+    total = limit * len(sources)
+    store = build_paper_store(cfg)
+    papers = aggregate_harvest(
+        query=params["query"],
+        sources=sources,
+        limit=limit,
+        from_year=params.get("from_year"),
+        fuzzy_dedup=search_options(cfg)["fuzzy_dedup"],
+    )
+
+    def _track(items: Iterable[Paper]) -> Iterator[Paper]:
+        batch: List[Paper] = []
+        for count, paper in enumerate(items, start=1):
+            batch.append(paper)
+            if len(batch) >= 500:
+                if store is not None:
+                    store.upsert(batch)
+                batch = []
+            ctx.progress(count, total, paper.source)
+            yield paper
+        if batch and store is not None:
+            store.upsert(batch)
+
+    path = ctx.output_dir / f"results.{backend}"
+    count = save_papers(_track(papers), backend=backend, output_path=str(path))
+    ctx.progress(count, count, "done")
+    return {"path": str(path), "count": count, "format": backend}
+
+
+def run_download(params: Dict, config: Dict, ctx: JobContext) -> Dict:
+    """
+    批量下载开放获取 PDF，打包为 zip。
+
+    params: papers（Paper.to_dict 格式的列表），或 query / sources / max_results / from_year（先检索再下载）
+    """
+    cfg = dict(config)
+    if params.get("sources"):
+        cfg["enabled_sources"] = list(params["sources"])
+
+    if params.get("papers"):
+        papers = [Paper.from_dict(item) for item in params["papers"]]
+    else:
+        ctx.progress(0, None, "searching")
+        papers = aggregate_search(
+            query=params["query"],
+            sources=build_sources(cfg),
+            max_results=int(params.get("max_results", 50)),
+            from_year=params.get("from_year"),
+            **search_options(cfg),
+        )
+
+    limiters = build_rate_limiters(cfg)
+    crossref_cfg = (cfg.get("sources", {}) or {}).get("crossref") or {}
+    unpaywall = None
+    if crossref_cfg.get("unpaywall_email"):
+        unpaywall = UnpaywallClient(
+            email=crossref_cfg["unpaywall_email"],
+            rate_limiter=limiters.for_url(UNPAYWALL_API_URL),
+            cache=build_oa_cache(cfg),
+        )
+    store = build_pdf_store(cfg)
+    downloader = PDFDownloader(
+        output_dir=str(ctx.output_dir / "pdfs"),
+        unpaywall=unpaywall,
+        store=store,
+        manager=build_download_manager(cfg, str(store.root), limiters=limiters),
+    )
+    files = downloader.download_multiple(
+        papers,
+        progress_callback=lambda current, total, title, success: ctx.progress(current, total, title),
+    )
+
+    archive = ctx.output_dir / "pdfs.zip"
+    downloaded = {pid: path for pid, path in files.items() if path is not None}
+    # PDF 本身已压缩，打包时不再压缩
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+        for path in sorted(set(downloaded.values())):
+            zf.write(path, arcname=path.name)
+    ctx.progress(len(files), len(files), "done")
+    return {
+        "path": str(archive),
+        "downloaded": len(downloaded),
+        "failed": len(files) - len(downloaded),
+        "files": {pid: path.name for pid, path in downloaded.items()},
+    }
+
+
+# 任务类型 → 处理函数(params, config, ctx) -> 结果
+JOB_HANDLERS: Dict[str, Callable[[Dict, Dict, JobContext], Dict]] = {
+    "harvest": run_harvest,
+    "download": run_download,
+}
+
+
+def run_job(queue: JobQueue, job: Dict, config: Dict) -> None:
+    """
+    执行一个已领取的任务；执行期间后台线程定期续约。
+
+    续约或进度写入失败（租约过期后任务被其他 worker 接管）时中止处理，且不写回结果或失败状态，
+    以免覆盖新领取者的输出。
+    """
+    jobs_cfg = config.get("jobs", {}) or {}
+    # 按领取次数分目录：租约过期后仍在运行的旧 worker 与新领取者互不覆盖输出文件
+    output_dir = Path(jobs_cfg.get("output_dir") or DEFAULT_OUTPUT_DIR) / job["id"] / str(job["attempts"])
+    ctx = JobContext(queue, job, output_dir)
+
+    stop = threading.Event()
+
+    def _heartbeat() -> None:
+        while not stop.wait(queue.lease / 4):
+            if not queue.heartbeat(job["id"], ctx.worker):
+                ctx.lost.set()
+                return
+
+    beat = threading.Thread(target=_heartbeat, name=f"job-heartbeat-{job['id'][:8]}", daemon=True)
+    beat.start()
+    try:
+        handler = JOB_HANDLERS.get(job["kind"])
+        if handler is None:
+            raise ValueError(f"Unknown job kind: {job['kind']}")
+        result = handler(job["params"], config, ctx)
+        if ctx.lost.is_set() or not queue.finish(job["id"], ctx.worker, result):
+            raise JobLostError(f"Job {job['id']} is no longer owned by {ctx.worker}")
+    except JobLostError as e:
+        print(f"[WARN] {e}, result discarded")
+    except Exception as e:
+        print(f"[WARN] Job {job['id']} ({job['kind']}) failed: {e}")
+        if not queue.fail(job["id"], ctx.worker, str(e)):
+            print(f"[WARN] Job {job['id']} is no longer owned by {ctx.worker}, failure not recorded")
+    finally:
+        stop.set()
+
+
+def build_job_queue(config: Dict) -> JobQueue:
+    """
+    根据配置的 jobs 节点返回进程内共享的任务队列。
+    """
+    jobs_cfg = config.get("jobs", {}) or {}
+    path = str(jobs_cfg.get("path") or DEFAULT_JOBS_PATH)
+    with _shared_lock:
+        queue = _shared_queues.get(path)
+        if queue is None:
+            queue = JobQueue(
+                path,
+                lease=float(jobs_cfg.get("lease", DEFAULT_LEASE)),
+                max_attempts=int(jobs_cfg.get("max_attempts", DEFAULT_MAX_ATTEMPTS)),
+            )
+            _shared_queues[path] = queue
+        return queue
+
+
+def worker_loop(config_path: Optional[str] = None, worker_id: Optional[str] = None) -> None:
+    """
+    worker 主循环：领取任务 → 执行 → 写回结果；队列为空时按 jobs.poll_interval 轮询。
+    """
+    # 多个 worker 进程（及 Web 服务）默认共享 SQLite 限速状态
+    config = with_default_backend(load_config(config_path))
+    queue = build_job_queue(config)
+    poll_interval = float((config.get("jobs", {}) or {}).get("poll_interval", 1.0))
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    print(f"[jobs] worker {worker_id} started")
+    while True:
+        try:
+            job = queue.claim(worker_id)
+        except sqlite3.Error as e:
+            # 数据库暂时被锁、磁盘故障等：记录后稍后重试，不让 worker 进程退出
+            print(f"[WARN] {worker_id} failed to claim a job: {e}")
+            time.sleep(poll_interval)
+            continue
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        print(f"[jobs] {worker_id} running {job['kind']} job {job['id']}")
+        run_job(queue, job, config)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="后台任务 worker（执行 Web 端提交的深度检索 / 批量下载任务）")
+    parser.add_argument("--config", type=str, default=None, help="配置文件路径，默认使用项目根目录下的 config.yml")
+    parser.add_argument("--workers", type=int, default=1, help="worker 进程数")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.workers <= 1:
+        worker_loop(args.config)
+        return
+
+    processes = [
+        multiprocessing.Process(target=worker_loop, args=(args.config,), name=f"job-worker-{idx}")
+        for idx in range(args.workers)
+    ]
+    for proc in processes:
+        proc.start()
+    try:
+        for proc in processes:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in processes:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
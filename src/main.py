@@ -1,30 +1,51 @@
 import argparse
-from typing import List
+from typing import Iterable
 
-from .aggregator import aggregate_search, build_sources
+from .aggregator import aggregate_harvest, aggregate_search, build_sources, search_options
 from .config import load_config
 from .models import Paper
+from .sources.registry import import_source_modules, list_sources, resolve
+from .sqlite_store import SQLitePaperStore
 from .storage import save_papers
+from .watch import WatchQuery, WatchStore, configured_watches, run_incremental
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="多源论文聚合/爬取工具（arXiv / CrossRef / Semantic Scholar 等）",
     )
-    parser.add_argument("--query", "-q", type=str, required=True, help="搜索关键词，如: \"large language model\"")
+    parser.add_argument("--query", "-q", type=str, default=None, help="搜索关键词，如: \"large language model\"")
     parser.add_argument("--max-results", "-m", type=int, default=50, help="每个源最多返回多少条结果")
     parser.add_argument("--from-year", type=int, default=None, help="仅保留该年份之后的论文")
+    parser.add_argument(
+        "--harvest",
+        action="store_true",
+        help="深度检索模式：分页获取，每个源最多 --max-results 条（可达数千条），结果逐条写出。",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "增量模式：只获取各数据源上次运行之后的新论文（按提交 / 索引时间的高水位），追加写入 SQLite 论文库。"
+            "未指定 --query 时运行配置文件 watches 中的全部监视查询（未配置时使用配置的 query / from_year）。"
+        ),
+    )
     parser.add_argument(
         "--sources",
         nargs="*",
         default=None,
         help="指定要启用的数据源名称列表，如: arxiv crossref semantic_scholar；默认使用配置文件设置。",
     )
+    parser.add_argument(
+        "--list-sources",
+        action="store_true",
+        help="列出所有已登记的数据源（内置、entry points 插件及 source_modules 中的模块）并退出。",
+    )
     parser.add_argument(
         "--storage-backend",
-        choices=["csv", "json"],
+        choices=["csv", "json", "jsonl", "sqlite", "columnar", "parquet"],
         default=None,
-        help="存储后端，默认读取配置文件（csv/json）。",
+        help="存储后端，默认读取配置文件（csv/json/jsonl/sqlite/columnar/parquet，parquet 需要 pyarrow）。",
     )
     parser.add_argument(
         "--output-path",
@@ -32,13 +53,27 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="输出文件路径，默认读取配置文件。",
     )
+    parser.add_argument(
+        "--rate-limit-backend",
+        choices=["memory", "sqlite"],
+        default=None,
+        help="限速后端：memory 为进程内限速，sqlite 与 Web 服务等其他进程共享额度；默认读取配置文件。",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不使用检索结果缓存，直接请求各数据源。",
+    )
     parser.add_argument(
         "--config",
         type=str,
         default=None,
         help="配置文件路径，默认使用项目根目录下的 config.yml。",
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.query and not args.incremental and not args.list_sources:
+        parser.error("the following arguments are required: --query/-q")
+    return args
 
 
 def main() -> None:
@@ -47,6 +82,16 @@ def main() -> None:
 
     if args.sources:
         cfg["enabled_sources"] = args.sources
+    if args.rate_limit_backend:
+        cfg["rate_limit"] = dict(cfg.get("rate_limit") or {}, backend=args.rate_limit_backend)
+
+    if args.list_sources:
+        print_sources(cfg)
+        return
+
+    if args.incremental:
+        run_watches(args, cfg)
+        return
 
     sources = build_sources(cfg)
     if not sources:
@@ -55,21 +100,107 @@ def main() -> None:
     print(f"使用数据源: {[s.name for s in sources]}")
     print(f"正在搜索: {args.query!r}，每源最多 {args.max_results} 条……")
 
-    papers: List[Paper] = aggregate_search(
-        query=args.query,
-        sources=sources,
-        max_results=args.max_results,
-        from_year=args.from_year,
-    )
-
-    print(f"共获取到去重后论文数: {len(papers)}")
+    papers: Iterable[Paper]
+    if args.harvest:
+        papers = aggregate_harvest(
+            query=args.query,
+            sources=sources,
+            limit=args.max_results,
+            from_year=args.from_year,
+            fuzzy_dedup=search_options(cfg)["fuzzy_dedup"],
+        )
+    else:
+        options = search_options(cfg)
+        if args.no_cache:
+            options["cache"] = None
+
+        papers = aggregate_search(
+            query=args.query,
+            sources=sources,
+            max_results=args.max_results,
+            from_year=args.from_year,
+            **options,
+        )
+        print(f"共获取到去重后论文数: {len(papers)}")
 
     storage_cfg = cfg.get("storage", {}) or {}
     backend = args.storage_backend or storage_cfg.get("backend", "csv")
     output_path = args.output_path or storage_cfg.get("output_path", "data/results.csv")
 
-    save_papers(papers, backend=backend, output_path=output_path)
-    print(f"结果已保存到: {output_path}，格式: {backend}")
+    count = save_papers(papers, backend=backend, output_path=output_path)
+    print(f"结果已保存到: {output_path}，格式: {backend}，共 {count} 条")
+
+
+def print_sources(cfg: dict) -> None:
+    """
+    打印已登记的数据源，* 标出配置中启用的数据源。只读取登记信息，不导入数据源模块。
+    """
+    import_source_modules(cfg.get("source_modules") or [])
+    enabled = set()
+    for name in cfg.get("enabled_sources", ["arxiv", "crossref"]):
+        entry = resolve(name)
+        if entry is not None:
+            enabled.add(entry.name)
+        else:
+            print(f"[WARN] Unknown source {name!r} in enabled_sources")
+
+    for entry in list_sources():
+        mark = "*" if entry.name in enabled else " "
+        aliases = f" (别名: {', '.join(entry.aliases)})" if entry.aliases else ""
+        print(f"{mark} {entry.name:<20} {entry.origin:<12} {entry.description}{aliases}")
+
+
+def run_watches(args: argparse.Namespace, cfg: dict) -> None:
+    """
+    增量模式：依次运行监视查询，新论文写入 SQLite 论文库（storage.backend 为 sqlite 时使用 output_path，
+    否则使用 local_index.path），高水位保存在同一数据库中。
+    """
+    storage_cfg = cfg.get("storage", {}) or {}
+    backend = args.storage_backend or storage_cfg.get("backend", "csv")
+    if backend == "sqlite":
+        db_path = args.output_path or storage_cfg.get("output_path", "data/papers.sqlite3")
+    else:
+        if args.storage_backend:
+            print(f"[WARN] 增量模式只支持 sqlite 存储，忽略 --storage-backend {backend}")
+        db_path = (cfg.get("local_index", {}) or {}).get("path") or "data/papers.sqlite3"
+
+    if args.query:
+        watches = [WatchQuery(name=args.query, query=args.query, from_year=args.from_year)]
+    else:
+        watches = configured_watches(cfg)
+    if not watches:
+        raise RuntimeError("没有可运行的监视查询，请指定 --query 或在 config.yml 中配置 watches。")
+
+    store = SQLitePaperStore(db_path)
+    marks = WatchStore(db_path)
+    try:
+        for watch in watches:
+            watch_cfg = dict(cfg)
+            if watch.sources and not args.sources:
+                watch_cfg["enabled_sources"] = watch.sources
+            sources = build_sources(watch_cfg)
+            if not sources:
+                raise RuntimeError("没有启用任何数据源，请检查 config.yml 中的 enabled_sources 配置。")
+
+            print(f"[{watch.name}] 增量检索: {watch.query!r}，数据源: {[s.name for s in sources]}")
+            stats = run_incremental(
+                watch,
+                sources,
+                store,
+                marks,
+                limit=args.max_results,
+                fuzzy_dedup=search_options(cfg)["fuzzy_dedup"],
+            )
+            for name, item in stats.items():
+                status = f"失败: {item['error']}" if item.get("error") else "完成"
+                print(
+                    f"  {name}: {status}，获取 {item['fetched']} 条，新增 {item['inserted']} 条，"
+                    f"更新 {item['updated']} 条，高水位 {item['mark'] or '-'}"
+                )
+    finally:
+        marks.close()
+        store.close()
+    print(f"结果已写入: {db_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+"""
+多来源记录合并。
+
+同一论文在不同数据源中的记录各有所长：CrossRef 有 DOI、期刊与正式发表日期，
+arXiv 有摘要与可直接下载的 PDF，Semantic Scholar 介于两者之间。
+merge_papers 按字段的来源优先级选取取值，合并结果记录：
+- extra["sources"]：参与合并的数据源（按出现顺序）；
+- extra["source_ids"]：各数据源中的原始 id；
+- extra["provenance"]：每个字段（extra 中的字段记为 "extra.<名称>"）取自哪个数据源。
+只有一个来源的记录不添加上述字段。
+"""
+
+from __future__ import annotations
+
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from .models import Paper
+
+
+# 各字段的来源优先级，靠前的优先；未列出的来源排在最后，同级时保留先出现的记录的取值
+DEFAULT_PRECEDENCE: Dict[str, List[str]] = {
+    "title": ["crossref", "semantic_scholar", "arxiv"],
+    "abstract": ["arxiv", "semantic_scholar", "crossref"],
+    "authors": ["crossref", "semantic_scholar", "arxiv"],
+    "published_at": ["crossref", "semantic_scholar", "arxiv"],
+    "url": ["arxiv", "crossref", "semantic_scholar"],
+    "doi": ["crossref", "semantic_scholar", "arxiv"],
+    "journal": ["crossref", "semantic_scholar", "arxiv"],
+    # extra 字段默认使用此顺序，可用 "extra.<名称>" 单独指定
+    "extra": ["arxiv", "crossref", "semantic_scholar"],
+}
+
+MERGED_FIELDS = ("title", "abstract", "authors", "published_at", "url", "doi", "journal")
+
+# 合并过程自身维护的 extra 字段，不参与取值
+_META_KEYS = ("sources", "source_ids", "provenance")
+
+# 全部论文都开放获取的数据源：取自这些来源的 pdf_url 本身即可作为开放获取的依据。
+# 其他来源的 pdf_url 可能是出版商的付费 / TDM 全文链接，只有该来源标记了 is_open_access 时才可信
+OPEN_ACCESS_SOURCES = ("arxiv",)
+
+
+def paper_sources(paper: Paper) -> List[str]:
+    """
+    返回论文记录来自的所有数据源（未合并的记录只有 paper.source）。
+    """
+    return list(paper.extra.get("sources") or [paper.source])
+
+
+def merge_papers(
+    primary: Paper,
+    other: Paper,
+    precedence: Optional[Dict[str, List[str]]] = None,
+) -> Paper:
+    """
+    合并两条表示同一论文的记录，返回新的 Paper，不修改传入的对象。
+
+    每个字段取优先级更高的来源中的非空值；extra 取并集，冲突时同样按优先级选择。
+
+    开放获取：is_open_access 为各来源标记的或；另外仅当 pdf_url 取自 OPEN_ACCESS_SOURCES（arXiv）时
+    才据此判定为开放获取。两条记录都有 pdf_url 时，优先使用已确认开放获取的一方。
+    只有确认开放获取后才移除 oa_pending，否则仍由延迟的 Unpaywall 查询补全。
+    id / source 保留 primary 的取值。
+    """
+    precedence = precedence or DEFAULT_PRECEDENCE
+    prov_a = _provenance(primary)
+    prov_b = _provenance(other)
+    provenance: Dict[str, str] = {}
+    fields: Dict[str, Any] = {}
+
+    for name in MERGED_FIELDS:
+        value, src = _pick(
+            precedence.get(name),
+            getattr(primary, name),
+            prov_a.get(name, primary.source),
+            getattr(other, name),
+            prov_b.get(name, other.source),
+        )
+        fields[name] = list(value) if name == "authors" else value
+        if not _empty(value):
+            provenance[name] = src
+
+    extra: Dict[str, Any] = {}
+    keys = [k for k in primary.extra if k not in _META_KEYS]
+    keys += [k for k in other.extra if k not in _META_KEYS and k not in primary.extra]
+    for key in keys:
+        prov_key = f"extra.{key}"
+        order = precedence.get(prov_key) or precedence.get("extra")
+        value, src = _pick(
+            order,
+            primary.extra.get(key),
+            prov_a.get(prov_key, primary.source),
+            other.extra.get(key),
+            prov_b.get(prov_key, other.source),
+        )
+        if key == "pdf_url":
+            oa_a, oa_b = _open_access_pdf(primary, prov_a), _open_access_pdf(other, prov_b)
+            if oa_a != oa_b:
+                # 只有一方的 PDF 链接确认开放获取时使用该方，避免选中出版商的付费全文链接
+                if oa_a:
+                    value, src = primary.extra[key], prov_a.get(prov_key, primary.source)
+                else:
+                    value, src = other.extra[key], prov_b.get(prov_key, other.source)
+        if key == "is_open_access" and not value:
+            # 任一来源确认开放获取即为开放获取
+            if other.extra.get(key):
+                value, src = True, prov_b.get(prov_key, other.source)
+            elif primary.extra.get(key):
+                value, src = True, prov_a.get(prov_key, primary.source)
+        extra[key] = value
+        provenance[prov_key] = src
+
+    if (
+        extra.get("pdf_url")
+        and not extra.get("is_open_access")
+        and provenance.get("extra.pdf_url") in OPEN_ACCESS_SOURCES
+    ):
+        extra["is_open_access"] = True
+        provenance["extra.is_open_access"] = provenance["extra.pdf_url"]
+    if extra.get("is_open_access"):
+        extra.pop("oa_pending", None)
+        provenance.pop("extra.oa_pending", None)
+
+    sources = paper_sources(primary)
+    sources += [s for s in paper_sources(other) if s not in sources]
+    source_ids = dict(other.extra.get("source_ids") or {other.source: other.id})
+    source_ids.update(primary.extra.get("source_ids") or {primary.source: primary.id})
+    extra["sources"] = sources
+    extra["source_ids"] = source_ids
+    extra["provenance"] = provenance
+
+    return replace(primary, extra=extra, **fields)
+
+
+def _open_access_pdf(paper: Paper, provenance: Dict[str, str]) -> bool:
+    # 该记录的 pdf_url 是否确认指向开放获取全文
+    if not paper.extra.get("pdf_url"):
+        return False
+    if paper.extra.get("is_open_access"):
+        return True
+    return provenance.get("extra.pdf_url", paper.source) in OPEN_ACCESS_SOURCES
+
+
+def _provenance(paper: Paper) -> Dict[str, str]:
+    return dict(paper.extra.get("provenance") or {})
+
+
+def _pick(order: Optional[List[str]], value_a: Any, src_a: str, value_b: Any, src_b: str):
+    if _empty(value_a):
+        return (value_b, src_b) if not _empty(value_b) else (value_a, src_a)
+    if _empty(value_b):
+        return value_a, src_a
+    if _rank(order, src_b) < _rank(order, src_a):
+        return value_b, src_b
+    return value_a, src_a
+
+
+def _rank(order: Optional[List[str]], source: str) -> int:
+    order = order or []
+    return order.index(source) if source in order else len(order)
+
+
+def _empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
@@ -0,0 +1,260 @@
+"""
+进程内指标（Prometheus 文本格式），由 Web 服务的 /metrics 输出。
+
+- Counter / Histogram 在本模块统一声明，调用方只负责 inc / observe；
+- 未启用（配置 metrics.enabled 为 false，默认）时 inc / observe 只检查一个全局开关后立即返回；
+- 指标保存在当前进程内，uvicorn 多 worker 部署时每个 worker 各自计数，
+  由 Prometheus 分别抓取各 worker（或在单 worker 下抓取）后汇总。
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# 秒级延迟的默认分桶，覆盖从缓存命中到上游超时的范围
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# 下载吞吐量（字节/秒）分桶：64KB/s ~ 64MB/s
+THROUGHPUT_BUCKETS = tuple(float(64 * 1024 * 4**i) for i in range(6))
+
+_enabled = False
+_registry: List["_Metric"] = []
+_registry_lock = threading.Lock()
+
+
+def configure(config: Optional[Dict] = None) -> None:
+    """
+    应用配置的 metrics 节点。关闭后已有的计数保留，重新开启时继续累加。
+    """
+    global _enabled
+    _enabled = bool((config or {}).get("enabled", False))
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+class _Metric(ABC):
+    """
+    指标基类：创建时登记到模块级注册表，由 render() 统一输出。
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        with _registry_lock:
+            _registry.append(self)
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """
+        输出该指标的样本行（不含 HELP / TYPE 注释）。
+        """
+
+    @abstractmethod
+    def reset(self) -> None:
+        """
+        清空全部样本。
+        """
+
+
+class Counter(_Metric):
+    """
+    单调递增计数。inc 的位置参数依次为各标签的值。
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, value: float = 1.0) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + value
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._label_text(labels)} {_number(value)}" for labels, value in items]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """
+    分桶直方图（输出 _bucket / _sum / _count），observe 的位置参数依次为各标签的值。
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # 每组标签：[各桶计数（最后一个为 +Inf）, 总和]
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        if not _enabled:
+            return
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0])
+                self._series[label_values] = series
+            series[0][idx] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items())
+        lines = []
+        for labels, (counts, total) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = "+Inf" if bound == math.inf else _number(bound)
+                bucket_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{self._label_text(labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def render() -> str:
+    """
+    按 Prometheus 文本格式（0.0.4）输出全部指标。
+    """
+    lines: List[str] = []
+    with _registry_lock:
+        metrics = list(_registry)
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """
+    清空所有计数（测试或基准对比时使用）。
+    """
+    with _registry_lock:
+        metrics = list(_registry)
+    for metric in metrics:
+        metric.reset()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ---- 指标声明 ----
+
+SOURCE_SEARCH_SECONDS = Histogram(
+    "paper_source_search_seconds",
+    "单个数据源一次检索的耗时（不含缓存命中）",
+    labels=("source",),
+)
+SOURCE_SEARCHES = Counter(
+    "paper_source_searches_total",
+    "数据源检索次数，按结果状态（ok / error / timeout / skipped）",
+    labels=("source", "state"),
+)
+SOURCE_ERRORS = Counter(
+    "paper_source_errors_total",
+    "数据源检索失败次数，按异常类型（超时记为 timeout）",
+    labels=("source", "error"),
+)
+SOURCE_RESULTS = Counter(
+    "paper_source_results_total",
+    "数据源返回的论文条数（去重前）",
+    labels=("source",),
+)
+DEDUP_DUPLICATES = Counter(
+    "paper_dedup_duplicates_total",
+    "被识别为重复而合并或丢弃的论文条数，按后到记录的数据源",
+    labels=("source",),
+)
+CACHE_REQUESTS = Counter(
+    "paper_cache_requests_total",
+    "检索结果缓存查询次数（hit / miss）",
+    labels=("source", "result"),
+)
+PARSE_SECONDS = Histogram(
+    "paper_parse_seconds",
+    "把一页上游响应（Atom XML / JSON）解码为记录的耗时，不含网络读取",
+    labels=("source",),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "paper_http_request_seconds",
+    "上游 HTTP 请求耗时（发出请求到收到响应头；非流式请求含响应体）",
+    labels=("host",),
+)
+HTTP_RETRIES = Counter(
+    "paper_http_retries_total",
+    "上游返回 429 / 503 后的重试次数",
+    labels=("host", "status"),
+)
+RATE_LIMIT_WAIT_SECONDS = Histogram(
+    "paper_rate_limit_wait_seconds",
+    "请求发出前在限速器上等待的时间",
+    labels=("host",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+PDF_DOWNLOADS = Counter(
+    "paper_pdf_downloads_total",
+    "PDF 下载次数，按结果（done / skipped / failed）",
+    labels=("host", "state"),
+)
+PDF_DOWNLOAD_BYTES = Counter(
+    "paper_pdf_download_bytes_total",
+    "下载完成的 PDF 字节数（断点续传时按完整文件大小计）",
+    labels=("host",),
+)
+PDF_DOWNLOAD_THROUGHPUT = Histogram(
+    "paper_pdf_download_bytes_per_second",
+    "单个 PDF 的下载吞吐量（字节/秒，含重试与限速等待）",
+    labels=("host",),
+    buckets=THROUGHPUT_BUCKETS,
+)
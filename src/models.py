@@ -1,6 +1,7 @@
+import sys
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 
 @dataclass
@@ -20,4 +21,117 @@ class Paper:
     journal: Optional[str] = None
     extra: dict = field(default_factory=dict)
 
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为可 JSON 序列化的字典（保留 extra 原样，与 from_dict 互逆）。
+        """
+        return {
+            "id": self.id,
+            "title": self.title,
+            "abstract": self.abstract,
+            "authors": list(self.authors),
+            "published_at": self.published_at.isoformat() if self.published_at else None,
+            "source": self.source,
+            "url": self.url,
+            "doi": self.doi,
+            "journal": self.journal,
+            "extra": dict(self.extra),
+        }
 
+    def dedup_key(self) -> str:
+        """
+        去重键：有 DOI 时按 DOI，否则按 标题 + 首位作者 + 年份（均忽略大小写）。
+        """
+        if self.doi:
+            return f"doi:{self.doi.lower()}"
+        first_author = self.authors[0].lower() if self.authors else ""
+        year = self.published_at.year if self.published_at else 0
+        return f"title:{self.title.lower()}|author:{first_author}|year:{year}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Paper":
+        published_raw = data.get("published_at")
+        published_at = datetime.fromisoformat(published_raw) if published_raw else None
+        return cls(
+            id=data.get("id") or "",
+            title=data.get("title") or "",
+            abstract=data.get("abstract"),
+            authors=list(data.get("authors") or []),
+            published_at=published_at,
+            source=data.get("source") or "",
+            url=data.get("url"),
+            doi=data.get("doi"),
+            journal=data.get("journal"),
+            extra=dict(data.get("extra") or {}),
+        )
+
+
+class CompactPaper:
+    """
+    Paper 的紧凑表示，用于在内存中保存大量论文：
+    __slots__ 没有实例字典，authors 为元组，空 extra 记为 None，source / journal 驻留（重复值共享同一对象）。
+    字段与 Paper 相同，通过 from_paper / to_paper 互转。更大规模的数据见 columnar.PaperBatch。
+    """
+
+    __slots__ = ("id", "title", "abstract", "authors", "published_at", "source", "url", "doi", "journal", "extra")
+
+    def __init__(
+        self,
+        id: str,
+        title: str,
+        abstract: Optional[str],
+        authors: Tuple[str, ...],
+        published_at: Optional[datetime],
+        source: str,
+        url: Optional[str] = None,
+        doi: Optional[str] = None,
+        journal: Optional[str] = None,
+        extra: Optional[dict] = None,
+    ) -> None:
+        self.id = id
+        self.title = title
+        self.abstract = abstract
+        self.authors = tuple(authors)
+        self.published_at = published_at
+        self.source = sys.intern(source)
+        self.url = url
+        self.doi = doi
+        self.journal = sys.intern(journal) if journal else journal
+        self.extra = extra or None
+
+    @classmethod
+    def from_paper(cls, paper: Paper) -> "CompactPaper":
+        return cls(
+            id=paper.id,
+            title=paper.title,
+            abstract=paper.abstract,
+            authors=tuple(paper.authors),
+            published_at=paper.published_at,
+            source=paper.source,
+            url=paper.url,
+            doi=paper.doi,
+            journal=paper.journal,
+            extra=dict(paper.extra) if paper.extra else None,
+        )
+
+    def to_paper(self) -> Paper:
+        return Paper(
+            id=self.id,
+            title=self.title,
+            abstract=self.abstract,
+            authors=list(self.authors),
+            published_at=self.published_at,
+            source=self.source,
+            url=self.url,
+            doi=self.doi,
+            journal=self.journal,
+            extra=dict(self.extra) if self.extra else {},
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactPaper):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"CompactPaper(id={self.id!r}, title={self.title!r}, source={self.source!r})"
@@ -15,25 +15,43 @@ from pathlib import Path
 from typing import Optional
 from urllib.parse import urlparse
 
-import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
-
+from .download_manager import DownloadManager, DownloadTask
+from .merge import paper_sources
 from .models import Paper
-from .rate_limiter import SimpleRateLimiter
+from .pdf_store import PDFStore, paper_refs
+from .rate_limiter import RateLimiter
+from .sources.unpaywall import UnpaywallClient
 
 
 class PDFDownloader:
     """PDF 下载器，仅处理开放获取论文"""
 
-    def __init__(self, rate_limiter: Optional[SimpleRateLimiter] = None, output_dir: str = "downloads"):
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter] = None,
+        output_dir: str = "downloads",
+        unpaywall: Optional[UnpaywallClient] = None,
+        manager: Optional[DownloadManager] = None,
+        store: Optional[PDFStore] = None,
+    ):
+        # unpaywall 可选，建议带 OAStatusCache，用于为只有 DOI 的论文查找开放获取 PDF
         self.rate_limiter = rate_limiter
+        self.unpaywall = unpaywall
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # store 可选，多个输出目录可共用同一个（build_pdf_store）；默认放在输出目录下
+        self.store = store or PDFStore(str(self.output_dir / ".pdf_store"))
+        # manager 可选，建议用 build_download_manager 创建（按主机限速与限并发）
+        self.manager = manager or DownloadManager(
+            rate_limiter=rate_limiter,
+            manifest_path=str(self.store.root / "manifest.jsonl"),
+            headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
+        )
 
     def is_open_access(self, paper: Paper) -> bool:
         """检查论文是否为开放获取"""
-        # arXiv 默认都是开放获取
-        if paper.source == "arxiv":
+        # arXiv 默认都是开放获取（包括与 arXiv 记录合并后的论文）
+        if "arxiv" in paper_sources(paper):
             return True
         
         # 从 extra 字段检查
@@ -42,104 +60,138 @@ class PDFDownloader:
     def get_pdf_url(self, paper: Paper) -> Optional[str]:
         """获取论文的 PDF URL（仅限开放获取）"""
         if not self.is_open_access(paper):
+            # 元数据未标记开放获取时，再通过 Unpaywall（优先读缓存）按 DOI 确认一次
+            if paper.doi and self.unpaywall:
+                return self.unpaywall.get_pdf_url(paper.doi)
             return None
 
         # 优先使用 extra 中的 pdf_url
         if paper.extra.get("pdf_url"):
             return paper.extra["pdf_url"]
 
-        # arXiv 论文
-        if paper.source == "arxiv" and paper.url:
+        # arXiv 论文（合并记录的 url 也可能取自 arXiv）
+        url_source = (paper.extra.get("provenance") or {}).get("url", paper.source)
+        if url_source == "arxiv" and paper.url:
             # 将 /abs/ 替换为 /pdf/，并确保以 .pdf 结尾
             pdf_url = paper.url.replace("/abs/", "/pdf/")
             if not pdf_url.endswith(".pdf"):
                 pdf_url = pdf_url + ".pdf"
             return pdf_url
 
-        # DOI 解析（尝试通过 DOI 获取开放获取 PDF）
-        if paper.doi:
-            # 尝试通过 DOI 解析服务获取 PDF
-            doi_url = f"https://doi.org/{paper.doi}"
-            # 某些开放获取论文可能通过 DOI 解析器提供 PDF
-            # 但这里不直接下载，而是返回 DOI URL 让用户访问
-            return None
+        # DOI 解析（通过 Unpaywall 查找开放获取 PDF，结果按 DOI 缓存）
+        if paper.doi and self.unpaywall:
+            return self.unpaywall.get_pdf_url(paper.doi)
 
         return None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def download_pdf(self, paper: Paper, filename: Optional[str] = None) -> Optional[Path]:
         """
         下载论文 PDF（仅限开放获取）
-        
-        返回下载的文件路径，如果失败返回 None
+
+        返回下载的文件路径（指向 PDFStore 中文件的硬链接），如果失败返回 None。
+        同一论文（DOI / arXiv ID / PDF 地址任一相同）已下载过时直接返回，不发起网络请求。
         """
-        if not self.is_open_access(paper):
-            raise ValueError(f"论文 '{paper.title}' 不是开放获取，无法下载")
+        dest = self.output_dir / (filename or self._filename(paper))
+        path = self._from_store(paper, paper_refs(paper), dest)
+        if path is not None:
+            return path
 
         pdf_url = self.get_pdf_url(paper)
         if not pdf_url:
+            if not self.is_open_access(paper):
+                raise ValueError(f"论文 '{paper.title}' 不是开放获取，无法下载")
             return None
 
-        # 生成文件名
-        if not filename:
-            # 使用标题生成安全的文件名
-            safe_title = re.sub(r'[^\w\s-]', '', paper.title)[:100]
-            safe_title = re.sub(r'[-\s]+', '-', safe_title)
-            filename = f"{safe_title}.pdf"
-        
-        output_path = self.output_dir / filename
-
-        # 限速
-        if self.rate_limiter:
-            self.rate_limiter.acquire()
-
-        # 下载 PDF
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        resp = requests.get(pdf_url, headers=headers, timeout=60, stream=True)
-        resp.raise_for_status()
-
-        # 检查内容类型
-        content_type = resp.headers.get("content-type", "").lower()
-        if "pdf" not in content_type and not pdf_url.endswith(".pdf"):
-            # 可能不是 PDF，返回 None
-            return None
-
-        # 保存文件
-        with open(output_path, "wb") as f:
-            for chunk in resp.iter_content(chunk_size=8192):
-                f.write(chunk)
+        refs = paper_refs(paper, pdf_url)
+        path = self._from_store(paper, refs, dest)
+        if path is not None:
+            return path
 
-        return output_path
-
-    def download_multiple(self, papers: list[Paper], progress_callback=None) -> dict[str, Optional[Path]]:
+        result = self.manager.fetch(DownloadTask(url=pdf_url, path=self.store.incoming_path(pdf_url), label=paper.title))
+        if not result.ok:
+            return None
+        sha256 = self.store.add_file(result.task.path, refs, result.sha256)
+        return self.store.link(sha256, dest)
+
+    def download_multiple(
+        self,
+        papers: list[Paper],
+        progress_callback=None,
+    ) -> dict[str, Optional[Path]]:
         """
-        批量下载多篇论文的 PDF（仅限开放获取）
-        
-        progress_callback: 可选的回调函数，接收 (current, total, paper_title, success) 参数
+        批量下载多篇论文的 PDF（仅限开放获取），由 DownloadManager 并发执行。
+
+        已在 PDFStore 中的论文不再下载；多篇论文解析到同一 PDF 地址时只下载一次。
+        progress_callback: 可选的回调函数，接收 (current, total, paper_title, success) 参数，
+        每篇论文结束（成功、失败或无可用链接）时调用一次，current 为已结束的篇数。
         """
-        results = {}
+        results: dict[str, Optional[Path]] = {}
         total = len(papers)
-        
-        for idx, paper in enumerate(papers):
+        done = 0
+
+        def _finish(paper: Paper, path: Optional[Path]) -> None:
+            nonlocal done
+            results[paper.id] = path
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, paper.title, path is not None)
+
+        remaining: list[Paper] = []
+        for paper in papers:
+            path = self._from_store(paper, paper_refs(paper), self.output_dir / self._filename(paper))
+            if path is not None:
+                _finish(paper, path)
+            else:
+                remaining.append(paper)
+
+        # 先批量查询 Unpaywall（并发，结果写入缓存），之后逐篇解析链接时直接命中缓存
+        if self.unpaywall:
+            dois = [p.doi for p in remaining if p.doi and not p.extra.get("pdf_url")]
+            if dois:
+                self.unpaywall.check_open_access_many(dois)
+
+        by_url: dict[str, list[Paper]] = {}
+        for paper in remaining:
             try:
-                if progress_callback:
-                    progress_callback(idx + 1, total, paper.title, None)  # None 表示进行中
-                
-                path = self.download_pdf(paper)
-                results[paper.id] = path
-                
-                if progress_callback:
-                    progress_callback(idx + 1, total, paper.title, path is not None)
-            except Exception as e:
-                results[paper.id] = None
-                if progress_callback:
-                    progress_callback(idx + 1, total, paper.title, False)
-        
-        return results
-
-
-
+                pdf_url = self.get_pdf_url(paper)
+            except Exception:
+                pdf_url = None
+            if not pdf_url:
+                _finish(paper, None)
+                continue
+            path = self._from_store(paper, paper_refs(paper, pdf_url), self.output_dir / self._filename(paper))
+            if path is not None:
+                _finish(paper, path)
+            else:
+                by_url.setdefault(pdf_url, []).append(paper)
+
+        tasks = [
+            DownloadTask(url=url, path=self.store.incoming_path(url), label=owners[0].title)
+            for url, owners in by_url.items()
+        ]
+        for result in self.manager.iter_download(tasks):
+            owners = by_url[result.task.url]
+            sha256 = None
+            if result.ok:
+                refs = [ref for paper in owners for ref in paper_refs(paper, result.task.url)]
+                sha256 = self.store.add_file(result.task.path, refs, result.sha256)
+            for paper in owners:
+                path = self.store.link(sha256, self.output_dir / self._filename(paper)) if sha256 else None
+                _finish(paper, path)
 
+        return results
 
+    def _from_store(self, paper: Paper, refs: list[str], dest: Path) -> Optional[Path]:
+        sha256 = self.store.lookup(refs)
+        if sha256 is None:
+            return None
+        # 记下本次用到的其他引用键（如 DOI），之后按任一键都能直接命中
+        self.store.add_refs(sha256, refs)
+        return self.store.link(sha256, dest)
+
+    @staticmethod
+    def _filename(paper: Paper) -> str:
+        # 使用标题生成可读的文件名；与其他论文同名时由 PDFStore.link 附加哈希前缀
+        safe_title = re.sub(r'[^\w\s-]', '', paper.title)[:100]
+        safe_title = re.sub(r'[-\s]+', '-', safe_title)
+        return f"{safe_title or paper.id}.pdf"
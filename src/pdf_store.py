@@ -0,0 +1,217 @@
+"""
+按内容寻址的 PDF 存储。
+
+- 每个 PDF 按 SHA-256 保存为一个只读文件：<root>/blobs/ab/cd/<sha256>.pdf，内容相同只存一份；
+- SQLite 索引把 DOI / arXiv ID / 下载 URL 映射到文件哈希，下载前即可判断“是否已经有这篇论文”，无需联网；
+- 对外提供的可读文件名（如 downloads/<标题>.pdf）是指向 blob 的硬链接，不额外占用磁盘；
+  不同论文标题相同时，后来者的文件名附加哈希前缀，不会互相覆盖。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .download_manager import sha256_file
+from .merge import paper_sources
+from .models import Paper
+from .sources.unpaywall import normalize_doi
+
+
+DEFAULT_STORE_PATH = "data/pdf_store"
+
+_ARXIV_ID = re.compile(r"arxiv\.org/(?:abs|pdf)/(.+?)(?:v\d+)?(?:\.pdf)?$", re.IGNORECASE)
+
+
+def arxiv_id(paper: Paper) -> Optional[str]:
+    """
+    提取 arXiv 编号（不含版本号），如 http://arxiv.org/abs/1706.03762v5 → 1706.03762。
+    """
+    candidates = [(paper.extra.get("source_ids") or {}).get("arxiv")]
+    if "arxiv" in paper_sources(paper):
+        candidates += [paper.id, paper.url]
+    candidates.append(paper.extra.get("pdf_url"))
+    for value in candidates:
+        match = _ARXIV_ID.search(value or "")
+        if match:
+            return match.group(1)
+    return None
+
+
+def paper_refs(paper: Paper, url: Optional[str] = None) -> List[str]:
+    """
+    论文在索引中的引用键：doi:<DOI> / arxiv:<编号> / url:<PDF 地址>。
+    """
+    refs = []
+    doi = normalize_doi(paper.doi)
+    if doi:
+        refs.append(f"doi:{doi}")
+    aid = arxiv_id(paper)
+    if aid:
+        refs.append(f"arxiv:{aid}")
+    for link in (url, paper.extra.get("pdf_url")):
+        if link and f"url:{link}" not in refs:
+            refs.append(f"url:{link}")
+    return refs
+
+
+class PDFStore:
+    """
+    参数:
+        root: 存储根目录（blobs 与 index.sqlite3 所在目录）
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_PATH) -> None:
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.incoming_dir = self.root / "incoming"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.incoming_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite3"), timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pdf_refs (
+                ref TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL REFERENCES blobs(sha256),
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_pdf_refs_sha256 ON pdf_refs(sha256);
+            """
+        )
+        self._conn.commit()
+
+    def blob_path(self, sha256: str) -> Path:
+        # 两级目录分片，单个目录下的文件数保持在可控范围
+        return self.blob_dir / sha256[:2] / sha256[2:4] / f"{sha256}.pdf"
+
+    def incoming_path(self, url: str) -> Path:
+        """
+        下载暂存路径：同一 URL 总是对应同一文件，中断后重新运行可以续传。
+        """
+        return self.incoming_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.pdf"
+
+    def lookup(self, refs: Iterable[str]) -> Optional[str]:
+        """
+        按引用键查找已保存的 PDF，返回 SHA-256；blob 文件已丢失的记录视为不存在。
+        """
+        refs = list(refs)
+        if not refs:
+            return None
+        placeholders = ",".join("?" * len(refs))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT sha256 FROM pdf_refs WHERE ref IN ({placeholders})",
+                refs,
+            ).fetchall()
+        for (sha256,) in rows:
+            if self.blob_path(sha256).exists():
+                return sha256
+        return None
+
+    def has(self, paper: Paper, url: Optional[str] = None) -> bool:
+        """
+        是否已保存该论文的 PDF（只查本地索引，不发起网络请求）。
+        """
+        return self.lookup(paper_refs(paper, url)) is not None
+
+    def add_file(self, path: Path, refs: Iterable[str], sha256: Optional[str] = None) -> str:
+        """
+        把已下载的文件移入存储（内容已存在时直接删除该文件），并登记引用键，返回 SHA-256。
+        """
+        path = Path(path)
+        sha256 = sha256 or sha256_file(path)
+        blob = self.blob_path(sha256)
+        if blob.exists():
+            path.unlink(missing_ok=True)
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(path, blob)
+            # blob 通过硬链接对外可见，设为只读，避免修改某个链接时破坏共享的内容
+            blob.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO blobs (sha256, size, created_at) VALUES (?, ?, ?)",
+                (sha256, blob.stat().st_size, now),
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pdf_refs (ref, sha256, created_at) VALUES (?, ?, ?)",
+                [(ref, sha256, now) for ref in refs],
+            )
+        return sha256
+
+    def add_refs(self, sha256: str, refs: Iterable[str]) -> None:
+        """
+        为已有的 PDF 补充引用键（如同一论文通过其他来源的 DOI 再次请求时）。
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO pdf_refs (ref, sha256, created_at) VALUES (?, ?, ?)",
+                [(ref, sha256, now) for ref in refs],
+            )
+
+    def link(self, sha256: str, dest: Path) -> Path:
+        """
+        在 dest 创建指向 blob 的可读文件名（硬链接，跨文件系统时退化为复制），返回实际路径。
+
+        dest 已存在且是同一内容时直接复用；是其他文件时在文件名后附加哈希前缀。
+        """
+        blob = self.blob_path(sha256)
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists():
+            if _same_content(dest, blob, sha256):
+                return dest
+            dest = dest.with_name(f"{dest.stem}-{sha256[:8]}{dest.suffix}")
+            if dest.exists() and _same_content(dest, blob, sha256):
+                return dest
+            dest.unlink(missing_ok=True)
+        try:
+            os.link(blob, dest)
+        except OSError:
+            shutil.copyfile(blob, dest)
+        return dest
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            blobs, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+            refs = self._conn.execute("SELECT COUNT(*) FROM pdf_refs").fetchone()[0]
+        return {"blobs": blobs, "bytes": size, "refs": refs}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _same_content(path: Path, blob: Path, sha256: str) -> bool:
+    try:
+        if os.path.samefile(path, blob):
+            return True
+        return path.stat().st_size == blob.stat().st_size and sha256_file(path) == sha256
+    except OSError:
+        return False
+
+
+def build_pdf_store(config: Dict) -> PDFStore:
+    """
+    根据配置的 download.store_path 创建 PDF 存储。
+    """
+    download_cfg = config.get("download", {}) or {}
+    return PDFStore(download_cfg.get("store_path") or DEFAULT_STORE_PATH)
@@ -1,12 +1,70 @@
+import asyncio
+import sqlite3
 import threading
 import time
+from abc import ABC, abstractmethod
 from collections import deque
-from typing import Deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
 
 
-class SimpleRateLimiter:
+# 各上游主机的默认速率（未在配置 rate_limit.hosts 中覆盖时使用）
+DEFAULT_HOST_LIMITS: Dict[str, Dict[str, float]] = {
+    # arXiv API 要求每 3 秒不超过 1 次请求
+    "export.arxiv.org": {"requests_per_minute": 20, "burst": 1},
+    "api.crossref.org": {"requests_per_minute": 300, "burst": 10},
+    "api.semanticscholar.org": {"requests_per_minute": 60, "burst": 1},
+    "api.unpaywall.org": {"requests_per_minute": 600, "burst": 10},
+}
+
+DEFAULT_SQLITE_PATH = "data/cache/rate_limit.sqlite3"
+
+_shared_lock = threading.Lock()
+_shared_registries: Dict[Tuple, "RateLimiterRegistry"] = {}
+
+
+class RateLimiter(ABC):
+    """
+    限速器抽象基类。
+
+    acquire 阻塞等待，aacquire 供 asyncio 调用方 await，try_acquire 不等待、拿不到立即返回 False；
+    penalize 用于上游返回 429 / Retry-After 时暂停后续请求。
+    子类实现 try_acquire / penalize / _reserve，acquire / aacquire 默认按 _reserve 的结果等待一次。
+    """
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    @abstractmethod
+    def try_acquire(self) -> bool:
+        """
+        有余量时占用一次请求并返回 True，否则立即返回 False。
+        """
+
+    @abstractmethod
+    def penalize(self, seconds: float) -> None:
+        """
+        在接下来 seconds 秒内不再放行请求。
+        """
+
+    @abstractmethod
+    def _reserve(self) -> float:
+        """
+        预约一次请求，返回调用方需要等待的秒数。
+        """
+
+
+class SimpleRateLimiter(RateLimiter):
     """
-    简单的令牌桶/滑动窗口限速器。
+    简单的滑动窗口限速器。
 
     参数:
         max_calls: 时间窗口内最大请求数量
@@ -18,27 +76,302 @@ class SimpleRateLimiter:
         self.period = period
         self._lock = threading.Lock()
         self._calls: Deque[float] = deque()
+        self._blocked_until = 0.0
 
     def acquire(self) -> None:
         """
         当超出速率限制时阻塞，直到可以继续发送请求。
         """
+        while True:
+            wait_time = self._reserve()
+            if wait_time <= 0:
+                return
+            time.sleep(wait_time)
+
+    async def aacquire(self) -> None:
+        while True:
+            wait_time = self._reserve()
+            if wait_time <= 0:
+                return
+            await asyncio.sleep(wait_time)
+
+    def try_acquire(self) -> bool:
+        return self._reserve() <= 0
+
+    def penalize(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.time() + seconds)
+
+    def _reserve(self) -> float:
+        # 有空位时记录本次请求并返回 0，否则返回需要等待的时间（不占位，等待后重试）
         with self._lock:
             now = time.time()
+            if self._blocked_until > now:
+                return self._blocked_until - now
+
             # 移除过期的时间戳
             while self._calls and self._calls[0] <= now - self.period:
                 self._calls.popleft()
 
             if len(self._calls) < self.max_calls:
                 self._calls.append(now)
-                return
+                return 0.0
 
             # 需要等待到最早的一个请求过期
-            wait_time = self.period - (now - self._calls[0])
+            return self.period - (now - self._calls[0])
 
-        if wait_time > 0:
-            time.sleep(wait_time)
-        # 递归调用以更新队列
-        self.acquire()
 
+class TokenBucket(RateLimiter):
+    """
+    令牌桶限速器。
+
+    参数:
+        rate: 每秒补充的令牌数
+        burst: 桶容量，即允许的最大突发请求数
+
+    acquire 采用预约方式：令牌不足时先扣成负数再按欠额计算等待时间，
+    多个线程/协程按到达顺序排队，不需要循环重试。
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = max(float(rate), 1e-6)
+        self.burst = max(float(burst), 1.0)
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._blocked_until > now or self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def penalize(self, seconds: float) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._blocked_until = max(self._blocked_until, now + max(0.0, seconds))
+            # 恢复后从空桶开始，避免解除封锁瞬间的突发
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, self._blocked_until)
+
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1.0
+            start = max(now, self._blocked_until)
+            deficit = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return (start - now) + deficit
+
+
+class SQLiteRateLimitStore:
+    """
+    多进程共享的令牌桶状态存储（SQLite 文件）。
+
+    每个主机一行（令牌数、更新时间、封锁截止时间），所有读改写都在
+    BEGIN IMMEDIATE 事务中完成，多个 uvicorn worker 之间互斥。
+    """
+
+    def __init__(self, path: str) -> None:
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=10.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS token_buckets (
+                host TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0
+            )
+            """
+        )
+
+    def update(self, host: str, rate: float, burst: float, fn) -> float:
+        """
+        在事务中读取并更新 host 的状态。
+
+        fn(tokens, blocked_until, now) 返回 (新令牌数, 新封锁截止时间, 返回值)，
+        令牌数在调用 fn 之前已按 rate 补充。
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at, blocked_until FROM token_buckets WHERE host = ?",
+                    (host,),
+                ).fetchone()
+                if row is None:
+                    tokens, blocked_until = burst, 0.0
+                else:
+                    tokens, updated_at, blocked_until = row
+                    refill_from = max(updated_at, min(blocked_until, now))
+                    if now > refill_from:
+                        tokens = min(burst, tokens + (now - refill_from) * rate)
+                tokens, blocked_until, result = fn(tokens, blocked_until, now)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (host, tokens, updated_at, blocked_until) VALUES (?, ?, ?, ?)",
+                    (host, tokens, now, blocked_until),
+                )
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+
+class SQLiteTokenBucket(RateLimiter):
+    """
+    状态保存在 SQLiteRateLimitStore 中的令牌桶，同一主机的额度由所有进程共享。
+
+    参数与 TokenBucket 相同，额外需要 store 与 host。
+    """
+
+    def __init__(self, store: SQLiteRateLimitStore, host: str, rate: float, burst: float = 1.0):
+        self.store = store
+        self.host = host
+        self.rate = max(float(rate), 1e-6)
+        self.burst = max(float(burst), 1.0)
+
+    def try_acquire(self) -> bool:
+        def _take(tokens: float, blocked_until: float, now: float):
+            if blocked_until > now or tokens < 1.0:
+                return tokens, blocked_until, False
+            return tokens - 1.0, blocked_until, True
+
+        return self.store.update(self.host, self.rate, self.burst, _take)
+
+    def penalize(self, seconds: float) -> None:
+        def _block(tokens: float, blocked_until: float, now: float):
+            return min(tokens, 0.0), max(blocked_until, now + max(0.0, seconds)), None
+
+        self.store.update(self.host, self.rate, self.burst, _block)
+
+    def _reserve(self) -> float:
+        rate = self.rate
+
+        def _reserve(tokens: float, blocked_until: float, now: float):
+            tokens -= 1.0
+            start = max(now, blocked_until)
+            deficit = -tokens / rate if tokens < 0 else 0.0
+            return tokens, blocked_until, (start - now) + deficit
+
+        return self.store.update(self.host, self.rate, self.burst, _reserve)
+
+
+class RateLimiterRegistry:
+    """
+    按上游主机划分的限速器集合：每个主机一个独立的令牌桶，互不影响。
+
+    参数:
+        default_rpm / default_burst: 未单独配置的主机使用的速率
+        hosts: 主机名 → {requests_per_minute, burst}
+        backend: memory 为进程内令牌桶（命令行默认）；sqlite 为多进程共享的令牌桶，
+            多个 uvicorn worker 合计不超过配置的速率（Web 服务与任务 worker 默认，见 with_default_backend）
+        path: sqlite 后端的状态文件路径
+    """
+
+    def __init__(
+        self,
+        default_rpm: float = 20,
+        default_burst: float = 1,
+        hosts: Optional[Dict[str, Dict]] = None,
+        backend: str = "memory",
+        path: Optional[str] = None,
+    ) -> None:
+        self.default_rpm = float(default_rpm)
+        self.default_burst = float(default_burst)
+        self.hosts = {k.lower(): dict(v or {}) for k, v in (hosts or {}).items()}
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._store: Optional[SQLiteRateLimitStore] = None
+        if backend == "sqlite":
+            self._store = SQLiteRateLimitStore(path or DEFAULT_SQLITE_PATH)
+        elif backend != "memory":
+            raise ValueError(f"Unsupported rate limit backend: {backend}")
+
+    def for_host(self, host: str) -> RateLimiter:
+        host = host.lower()
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._create(host)
+                self._limiters[host] = limiter
+            return limiter
+
+    def for_url(self, url: str) -> RateLimiter:
+        return self.for_host(urlparse(url).hostname or "")
+
+    def _create(self, host: str) -> RateLimiter:
+        host_cfg = self.hosts.get(host, {})
+        rpm = float(host_cfg.get("requests_per_minute", self.default_rpm))
+        burst = float(host_cfg.get("burst", self.default_burst))
+        rate = max(rpm, 1e-3) / 60.0
+        if self._store is not None:
+            return SQLiteTokenBucket(self._store, host, rate=rate, burst=burst)
+        return TokenBucket(rate=rate, burst=burst)
+
+
+def with_default_backend(config: Dict, backend: str = "sqlite") -> Dict:
+    """
+    返回 rate_limit.backend 缺省为 backend 的配置副本；已显式配置 backend 时原样返回 config。
+
+    Web 服务（多个 uvicorn worker）与任务 worker 以 sqlite 为默认值，使各进程共享同一份额度；
+    命令行单进程仍默认使用 memory。
+    """
+    rate_cfg = config.get("rate_limit", {}) or {}
+    if rate_cfg.get("backend"):
+        return config
+    return {**config, "rate_limit": {**rate_cfg, "backend": backend}}
+
+
+def build_rate_limiters(config: Dict) -> RateLimiterRegistry:
+    """
+    根据配置的 rate_limit 节点返回进程内共享的限速器集合。
+
+    相同配置多次调用返回同一个实例，令牌桶状态因此在请求之间保留。
+    rate_limit.backend 为 sqlite 时，令牌桶状态保存在 rate_limit.path 中，由所有进程共享。
+    """
+    rate_cfg = config.get("rate_limit", {}) or {}
+    default_rpm = float(rate_cfg.get("requests_per_minute", 20))
+    default_burst = float(rate_cfg.get("burst", 1))
+    backend = str(rate_cfg.get("backend", "memory")).lower()
+    path = rate_cfg.get("path") or DEFAULT_SQLITE_PATH
+
+    hosts: Dict[str, Dict] = {k: dict(v) for k, v in DEFAULT_HOST_LIMITS.items()}
+    for host, host_cfg in (rate_cfg.get("hosts") or {}).items():
+        hosts.setdefault(host.lower(), {}).update(host_cfg or {})
 
+    signature = (
+        default_rpm,
+        default_burst,
+        backend,
+        path if backend == "sqlite" else None,
+        tuple(sorted((h, tuple(sorted(c.items()))) for h, c in hosts.items())),
+    )
+    with _shared_lock:
+        registry = _shared_registries.get(signature)
+        if registry is None:
+            registry = RateLimiterRegistry(
+                default_rpm=default_rpm,
+                default_burst=default_burst,
+                hosts=hosts,
+                backend=backend,
+                path=path,
+            )
+            _shared_registries[signature] = registry
+        return registry
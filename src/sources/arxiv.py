@@ -1,23 +1,44 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable, Optional
+import time
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
 
-import requests
 from xml.etree import ElementTree as ET
 
+from .. import http_client, metrics
 from ..models import Paper
-from ..rate_limiter import SimpleRateLimiter
+from ..rate_limiter import RateLimiter
 from .base import BaseSource
 
 
 ARXIV_API_URL = "http://export.arxiv.org/api/query"
 
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_ARXIV = "{http://arxiv.org/schemas/atom}"
+_ENTRY = f"{_ATOM}entry"
+_ID = f"{_ATOM}id"
+_TITLE = f"{_ATOM}title"
+_SUMMARY = f"{_ATOM}summary"
+_AUTHOR = f"{_ATOM}author"
+_NAME = f"{_ATOM}name"
+_PUBLISHED = f"{_ATOM}published"
+_UPDATED = f"{_ATOM}updated"
+_CATEGORY = f"{_ATOM}category"
+_PRIMARY_CATEGORY = f"{_ARXIV}primary_category"
+_DOI = f"{_ARXIV}doi"
+_JOURNAL_REF = f"{_ARXIV}journal_ref"
+
 
 class ArxivSource(BaseSource):
     name = "arxiv"
+    # arXiv 建议单次请求不超过 2000 条，且请求间隔不少于 3 秒
+    default_page_size = 200
+    # from_year 转换为 submittedDate 区间，由 arXiv 在服务端过滤
+    supported_filters = frozenset({"from_year"})
+    api_url = ARXIV_API_URL
 
-    def __init__(self, rate_limiter: Optional[SimpleRateLimiter] = None, config: Optional[dict] = None) -> None:
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, config: Optional[dict] = None) -> None:
         super().__init__(rate_limiter=rate_limiter, config=config)
 
     def search(
@@ -26,66 +47,207 @@ class ArxivSource(BaseSource):
         max_results: int = 50,
         from_year: Optional[int] = None,
     ) -> Iterable[Paper]:
-        params = {
-            "search_query": f"all:{query}",
-            "start": 0,
-            "max_results": max_results,
-        }
-        if self.rate_limiter:
-            self.rate_limiter.acquire()
-        resp = requests.get(ARXIV_API_URL, params=params, timeout=30)
-        resp.raise_for_status()
-
-        root = ET.fromstring(resp.text)
-        ns = {"atom": "http://www.w3.org/2005/Atom"}
-        for entry in root.findall("atom:entry", ns):
-            yield self._parse_entry(entry, from_year)
-
-    def _parse_entry(self, entry, from_year: Optional[int]) -> Paper:
-        def _text(elem, tag: str) -> Optional[str]:
-            ns = "{http://www.w3.org/2005/Atom}"
-            found = elem.find(f"{ns}{tag}")
-            return found.text if found is not None else None
-
-        ns = "{http://www.w3.org/2005/Atom}"
-        arxiv_id = _text(entry, "id") or ""
-        title = (_text(entry, "title") or "").strip().replace("\n", " ")
-        abstract = (_text(entry, "summary") or "").strip()
-
-        authors = [
-            (a.find(f"{ns}name").text or "").strip()
-            for a in entry.findall(f"{ns}author")
-            if a.find(f"{ns}name") is not None
-        ]
-
-        published_raw = _text(entry, "published")
-        published_at = None
-        if published_raw:
-            try:
-                published_at = datetime.fromisoformat(published_raw.replace("Z", "+00:00"))
-            except Exception:
-                published_at = None
-
-        # 构造 PDF 下载链接（仅用于前端一键跳转，不做代理下载）
-        extra = {}
-        if arxiv_id:
-            pdf_url = arxiv_id.replace("/abs/", "/pdf/")
-            if not pdf_url.endswith(".pdf"):
-                pdf_url = pdf_url + ".pdf"
-            extra["pdf_url"] = pdf_url
-
-        # from_year 过滤在外层调用处处理，以保持逻辑简单
-        return Paper(
-            id=arxiv_id,
-            title=title,
-            abstract=abstract,
-            authors=authors,
-            published_at=published_at,
-            source=self.name,
-            url=arxiv_id,
-            doi=None,
-            journal=None,
-            extra=extra,
-        )
+        yield from self._iter_page(query, 0, max_results, from_year)
 
+    def harvest(
+        self,
+        query: str,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Paper]:
+        """
+        按 start 偏移分页获取，预取的页数受 prefetch 与限速器共同约束。
+        """
+        yield from self._iter_offset_pages(
+            lambda start, size: self._fetch_page(query, start, size, from_year),
+            limit=limit,
+        )
 
+    def harvest_incremental(
+        self,
+        query: str,
+        mark: Optional[str] = None,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Tuple[Paper, Optional[str]]]:
+        """
+        按提交时间（submittedDate）升序获取 mark 之后提交的论文，高水位为最后一篇的提交时间（ISO 格式）。
+
+        submittedDate 只精确到分钟且区间含端点，上次最后一分钟内的论文会再次返回，由存储层 upsert 去重。
+        """
+        lower = None
+        if mark:
+            lower = datetime.fromisoformat(mark).astimezone(timezone.utc).strftime("%Y%m%d%H%M")
+
+        def _page(start: int, size: int) -> List[Tuple[Paper, Optional[str]]]:
+            papers = self._fetch_page(query, start, size, from_year, submitted_from=lower, sort_by="submittedDate")
+            return [(p, p.published_at.isoformat() if p.published_at else None) for p in papers]
+
+        latest = mark
+        for paper, paper_mark in self._iter_offset_pages(_page, limit=limit):
+            latest = paper_mark or latest
+            yield paper, latest
+
+    def _fetch_page(
+        self,
+        query: str,
+        start: int,
+        size: int,
+        from_year: Optional[int],
+        submitted_from: Optional[str] = None,
+        sort_by: Optional[str] = None,
+    ) -> List[Paper]:
+        return list(self._iter_page(query, start, size, from_year, submitted_from, sort_by))
+
+    def _iter_page(
+        self,
+        query: str,
+        start: int,
+        size: int,
+        from_year: Optional[int],
+        submitted_from: Optional[str] = None,
+        sort_by: Optional[str] = None,
+    ) -> Iterator[Paper]:
+        """
+        请求一页结果并边接收边解析，每个 <entry> 结束即产出对应的论文。
+
+        from_year / submitted_from 转换为 submittedDate 区间（取两者中较晚的下界）；
+        sort_by 为空时使用数据源配置的 sort_by / sort_order（默认按相关度）。
+        """
+        lower = f"{from_year}01010000" if from_year is not None else None
+        if submitted_from and (lower is None or submitted_from > lower):
+            lower = submitted_from
+        search_query = f"all:{query}"
+        if lower:
+            search_query += f" AND submittedDate:[{lower} TO 999912312359]"
+        params = {
+            "search_query": search_query,
+            "start": start,
+            "max_results": size,
+        }
+        if sort_by:
+            params["sortBy"] = sort_by
+            params["sortOrder"] = "ascending"
+        elif self.config.get("sort_by"):
+            params["sortBy"] = self.config["sort_by"]
+            params["sortOrder"] = self.config.get("sort_order", "descending")
+        resp = http_client.get(ARXIV_API_URL, limiter=self.rate_limiter, params=params, timeout=self.timeout, stream=True)
+        try:
+            resp.raise_for_status()
+            # 由 urllib3 解压 gzip 响应，解析器直接读取字节流
+            resp.raw.decode_content = True
+            yield from parse_feed(resp.raw, source=self.name)
+        finally:
+            resp.close()
+
+
+def parse_feed(stream: BinaryIO, source: str = ArxivSource.name, chunk_size: int = 64 * 1024) -> Iterator[Paper]:
+    """
+    增量解析 arXiv API 返回的 Atom 字节流，每个 <entry> 结束时产出一篇论文并清空已解析的子元素，
+    内存占用与结果条数基本无关。
+
+    除基本字段外还保留：doi（正式发表版本的 DOI）、extra["categories"] / extra["primary_category"]、
+    extra["journal_ref"]、extra["updated_at"]（最新版本的提交时间）、extra["pdf_url"]。
+    """
+    # 只订阅 end 事件并按较大的块喂给解析器，比 iterparse 默认的 16KB 读取少一半以上的事件往返
+    parser = ET.XMLPullParser(events=("end",))
+    parse_time = 0.0
+    while True:
+        chunk = stream.read(chunk_size)
+        started = time.perf_counter()
+        if chunk:
+            parser.feed(chunk)
+        else:
+            parser.close()
+        papers = []
+        for _, elem in parser.read_events():
+            if elem.tag == _ENTRY:
+                papers.append(_parse_entry(elem, source))
+                # 根元素上只留下空的 entry 节点，标题、摘要等文本随之释放
+                elem.clear()
+        # 只统计解析耗时，不含等待网络数据和调用方处理结果的时间
+        parse_time += time.perf_counter() - started
+        yield from papers
+        if not chunk:
+            break
+    metrics.PARSE_SECONDS.observe(parse_time, source)
+
+
+def _parse_entry(entry, source: str) -> Paper:
+    arxiv_id = ""
+    title = ""
+    abstract = ""
+    published_raw = updated_raw = None
+    authors: List[str] = []
+    categories: List[str] = []
+    primary_category = doi = journal_ref = None
+
+    # 只遍历一次子元素，按标签分派，不做多次带命名空间的 find
+    for child in entry:
+        tag = child.tag
+        if tag == _AUTHOR:
+            for sub in child:
+                if sub.tag == _NAME:
+                    authors.append((sub.text or "").strip())
+                    break
+        elif tag == _CATEGORY:
+            term = child.get("term")
+            if term:
+                categories.append(term)
+        elif tag == _ID:
+            arxiv_id = child.text or ""
+        elif tag == _TITLE:
+            title = (child.text or "").strip().replace("\n", " ")
+        elif tag == _SUMMARY:
+            abstract = (child.text or "").strip()
+        elif tag == _PUBLISHED:
+            published_raw = child.text
+        elif tag == _UPDATED:
+            updated_raw = child.text
+        elif tag == _PRIMARY_CATEGORY:
+            primary_category = child.get("term")
+        elif tag == _DOI:
+            doi = (child.text or "").strip() or None
+        elif tag == _JOURNAL_REF:
+            journal_ref = " ".join((child.text or "").split()) or None
+
+    published_at = _parse_date(published_raw)
+
+    # 构造 PDF 下载链接（仅用于前端一键跳转，不做代理下载）
+    extra = {}
+    if arxiv_id:
+        pdf_url = arxiv_id.replace("/abs/", "/pdf/")
+        if not pdf_url.endswith(".pdf"):
+            pdf_url = pdf_url + ".pdf"
+        extra["pdf_url"] = pdf_url
+    if categories:
+        extra["categories"] = categories
+    if primary_category:
+        extra["primary_category"] = primary_category
+    if journal_ref:
+        extra["journal_ref"] = journal_ref
+    updated_at = _parse_date(updated_raw)
+    if updated_at is not None and updated_at != published_at:
+        extra["updated_at"] = updated_at.isoformat()
+
+    return Paper(
+        id=arxiv_id,
+        title=title,
+        abstract=abstract,
+        authors=authors,
+        published_at=published_at,
+        source=source,
+        url=arxiv_id,
+        doi=doi,
+        journal=None,
+        extra=extra,
+    )
+
+
+def _parse_date(raw: Optional[str]) -> Optional[datetime]:
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
@@ -1,10 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Iterable, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 
+from .. import http_client
 from ..models import Paper
 
+if TYPE_CHECKING:
+    import requests
+
+    from ..rate_limiter import RateLimiterRegistry
+
 
 class BaseSource(ABC):
     """
@@ -12,11 +21,44 @@ class BaseSource(ABC):
     """
 
     name: str
+    # 深度翻页时每页条数与预取页数的默认值，可通过数据源配置的 page_size / prefetch 覆盖
+    default_page_size: int = 100
+    default_prefetch: int = 2
+    # 能直接交给上游 API 执行的过滤条件（目前只有 "from_year"）；
+    # 未声明的条件由 apply_filters 在本地统一过滤，数据源实现可以忽略对应参数
+    supported_filters: FrozenSet[str] = frozenset()
+    # 上游 API 地址，用于按主机选择限速器；数据源配置中的 base_url 优先
+    api_url: Optional[str] = None
 
     def __init__(self, rate_limiter=None, config: Optional[dict] = None) -> None:
         self.rate_limiter = rate_limiter
         self.config = config or {}
 
+    @classmethod
+    def from_config(cls, config: Dict, limiters: "RateLimiterRegistry") -> "BaseSource":
+        """
+        按完整配置创建实例（由 aggregator.build_sources 调用）：数据源配置取 sources.<name>。
+
+        需要额外依赖（如开放获取缓存）的数据源覆盖此方法。
+        """
+        source_cfg = (config.get("sources") or {}).get(cls.name) or {}
+        url = source_cfg.get("base_url") or cls.api_url
+        return cls(rate_limiter=limiters.for_url(url) if url else None, config=source_cfg)
+
+    @property
+    def session(self) -> requests.Session:
+        """
+        进程内共享的 HTTP Session（长连接池），各数据源的请求都应通过它发出。
+        """
+        return http_client.get_session()
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """
+        请求超时（连接, 读取），读取超时可通过数据源配置的 timeout 覆盖。
+        """
+        return http_client.timeout(self.config.get("timeout"))
+
     @abstractmethod
     def search(
         self,
@@ -28,4 +70,154 @@ class BaseSource(ABC):
         按关键词和可选年份范围搜索论文。
         """
 
+    def harvest(
+        self,
+        query: str,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Paper]:
+        """
+        深度检索：分页获取最多 limit 条结果，以生成器逐条产出，内存占用与结果总数无关。
+
+        默认实现退化为一次 search，支持翻页的数据源应覆盖此方法。
+        """
+        yield from self.search(query=query, max_results=limit, from_year=from_year)
+
+    def harvest_incremental(
+        self,
+        query: str,
+        mark: Optional[str] = None,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Tuple[Paper, Optional[str]]]:
+        """
+        增量检索：只获取高水位 mark 之后的新记录，产出 (论文, 处理完该论文后的高水位)。
+
+        高水位按产出顺序单调推进，调用方保存最后一个非空值，下次运行时传回；mark 为 None 表示首次运行。
+        默认实现不支持增量，每次完整执行 harvest 且不推进高水位，新旧记录由存储层 upsert 区分。
+        """
+        for paper in self.harvest(query=query, limit=limit, from_year=from_year):
+            yield paper, None
+
+    def apply_filters(self, papers: Iterable[Paper], from_year: Optional[int] = None) -> Iterable[Paper]:
+        """
+        对本数据源未下推到上游的过滤条件做本地过滤。
+
+        所有条件均已下推时原样返回 papers，不增加逐条判断的开销。
+        """
+        if from_year is None or "from_year" in self.supported_filters:
+            return papers
+        return filter_from_year(papers, from_year)
 
+    @property
+    def page_size(self) -> int:
+        return max(1, int(self.config.get("page_size", self.default_page_size)))
+
+    @property
+    def prefetch(self) -> int:
+        return max(1, int(self.config.get("prefetch", self.default_prefetch)))
+
+    def _iter_offset_pages(
+        self,
+        fetch_page: Callable[[int, int], List[Paper]],
+        limit: int,
+        page_size: Optional[int] = None,
+        max_offset: Optional[int] = None,
+    ) -> Iterator[Paper]:
+        """
+        按偏移量翻页：同时预取 prefetch 页（每页请求仍经过限速器），按顺序产出。
+
+        fetch_page(offset, size) 返回该页的论文列表；某页不足 size 条时视为已到末尾。
+        max_offset 为上游允许的最大偏移（如 Semantic Scholar 的 1000）。
+        """
+        size = page_size or self.page_size
+        if max_offset is not None:
+            limit = min(limit, max_offset)
+        offsets = iter(range(0, max(0, limit), size))
+
+        executor = ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix=f"{self.name}-page")
+        inflight: Deque[Tuple[int, Future]] = deque()
+
+        def _submit_next() -> None:
+            offset = next(offsets, None)
+            if offset is not None:
+                inflight.append((offset, executor.submit(fetch_page, offset, min(size, limit - offset))))
+
+        try:
+            for _ in range(self.prefetch):
+                _submit_next()
+            while inflight:
+                offset, future = inflight.popleft()
+                page = future.result()
+                yield from page
+                if len(page) < min(size, limit - offset):
+                    break
+                _submit_next()
+        finally:
+            for _, future in inflight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def _iter_cursor_pages(
+        self,
+        fetch_page: Callable[[Optional[str]], Tuple[List[Paper], Optional[str]]],
+        limit: int,
+        first_cursor: Optional[str] = None,
+    ) -> Iterator[Paper]:
+        """
+        按游标翻页：下一页依赖上一页返回的游标，因此只预取一页（在产出当前页时请求下一页）。
+
+        fetch_page(cursor) 返回 (论文列表, 下一页游标)；列表为空或游标为空时结束。
+        """
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-cursor")
+        future: Optional[Future] = executor.submit(fetch_page, first_cursor)
+        produced = 0
+        try:
+            while future is not None and produced < limit:
+                page, next_cursor = future.result()
+                future = None
+                if page and next_cursor and produced + len(page) < limit:
+                    future = executor.submit(fetch_page, next_cursor)
+                for paper in page[: limit - produced]:
+                    yield paper
+                produced += min(len(page), limit - produced)
+                if not page:
+                    break
+        finally:
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    async def asearch(
+        self,
+        query: str,
+        max_results: int = 50,
+        from_year: Optional[int] = None,
+        into: Optional[List[Paper]] = None,
+    ) -> List[Paper]:
+        """
+        search 的异步版本，供 asyncio 调用方（如 FastAPI 路由）使用。
+
+        默认实现在数据源 I/O 专用线程池（http_client.source_executor）中执行 search，
+        不阻塞事件循环，也不占用 asyncio 默认线程池；HTTP 请求仍走共享连接池。
+        into 不为空时，解析出的论文会逐条追加到该列表，调用方超时取消后仍可拿到部分结果。
+        """
+        buf: List[Paper] = into if into is not None else []
+
+        def _run() -> None:
+            papers = self.search(query=query, max_results=max_results, from_year=from_year)
+            for paper in self.apply_filters(papers, from_year):
+                buf.append(paper)
+
+        await asyncio.get_running_loop().run_in_executor(http_client.source_executor(), _run)
+        return buf
+
+
+def filter_from_year(papers: Iterable[Paper], from_year: int) -> Iterator[Paper]:
+    """
+    只保留 from_year 及之后发表的论文；发表时间未知的记录与本地论文库（year >= ?）一致，不予保留。
+    """
+    for paper in papers:
+        published_at = paper.published_at
+        if published_at is not None and published_at.year >= from_year:
+            yield paper
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime
-from typing import Iterable, Optional
-
-import requests
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from .. import http_client, metrics
 from ..models import Paper
-from ..rate_limiter import SimpleRateLimiter
+from ..rate_limiter import RateLimiter
 from .base import BaseSource
-from .unpaywall import UnpaywallClient
+from .unpaywall import UnpaywallClient, enrich_open_access
+
+if TYPE_CHECKING:
+    from ..cache import OAStatusCache
+    from ..rate_limiter import RateLimiterRegistry
 
 
 CROSSREF_API_URL = "https://api.crossref.org/works"
@@ -16,15 +20,46 @@ CROSSREF_API_URL = "https://api.crossref.org/works"
 
 class CrossRefSource(BaseSource):
     name = "crossref"
+    # CrossRef 单页最多 1000 条
+    default_page_size = 500
+    # from_year 转换为 from-pub-date 过滤条件
+    supported_filters = frozenset({"from_year"})
+    api_url = CROSSREF_API_URL
 
-    def __init__(self, rate_limiter: Optional[SimpleRateLimiter] = None, config: Optional[dict] = None) -> None:
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter] = None,
+        config: Optional[dict] = None,
+        oa_cache: Optional["OAStatusCache"] = None,
+        unpaywall_rate_limiter: Optional[RateLimiter] = None,
+    ) -> None:
         super().__init__(rate_limiter=rate_limiter, config=config)
-        # 初始化 Unpaywall 客户端（如果配置了邮箱）
+        # 初始化 Unpaywall 客户端（如果配置了邮箱），oa_cache 用于避免重复查询同一 DOI
+        # Unpaywall 是独立的上游主机，使用单独的限速器，未提供时与 CrossRef 共用
         unpaywall_email = self.config.get("unpaywall_email")
         if unpaywall_email:
-            self.unpaywall = UnpaywallClient(email=unpaywall_email, rate_limiter=rate_limiter)
+            self.unpaywall = UnpaywallClient(
+                email=unpaywall_email,
+                rate_limiter=unpaywall_rate_limiter or rate_limiter,
+                cache=oa_cache,
+            )
         else:
             self.unpaywall = None
+        # inline: 返回结果前批量补全开放获取状态；deferred: 仅标记 oa_pending，由调用方（如网页）稍后补全
+        self.unpaywall_mode = self.config.get("unpaywall_mode", "inline")
+        self.unpaywall_concurrency = int(self.config.get("unpaywall_concurrency", 8))
+
+    @classmethod
+    def from_config(cls, config: Dict, limiters: "RateLimiterRegistry") -> "CrossRefSource":
+        from ..cache import build_oa_cache
+        from .unpaywall import UNPAYWALL_API_URL
+
+        return cls(
+            rate_limiter=limiters.for_url(CROSSREF_API_URL),
+            config=(config.get("sources") or {}).get(cls.name) or {},
+            oa_cache=build_oa_cache(config),
+            unpaywall_rate_limiter=limiters.for_url(UNPAYWALL_API_URL),
+        )
 
     def search(
         self,
@@ -32,12 +67,85 @@ class CrossRefSource(BaseSource):
         max_results: int = 50,
         from_year: Optional[int] = None,
     ) -> Iterable[Paper]:
+        papers, _ = self._fetch_page(query, max_results, from_year)
+        yield from papers
+
+    def harvest(
+        self,
+        query: str,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Paper]:
+        """
+        使用 CrossRef 的 cursor 深度翻页（不受 offset 10000 条的限制），产出当前页时预取下一页。
+        """
+        size = min(self.page_size, 1000)
+        yield from self._iter_cursor_pages(
+            lambda cursor: self._fetch_page(query, size, from_year, cursor=cursor),
+            limit=limit,
+            first_cursor="*",
+        )
+
+    def harvest_incremental(
+        self,
+        query: str,
+        mark: Optional[str] = None,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Tuple[Paper, Optional[str]]]:
+        """
+        按索引时间（indexed）升序获取 mark 之后新收录或更新的记录，高水位为最后一条的 indexed 时间。
+
+        from-index-date 过滤只精确到日，当天早于 mark 的记录在本地跳过。
+        """
+        size = min(self.page_size, 1000)
+        filters = [f"from-index-date:{mark[:10]}"] if mark else []
+
+        def _page(cursor: Optional[str]) -> Tuple[List[Tuple[Paper, Optional[str]]], Optional[str]]:
+            items, next_cursor = self._fetch_items(query, size, from_year, cursor, filters=filters, sort="indexed")
+            marks = [(item.get("indexed") or {}).get("date-time") for item in items]
+            return list(zip(self._parse_items(items), marks)), next_cursor
+
+        latest = mark
+        for paper, paper_mark in self._iter_cursor_pages(_page, limit=limit, first_cursor="*"):
+            if mark and paper_mark and paper_mark < mark:
+                continue
+            latest = paper_mark or latest
+            yield paper, latest
+
+    def _fetch_page(
+        self,
+        query: str,
+        rows: int,
+        from_year: Optional[int],
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Paper], Optional[str]]:
+        items, next_cursor = self._fetch_items(query, rows, from_year, cursor)
+        return self._parse_items(items), next_cursor
+
+    def _fetch_items(
+        self,
+        query: str,
+        rows: int,
+        from_year: Optional[int],
+        cursor: Optional[str] = None,
+        filters: Optional[List[str]] = None,
+        sort: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
         params = {
             "query": query,
-            "rows": max_results,
+            "rows": rows,
         }
+        filters = list(filters or [])
         if from_year is not None:
-            params["filter"] = f"from-pub-date:{from_year}-01-01"
+            filters.insert(0, f"from-pub-date:{from_year}-01-01")
+        if filters:
+            params["filter"] = ",".join(filters)
+        if sort is not None:
+            params["sort"] = sort
+            params["order"] = "asc"
+        if cursor is not None:
+            params["cursor"] = cursor
 
         headers = {
             "User-Agent": self.config.get(
@@ -46,15 +154,23 @@ class CrossRefSource(BaseSource):
             )
         }
 
-        if self.rate_limiter:
-            self.rate_limiter.acquire()
-        resp = requests.get(CROSSREF_API_URL, params=params, headers=headers, timeout=30)
+        resp = http_client.get(CROSSREF_API_URL, limiter=self.rate_limiter, params=params, headers=headers, timeout=self.timeout)
         resp.raise_for_status()
-        data = resp.json()
-        items = data.get("message", {}).get("items", [])
-
-        for item in items:
-            yield self._parse_item(item)
+        started = time.perf_counter()
+        message = resp.json().get("message", {})
+        metrics.PARSE_SECONDS.observe(time.perf_counter() - started, self.name)
+        return message.get("items", []), message.get("next-cursor")
+
+    def _parse_items(self, items: List[dict]) -> List[Paper]:
+        papers = [self._parse_item(item) for item in items]
+        if self.unpaywall:
+            if self.unpaywall_mode == "deferred":
+                for paper in papers:
+                    if paper.doi and not paper.extra.get("is_open_access"):
+                        paper.extra["oa_pending"] = True
+            else:
+                enrich_open_access(papers, self.unpaywall, max_workers=self.unpaywall_concurrency)
+        return papers
 
     def _parse_item(self, item: dict) -> Paper:
         doi = item.get("DOI", "")
@@ -114,19 +230,7 @@ class CrossRefSource(BaseSource):
                     # 某些情况下，相似性检查链接可能指向开放获取版本
                     pass
 
-        # 如果 CrossRef 没有检测到开放获取，尝试使用 Unpaywall 检测
-        unpaywall_detected = False
-        if not is_open_access and doi and self.unpaywall:
-            try:
-                unpaywall_result = self.unpaywall.check_open_access(doi)
-                if unpaywall_result and unpaywall_result.get("is_oa"):
-                    is_open_access = True
-                    if unpaywall_result.get("pdf_url") and not pdf_url:
-                        pdf_url = unpaywall_result["pdf_url"]
-                    unpaywall_detected = True
-            except Exception:
-                # Unpaywall 检测失败，继续使用 CrossRef 的结果
-                pass
+        # CrossRef 未检测到开放获取的论文，由 search 中的批量 Unpaywall 阶段补全
 
         extra = {
             "type": item.get("type"),
@@ -134,8 +238,6 @@ class CrossRefSource(BaseSource):
         }
         if pdf_url:
             extra["pdf_url"] = pdf_url
-        if unpaywall_detected:
-            extra["unpaywall_detected"] = True
 
         return Paper(
             id=doi or url or title,
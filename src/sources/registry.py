@@ -0,0 +1,180 @@
+"""
+数据源注册表：按名称查找数据源类，只有被启用的数据源才会导入对应模块。
+
+数据源有三种登记方式：
+- 内置数据源在 _BUILTIN_SOURCES 中按 "模块:类名" 登记，首次使用时才导入；
+- 第三方包通过 entry points 登记（组名 paper_aggregator.sources，值为 "包.模块:类名"），
+  同样在启用时才导入；
+- 任意模块中用 @register_source 装饰数据源类，模块被导入时完成登记
+  （配置的 source_modules 列出启动时需要导入的此类模块）。
+
+名称不区分大小写，可以有别名（如 semanticscholar）。数据源类通过 BaseSource.from_config 创建实例。
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+if TYPE_CHECKING:
+    from .base import BaseSource
+
+
+ENTRY_POINT_GROUP = "paper_aggregator.sources"
+
+
+@dataclass
+class SourceEntry:
+    """
+    一个已登记的数据源。origin 取值：builtin / entry_point / decorator。
+    """
+
+    name: str
+    target: str
+    aliases: Tuple[str, ...] = ()
+    description: str = ""
+    origin: str = "builtin"
+    cls: Optional[Type["BaseSource"]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.cls is not None
+
+    def load(self) -> Type["BaseSource"]:
+        if self.cls is None:
+            module_name, _, attr = self.target.partition(":")
+            module = importlib.import_module(module_name, __package__)
+            self.cls = getattr(module, attr)
+        return self.cls
+
+
+_BUILTIN_SOURCES = (
+    SourceEntry("arxiv", ".arxiv:ArxivSource", description="arXiv 预印本（Atom API）"),
+    SourceEntry(
+        "crossref",
+        ".crossref:CrossRefSource",
+        description="CrossRef 期刊论文元数据，配置邮箱后通过 Unpaywall 检测开放获取",
+    ),
+    SourceEntry(
+        "semantic_scholar",
+        ".semantic_scholar:SemanticScholarSource",
+        aliases=("semanticscholar",),
+        description="Semantic Scholar（建议配置 API Key）",
+    ),
+)
+
+_lock = threading.RLock()
+_entries: Dict[str, SourceEntry] = {}
+_aliases: Dict[str, str] = {}
+_entry_points_loaded = False
+
+
+def _add(entry: SourceEntry, replace: bool = True) -> None:
+    key = entry.name.lower()
+    if not replace and key in _entries:
+        return
+    _entries[key] = entry
+    for alias in entry.aliases:
+        _aliases[alias.lower()] = key
+
+
+for _entry in _BUILTIN_SOURCES:
+    _add(_entry)
+
+
+def register_source(
+    name: Optional[str] = None,
+    aliases: Iterable[str] = (),
+    description: str = "",
+) -> Callable[[Type["BaseSource"]], Type["BaseSource"]]:
+    """
+    类装饰器：登记数据源类，name 为空时使用类属性 name。与已有数据源同名时覆盖之。
+    """
+
+    def decorator(cls: Type["BaseSource"]) -> Type["BaseSource"]:
+        doc = (cls.__doc__ or "").strip().splitlines()
+        entry = SourceEntry(
+            name=name or cls.name,
+            target=f"{cls.__module__}:{cls.__qualname__}",
+            aliases=tuple(aliases),
+            description=description or (doc[0].strip() if doc else ""),
+            origin="decorator",
+            cls=cls,
+        )
+        with _lock:
+            _add(entry)
+        return cls
+
+    return decorator
+
+
+def _discover_entry_points() -> None:
+    """
+    读取已安装包声明的 entry points（只读元数据，不导入插件模块）。内置数据源不会被同名插件覆盖。
+    """
+    global _entry_points_loaded
+    with _lock:
+        if _entry_points_loaded:
+            return
+        _entry_points_loaded = True
+        try:
+            from importlib import metadata
+
+            eps = metadata.entry_points(group=ENTRY_POINT_GROUP)
+        except Exception as e:
+            print(f"[WARN] Failed to read source entry points: {e}")
+            return
+        for ep in eps:
+            dist = getattr(ep, "dist", None)
+            _add(
+                SourceEntry(
+                    name=ep.name,
+                    target=ep.value,
+                    description=f"来自 {dist.name}" if dist is not None else "",
+                    origin="entry_point",
+                ),
+                replace=False,
+            )
+
+
+def resolve(name: str) -> Optional[SourceEntry]:
+    """
+    按名称或别名查找数据源（不导入模块），未登记时返回 None。
+    """
+    _discover_entry_points()
+    key = name.strip().lower()
+    with _lock:
+        return _entries.get(_aliases.get(key, key))
+
+
+def get_source_class(name: str) -> Optional[Type["BaseSource"]]:
+    """
+    返回数据源类，首次调用时导入其模块；未登记时返回 None，模块导入失败时抛出异常。
+    """
+    entry = resolve(name)
+    if entry is None:
+        return None
+    with _lock:
+        return entry.load()
+
+
+def list_sources() -> List[SourceEntry]:
+    """
+    所有已登记的数据源，按名称排序。
+    """
+    _discover_entry_points()
+    with _lock:
+        return sorted(_entries.values(), key=lambda entry: entry.name)
+
+
+def import_source_modules(modules: Iterable[str]) -> None:
+    """
+    导入用 @register_source 登记数据源的模块；导入失败时打印警告并跳过。
+    """
+    for module_name in modules:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"[WARN] Failed to import source module {module_name}: {e}")
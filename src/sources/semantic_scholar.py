@@ -1,21 +1,30 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime
-from typing import Iterable, Optional
-
-import requests
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from .. import http_client, metrics
 from ..models import Paper
-from ..rate_limiter import SimpleRateLimiter
+from ..rate_limiter import RateLimiter
 from .base import BaseSource
 
 
+SEMANTIC_SCHOLAR_API_URL = "https://api.semanticscholar.org/graph/v1"
+
+
 class SemanticScholarSource(BaseSource):
     name = "semantic_scholar"
-
-    def __init__(self, rate_limiter: Optional[SimpleRateLimiter] = None, config: Optional[dict] = None) -> None:
+    # /paper/search 单页最多 100 条，offset + limit 不能超过 1000
+    default_page_size = 100
+    max_offset = 1000
+    # from_year 转换为 year 参数（"2018-"）
+    supported_filters = frozenset({"from_year"})
+    api_url = SEMANTIC_SCHOLAR_API_URL
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None, config: Optional[dict] = None) -> None:
         super().__init__(rate_limiter=rate_limiter, config=config)
-        self.base_url = self.config.get("base_url", "https://api.semanticscholar.org/graph/v1")
+        self.base_url = self.config.get("base_url", SEMANTIC_SCHOLAR_API_URL)
         self.api_key = self.config.get("api_key")
 
     def search(
@@ -28,6 +37,48 @@ class SemanticScholarSource(BaseSource):
         使用 Semantic Scholar 的 /paper/search 接口。
         需要 API Key，且请严格遵守其官方文档的速率限制。
         """
+        yield from self._fetch_page(query, 0, min(max_results, 100), from_year)
+
+    def harvest(
+        self,
+        query: str,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Paper]:
+        """
+        按 offset 分页获取；/paper/search 接口最多只能翻到第 1000 条。
+        """
+        yield from self._iter_offset_pages(
+            lambda offset, size: self._fetch_page(query, offset, size, from_year),
+            limit=limit,
+            page_size=min(self.page_size, 100),
+            max_offset=self.max_offset,
+        )
+
+    def harvest_incremental(
+        self,
+        query: str,
+        mark: Optional[str] = None,
+        limit: int = 1000,
+        from_year: Optional[int] = None,
+    ) -> Iterator[Tuple[Paper, Optional[str]]]:
+        """
+        /paper/search 不支持按时间排序，高水位为已获取的结果偏移量，下次从该偏移继续翻页，
+        直到接口的 1000 条上限。结果按相关度排序，上游排序变化时可能漏取或重复（重复由 upsert 去重）。
+        """
+        start = int(mark or 0)
+        limit = min(limit, self.max_offset - start)
+        if limit <= 0:
+            return
+        papers = self._iter_offset_pages(
+            lambda offset, size: self._fetch_page(query, start + offset, size, from_year),
+            limit=limit,
+            page_size=min(self.page_size, 100),
+        )
+        for offset, paper in enumerate(papers, start=start + 1):
+            yield paper, str(offset)
+
+    def _fetch_page(self, query: str, offset: int, limit: int, from_year: Optional[int]) -> List[Paper]:
         if not self.api_key:
             raise RuntimeError("Semantic Scholar API Key 未配置，请在 config.yml 中设置 sources.semantic_scholar.api_key")
 
@@ -38,21 +89,20 @@ class SemanticScholarSource(BaseSource):
 
         params = {
             "query": query,
-            "limit": min(max_results, 100),
+            "offset": offset,
+            "limit": limit,
             "fields": "title,abstract,authors,year,externalIds,url,journal",
         }
         if from_year is not None:
             params["year"] = f"{from_year}-"
 
-        if self.rate_limiter:
-            self.rate_limiter.acquire()
-        resp = requests.get(url, headers=headers, params=params, timeout=30)
+        resp = http_client.get(url, limiter=self.rate_limiter, headers=headers, params=params, timeout=self.timeout)
         resp.raise_for_status()
+        started = time.perf_counter()
         data = resp.json()
-        papers = data.get("data", [])
-
-        for item in papers:
-            yield self._parse_item(item)
+        papers = [self._parse_item(item) for item in data.get("data", [])]
+        metrics.PARSE_SECONDS.observe(time.perf_counter() - started, self.name)
+        return papers
 
     def _parse_item(self, item: dict) -> Paper:
         paper_id = item.get("paperId") or item.get("url") or ""
@@ -12,23 +12,44 @@ API 文档：https://unpaywall.org/products/api
 
 from __future__ import annotations
 
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 import requests
 
-from ..rate_limiter import SimpleRateLimiter
+from .. import http_client
+from ..models import Paper
+from ..rate_limiter import RateLimiter
+
+if TYPE_CHECKING:
+    from ..cache import OAStatusCache
 
 
 UNPAYWALL_API_URL = "https://api.unpaywall.org/v2"
 
 
+def normalize_doi(doi: Optional[str]) -> str:
+    """
+    清理 DOI（移除 https://doi.org/ 等前缀）并转为小写，作为去重和缓存的键。
+    """
+    if not doi:
+        return ""
+    clean = doi.strip()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:"):
+        if clean.lower().startswith(prefix):
+            clean = clean[len(prefix):]
+            break
+    return clean.strip().lower()
+
+
 class UnpaywallClient:
     """Unpaywall API 客户端，用于检测开放获取论文"""
 
     def __init__(
         self,
         email: str = "your-email@example.com",
-        rate_limiter: Optional[SimpleRateLimiter] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        cache: Optional["OAStatusCache"] = None,
     ):
         """
         初始化 Unpaywall 客户端
@@ -36,9 +57,11 @@ class UnpaywallClient:
         Args:
             email: 有效的邮箱地址（用于 API 使用统计，建议使用真实邮箱）
             rate_limiter: 可选的速率限制器
+            cache: 可选的 DOI 开放获取状态缓存，命中时不再请求 Unpaywall
         """
         self.email = email
         self.rate_limiter = rate_limiter
+        self.cache = cache
 
     def check_open_access(self, doi: str) -> Optional[dict]:
         """
@@ -54,29 +77,40 @@ class UnpaywallClient:
             - oa_locations: list，所有开放获取位置列表
             如果未找到或出错，返回 None
         """
-        if not doi:
-            return None
-
         # 清理 DOI（移除 https://doi.org/ 前缀）
-        clean_doi = doi.replace("https://doi.org/", "").replace("http://dx.doi.org/", "").strip()
+        clean_doi = normalize_doi(doi)
 
         if not clean_doi:
             return None
 
+        if self.cache is not None:
+            hit, cached = self.cache.get(clean_doi)
+            if hit:
+                return cached
+
+        ok, result = self._fetch(clean_doi)
+        if ok and self.cache is not None:
+            self.cache.put(clean_doi, result)
+        return result
+
+    def _fetch(self, clean_doi: str) -> Tuple[bool, Optional[dict]]:
+        """
+        请求 Unpaywall，返回 (是否得到确定结果, 结果)。请求失败时第一项为 False，不写入缓存。
+        """
         url = f"{UNPAYWALL_API_URL}/{clean_doi}"
         params = {"email": self.email}
 
         try:
-            if self.rate_limiter:
-                self.rate_limiter.acquire()
-
-            resp = requests.get(url, params=params, timeout=10)
+            resp = http_client.get(url, limiter=self.rate_limiter, params=params, timeout=http_client.timeout(10))
+            if resp.status_code == 404:
+                # Unpaywall 未收录该 DOI，视为非开放获取
+                return True, None
             resp.raise_for_status()
             data = resp.json()
 
             # 检查是否为开放获取
             if not data.get("is_oa", False):
-                return None
+                return True, None
 
             # 获取最佳 PDF 链接
             best_location = data.get("best_oa_location")
@@ -87,7 +121,7 @@ class UnpaywallClient:
                 # 如果没有专门的 PDF URL，使用通用 URL
                 pdf_url = best_location["url"]
 
-            return {
+            return True, {
                 "is_oa": True,
                 "pdf_url": pdf_url,
                 "best_oa_location": best_location,
@@ -97,9 +131,56 @@ class UnpaywallClient:
             }
         except requests.exceptions.RequestException:
             # API 调用失败，静默返回 None
-            return None
+            return False, None
         except Exception:
-            return None
+            return False, None
+
+    def check_open_access_many(self, dois: Iterable[str], max_workers: int = 8) -> Dict[str, Optional[dict]]:
+        """
+        批量检查多个 DOI 的开放获取状态
+
+        DOI 先规范化去重并批量查询缓存，未命中的再在有界线程池中并发请求（仍受 rate_limiter 约束），
+        得到的确定结果批量写回缓存。
+
+        Args:
+            dois: DOI 列表，可包含重复或带前缀的 DOI
+            max_workers: 最大并发请求数
+
+        Returns:
+            以规范化 DOI（见 normalize_doi）为键的字典，值与 check_open_access 的返回值相同
+        """
+        unique: List[str] = []
+        seen = set()
+        for doi in dois:
+            key = normalize_doi(doi)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(key)
+
+        if not unique:
+            return {}
+
+        results: Dict[str, Optional[dict]] = {}
+        if self.cache is not None:
+            results.update(self.cache.get_many(unique))
+        missing = [doi for doi in unique if doi not in results]
+        if not missing:
+            return results
+
+        if len(missing) == 1 or max_workers <= 1:
+            fetched = [self._fetch(doi) for doi in missing]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(missing)), thread_name_prefix="unpaywall") as pool:
+                fetched = list(pool.map(self._fetch, missing))
+
+        resolved: Dict[str, Optional[dict]] = {}
+        for doi, (ok, result) in zip(missing, fetched):
+            results[doi] = result
+            if ok:
+                resolved[doi] = result
+        if self.cache is not None:
+            self.cache.put_many(resolved)
+        return results
 
     def get_pdf_url(self, doi: str) -> Optional[str]:
         """
@@ -117,6 +198,26 @@ class UnpaywallClient:
         return None
 
 
-
-
-
+def apply_open_access(paper: Paper, result: Optional[dict]) -> None:
+    """
+    将 Unpaywall 查询结果写入论文的 extra 字段（is_open_access / pdf_url / unpaywall_detected）。
+    """
+    paper.extra.pop("oa_pending", None)
+    if not result or not result.get("is_oa"):
+        return
+    paper.extra["is_open_access"] = True
+    paper.extra["unpaywall_detected"] = True
+    if result.get("pdf_url") and not paper.extra.get("pdf_url"):
+        paper.extra["pdf_url"] = result["pdf_url"]
+
+
+def enrich_open_access(papers: Iterable[Paper], client: UnpaywallClient, max_workers: int = 8) -> None:
+    """
+    开放获取补全阶段：收集尚未确认开放获取、带 DOI 的论文，批量查询 Unpaywall 后就地更新。
+    """
+    targets = [p for p in papers if p.doi and not p.extra.get("is_open_access")]
+    if not targets:
+        return
+    results = client.check_open_access_many([p.doi for p in targets], max_workers=max_workers)
+    for paper in targets:
+        apply_open_access(paper, results.get(normalize_doi(paper.doi)))
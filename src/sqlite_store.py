@@ -0,0 +1,464 @@
+"""
+SQLite 论文库。
+
+- 以去重键（DOI，或 标题 + 首位作者 + 年份，见 Paper.dedup_key）为主键批量 upsert，
+  内容未变化的记录直接跳过，重复运行同一查询只需写入增量；
+- 作者、extra 分别存放在 paper_authors / paper_extra 表中，便于按作者或 extra 字段查询；
+- DOI / 年份 / 来源建有索引；
+- 标题、摘要、作者建有 FTS5 全文索引（BM25 排序），随 upsert 增量更新，供本地检索使用；
+  索引为外部内容表（内容取自 papers_fts_content 视图），按 papers.rowid 关联，不重复保存文本；
+- 使用 WAL 模式，写入时不阻塞其他进程读取。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import Paper
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    key TEXT PRIMARY KEY,
+    id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    abstract TEXT,
+    published_at TEXT,
+    year INTEGER,
+    source TEXT NOT NULL,
+    url TEXT,
+    doi TEXT,
+    journal TEXT,
+    content_hash TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers(doi);
+CREATE INDEX IF NOT EXISTS idx_papers_year ON papers(year);
+CREATE INDEX IF NOT EXISTS idx_papers_source ON papers(source);
+
+CREATE TABLE IF NOT EXISTS paper_authors (
+    paper_key TEXT NOT NULL REFERENCES papers(key) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (paper_key, position)
+);
+CREATE INDEX IF NOT EXISTS idx_paper_authors_name ON paper_authors(name);
+
+CREATE TABLE IF NOT EXISTS paper_extra (
+    paper_key TEXT NOT NULL REFERENCES papers(key) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (paper_key, name)
+);
+"""
+
+# 全文索引的内容视图：作者按顺序拼接为一列。写入与删除索引都从该视图取值，
+# 外部内容表删除时提交的旧内容因此与写入时完全一致。逐条执行（视图中的 '; ' 不便按分号拆分）
+FTS_SCHEMA = (
+    """
+CREATE VIEW IF NOT EXISTS papers_fts_content AS
+SELECT p.rowid AS rid,
+       p.key AS key,
+       p.title AS title,
+       COALESCE(p.abstract, '') AS abstract,
+       COALESCE(
+           (SELECT group_concat(name, '; ')
+            FROM (SELECT name FROM paper_authors a WHERE a.paper_key = p.key ORDER BY a.position)),
+           ''
+       ) AS authors
+FROM papers p
+""",
+    """
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+    title,
+    abstract,
+    authors,
+    content = 'papers_fts_content',
+    content_rowid = 'rid',
+    tokenize = 'porter unicode61 remove_diacritics 2'
+)
+""",
+)
+
+# bm25 各列权重：标题命中权重最高，其次作者
+_FTS_WEIGHTS = (10.0, 1.0, 3.0)
+
+_shared_lock = threading.Lock()
+_shared_stores: Dict[str, "SQLitePaperStore"] = {}
+
+
+class SQLitePaperStore:
+    """
+    论文库，线程安全（内部串行化写入）。
+
+    参数:
+        path: SQLite 文件路径
+        batch_size: 每个事务写入的最大条数
+    """
+
+    def __init__(self, path: str, batch_size: int = 500) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, int(batch_size))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False)
+        _enable_wal(self._conn)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        if not self._fts_ready():
+            self._migrate_fts()
+
+    def _fts_ready(self) -> bool:
+        fts = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'papers_fts'"
+        ).fetchone()
+        return fts is not None and "papers_fts_content" in fts[0]
+
+    def _migrate_fts(self) -> None:
+        """
+        建立（或按新结构重建）全文索引。
+
+        多个 uvicorn worker 可能同时首次打开同一个库：检查、删除旧表、建表与重建索引在同一个
+        BEGIN IMMEDIATE 事务中进行，取得写锁后重新检查，已由其他进程完成时直接返回。
+        """
+        # executescript 会先提交当前事务，这里逐条执行以保持在同一事务内
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._fts_ready():
+                # 旧版本创建的库没有全文索引，或索引自带内容并按 key 列关联
+                self._conn.execute("DROP TABLE IF EXISTS papers_fts")
+                for statement in FTS_SCHEMA:
+                    self._conn.execute(statement)
+                self._conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def upsert(self, papers: Iterable[Paper]) -> Dict[str, int]:
+        """
+        批量写入论文，返回 {"inserted": 新增, "updated": 内容变化, "unchanged": 跳过}。
+        papers 可以是生成器，按 batch_size 分批提交。
+        """
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+        batch: List[Paper] = []
+        for paper in papers:
+            batch.append(paper)
+            if len(batch) >= self.batch_size:
+                self._upsert_batch(batch, stats)
+                batch = []
+        if batch:
+            self._upsert_batch(batch, stats)
+        return stats
+
+    def get(self, key: str) -> Optional[Paper]:
+        """
+        按去重键读取单篇论文。
+        """
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_PAPER_COLUMNS} FROM papers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            return self._load([row])[0]
+
+    def get_by_doi(self, doi: str) -> Optional[Paper]:
+        return self.get(f"doi:{doi.lower()}")
+
+    def iter_papers(
+        self,
+        source: Optional[str] = None,
+        from_year: Optional[int] = None,
+        chunk_size: int = 1000,
+    ) -> Iterator[Paper]:
+        """
+        按条件遍历论文库（按主键分块读取，内存占用与库大小无关）。
+        """
+        conditions = []
+        params: List = []
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if from_year is not None:
+            conditions.append("year >= ?")
+            params.append(from_year)
+
+        last_key = ""
+        while True:
+            where = " AND ".join(conditions + ["key > ?"])
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT {_PAPER_COLUMNS} FROM papers WHERE {where} ORDER BY key LIMIT ?",
+                    (*params, last_key, chunk_size),
+                ).fetchall()
+                papers = self._load(rows)
+            if not rows:
+                return
+            yield from papers
+            last_key = rows[-1][0]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 30,
+        from_year: Optional[int] = None,
+        sources: Optional[List[str]] = None,
+        title: Optional[str] = None,
+    ) -> List[Paper]:
+        """
+        在本地全文索引中检索，按 BM25 相关度排序。
+
+        query 中的词需全部出现在标题 / 摘要 / 作者中（英文按词干匹配）；
+        title 不为空时，还要求标题中包含该短语。
+        """
+        match = _fts_query(query)
+        title_match = _fts_query(title, phrase=True) if title and title.strip() else ""
+        if title_match:
+            title_match = "title : " + title_match
+            match = f"{match} AND {title_match}" if match else title_match
+        if not match:
+            return []
+
+        conditions = ["papers_fts MATCH ?"]
+        params: List = [match]
+        if from_year is not None:
+            conditions.append("p.year >= ?")
+            params.append(from_year)
+        if sources:
+            conditions.append(f"p.source IN ({','.join('?' * len(sources))})")
+            params.extend(sources)
+
+        weights = ", ".join(str(w) for w in _FTS_WEIGHTS)
+        columns = ", ".join(f"p.{c.strip()}" for c in _PAPER_COLUMNS.split(","))
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT {columns}
+                FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid
+                WHERE {" AND ".join(conditions)}
+                ORDER BY bm25(papers_fts, {weights})
+                LIMIT ?
+                """,
+                (*params, max(0, int(limit))),
+            ).fetchall()
+            return self._load(rows)
+
+    def rebuild_fts(self) -> None:
+        """
+        按 papers 的当前内容重建全文索引。
+
+        索引按 papers.rowid 关联，而 papers 没有 INTEGER PRIMARY KEY，VACUUM 可能重新编排 rowid，
+        对库执行 VACUUM 后应调用此方法。
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _upsert_batch(self, papers: List[Paper], stats: Dict[str, int]) -> None:
+        # 同一批次内重复的论文只保留最后一条
+        rows: Dict[str, Tuple[Paper, str]] = {}
+        for paper in papers:
+            rows[paper.dedup_key()] = (paper, _content_hash(paper))
+
+        now = time.time()
+        with self._lock:
+            existing: Dict[str, str] = {}
+            keys = list(rows)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                existing.update(
+                    self._conn.execute(
+                        f"SELECT key, content_hash FROM papers WHERE key IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                )
+
+            changed: List[Tuple[str, Paper, str]] = []
+            for key, (paper, digest) in rows.items():
+                if key not in existing:
+                    stats["inserted"] += 1
+                elif existing[key] != digest:
+                    stats["updated"] += 1
+                else:
+                    stats["unchanged"] += 1
+                    continue
+                changed.append((key, paper, digest))
+
+            if not changed:
+                return
+
+            # 只有已存在的记录需要先清除旧的索引、作者与 extra，新插入的记录直接写入
+            updated_keys = [(key,) for key, _, _ in changed if key in existing]
+            with self._conn:
+                if updated_keys:
+                    # 外部内容表按旧内容删除索引项，须在更新 papers / paper_authors 之前执行
+                    self._conn.executemany(
+                        """
+                        INSERT INTO papers_fts (papers_fts, rowid, title, abstract, authors)
+                        SELECT 'delete', rid, title, abstract, authors FROM papers_fts_content WHERE key = ?
+                        """,
+                        updated_keys,
+                    )
+                self._conn.executemany(
+                    """
+                    INSERT INTO papers (key, id, title, abstract, published_at, year, source, url, doi, journal,
+                                        content_hash, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        id = excluded.id,
+                        title = excluded.title,
+                        abstract = excluded.abstract,
+                        published_at = excluded.published_at,
+                        year = excluded.year,
+                        source = excluded.source,
+                        url = excluded.url,
+                        doi = excluded.doi,
+                        journal = excluded.journal,
+                        content_hash = excluded.content_hash,
+                        updated_at = excluded.updated_at
+                    """,
+                    [
+                        (
+                            key,
+                            p.id,
+                            p.title,
+                            p.abstract,
+                            p.published_at.isoformat() if p.published_at else None,
+                            p.published_at.year if p.published_at else None,
+                            p.source,
+                            p.url,
+                            p.doi,
+                            p.journal,
+                            digest,
+                            now,
+                            now,
+                        )
+                        for key, p, digest in changed
+                    ],
+                )
+                self._conn.executemany("DELETE FROM paper_authors WHERE paper_key = ?", updated_keys)
+                self._conn.executemany("DELETE FROM paper_extra WHERE paper_key = ?", updated_keys)
+                self._conn.executemany(
+                    "INSERT INTO paper_authors (paper_key, position, name) VALUES (?, ?, ?)",
+                    [(key, pos, name) for key, p, _ in changed for pos, name in enumerate(p.authors)],
+                )
+                self._conn.executemany(
+                    "INSERT INTO paper_extra (paper_key, name, value) VALUES (?, ?, ?)",
+                    [
+                        (key, name, json.dumps(value, ensure_ascii=False))
+                        for key, p, _ in changed
+                        for name, value in p.extra.items()
+                    ],
+                )
+                # 作者写入后再从内容视图取值建立索引（ON CONFLICT DO UPDATE 不改变 rowid）
+                self._conn.executemany(
+                    """
+                    INSERT INTO papers_fts (rowid, title, abstract, authors)
+                    SELECT rid, title, abstract, authors FROM papers_fts_content WHERE key = ?
+                    """,
+                    [(key,) for key, _, _ in changed],
+                )
+
+    def _load(self, rows: List[tuple]) -> List[Paper]:
+        # 调用方需持有 self._lock
+        if not rows:
+            return []
+        keys = [row[0] for row in rows]
+        placeholders = ",".join("?" * len(keys))
+        authors: Dict[str, List[str]] = {}
+        for key, name in self._conn.execute(
+            f"SELECT paper_key, name FROM paper_authors WHERE paper_key IN ({placeholders}) ORDER BY paper_key, position",
+            keys,
+        ):
+            authors.setdefault(key, []).append(name)
+        extras: Dict[str, dict] = {}
+        for key, name, value in self._conn.execute(
+            f"SELECT paper_key, name, value FROM paper_extra WHERE paper_key IN ({placeholders})",
+            keys,
+        ):
+            extras.setdefault(key, {})[name] = json.loads(value) if value is not None else None
+
+        papers = []
+        for key, pid, title, abstract, published_at, source, url, doi, journal in rows:
+            papers.append(
+                Paper(
+                    id=pid,
+                    title=title,
+                    abstract=abstract,
+                    authors=authors.get(key, []),
+                    published_at=datetime.fromisoformat(published_at) if published_at else None,
+                    source=source,
+                    url=url,
+                    doi=doi,
+                    journal=journal,
+                    extra=extras.get(key, {}),
+                )
+            )
+        return papers
+
+
+_PAPER_COLUMNS = "key, id, title, abstract, published_at, source, url, doi, journal"
+
+
+def _enable_wal(conn: sqlite3.Connection, attempts: int = 50) -> None:
+    # 多个进程同时首次打开新库时，切换 WAL 可能直接返回 "database is locked"（不经过 busy timeout），稍后重试
+    for attempt in range(attempts):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e) or attempt == attempts - 1:
+                raise
+            time.sleep(0.1)
+
+
+def _content_hash(paper: Paper) -> str:
+    payload = json.dumps(paper.to_dict(), ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _fts_query(text: Optional[str], phrase: bool = False) -> str:
+    # 只取出词语并逐个加引号，避免用户输入中的 AND / OR / 引号 / 冒号被当作 FTS5 语法
+    terms = re.findall(r"\w+", text or "")
+    if not terms:
+        return ""
+    if phrase:
+        return '"' + " ".join(terms) + '"'
+    return " ".join(f'"{t}"' for t in terms)
+
+
+def build_paper_store(config: Dict) -> Optional[SQLitePaperStore]:
+    """
+    根据配置的 local_index 节点返回进程内共享的论文库；未启用时返回 None。
+
+    Web 端检索到的结果会写入该库，/search?local=1 直接从其全文索引中返回结果。
+    """
+    index_cfg = config.get("local_index", {}) or {}
+    if not index_cfg.get("enabled", True):
+        return None
+
+    path = str(index_cfg.get("path") or "data/papers.sqlite3")
+    with _shared_lock:
+        store = _shared_stores.get(path)
+        if store is None:
+            store = SQLitePaperStore(path)
+            _shared_stores[path] = store
+        return store
@@ -1,25 +1,60 @@
+import csv
+import io
+import json
 from pathlib import Path
-from typing import Iterable, Literal
+from typing import Iterable, Iterator, List, Literal, Sequence, Tuple
 
 from .models import Paper
 
 
+# CSV 使用固定表头，extra 整体序列化为一列 JSON，逐行写出时无需预知所有字段
+CSV_FIELDS: List[str] = [
+    "id",
+    "title",
+    "abstract",
+    "authors",
+    "published_at",
+    "source",
+    "url",
+    "doi",
+    "journal",
+    "extra",
+]
+
+# Web 端 /download 导出的 CSV 列：面向阅读，作者以逗号分隔、发表时间只保留年份
+EXPORT_CSV_FIELDS: List[str] = ["title", "authors", "year", "source", "doi", "url", "journal", "abstract"]
+
+
 def save_papers(
     papers: Iterable[Paper],
-    backend: Literal["csv", "json"] = "csv",
+    backend: Literal["csv", "json", "jsonl", "sqlite", "columnar", "parquet"] = "csv",
     output_path: str = "data/results.csv",
-) -> None:
+) -> int:
     """
-    将论文列表保存到本地文件。
-    目前支持 csv / json，后续可扩展为 sqlite。
+    将论文保存到本地文件，返回写入条数。
+    支持 csv / json / jsonl，均为逐条流式写出，papers 可以是生成器，不会整体加载到内存。
+    sqlite 为增量写入（按去重键 upsert，不覆盖已有数据），返回新增与更新的条数之和。
+    columnar（无依赖的分块二进制列式文件）/ parquet（需要 pyarrow）使用固定 schema，按块写出，见 columnar 模块。
     """
     path = Path(output_path)
     path.parent.mkdir(parents=True, exist_ok=True)
 
     if backend == "csv":
-        _save_csv(papers, path)
+        return _save_csv(papers, path)
     elif backend == "json":
-        _save_json(papers, path)
+        return _save_json(papers, path)
+    elif backend == "jsonl":
+        return _save_jsonl(papers, path)
+    elif backend == "sqlite":
+        return _save_sqlite(papers, path)
+    elif backend == "columnar":
+        from .columnar import write_columnar
+
+        return write_columnar(papers, path)
+    elif backend == "parquet":
+        from .columnar import write_parquet
+
+        return write_parquet(papers, path)
     else:
         raise ValueError(f"Unsupported backend: {backend}")
 
@@ -39,25 +74,126 @@ def _paper_to_dict(p: Paper) -> dict:
     }
 
 
-def _save_csv(papers: Iterable[Paper], path: Path) -> None:
-    import csv
+def _paper_to_csv_row(p: Paper) -> dict:
+    row = _paper_to_dict(p)
+    for key in [k for k in row if k.startswith("extra_")]:
+        del row[key]
+    row["extra"] = json.dumps(p.extra, ensure_ascii=False) if p.extra else ""
+    return row
+
+
+def paper_to_export_row(p: Paper) -> dict:
+    """
+    转为 EXPORT_CSV_FIELDS 格式的一行。
+    """
+    return {
+        "title": p.title,
+        "authors": ", ".join(p.authors),
+        "year": p.published_at.year if p.published_at else "",
+        "source": p.source,
+        "doi": p.doi or "",
+        "url": p.url or "",
+        "journal": p.journal or "",
+        "abstract": (p.abstract or "").replace("\n", " "),
+    }
+
+
+def csv_writer(fieldnames: Sequence[str]) -> Tuple[io.StringIO, csv.DictWriter]:
+    """
+    返回写入内存缓冲区的 DictWriter；每写出一批行后用 drain 取出文本并清空缓冲区。
+    """
+    buf = io.StringIO(newline="")
+    return buf, csv.DictWriter(buf, fieldnames=list(fieldnames), extrasaction="ignore")
 
-    rows = [_paper_to_dict(p) for p in papers]
-    if not rows:
-        return
 
-    fieldnames = sorted(rows[0].keys())
+def iter_csv(rows: Iterable[dict], fieldnames: Sequence[str]) -> Iterator[str]:
+    """
+    逐行生成 CSV 文本（首个元素为表头），可直接写入文件或作为 HTTP 流式响应体。
+    """
+    buf, writer = csv_writer(fieldnames)
+    writer.writeheader()
+    yield drain(buf)
+    for row in rows:
+        writer.writerow(row)
+        yield drain(buf)
+
+
+def iter_jsonl(rows: Iterable[dict]) -> Iterator[str]:
+    """
+    逐行生成 JSON Lines 文本。
+    """
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def iter_json_array(rows: Iterable[dict]) -> Iterator[str]:
+    """
+    增量生成 JSON 数组文本：逐个元素输出，不需要先把整个列表放进内存。
+    """
+    yield "["
+    first = True
+    for row in rows:
+        body = json.dumps(row, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        yield ("\n  " if first else ",\n  ") + body
+        first = False
+    yield "\n]\n" if not first else "]\n"
+
+
+def drain(buf: io.StringIO) -> str:
+    """
+    取出缓冲区中已写入的文本并清空，缓冲区可继续写入。
+    """
+    text = buf.getvalue()
+    buf.seek(0)
+    buf.truncate(0)
+    return text
+
+
+def _write_chunks(chunks: Iterable[str], path: Path) -> None:
     with path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(rows)
+        for chunk in chunks:
+            f.write(chunk)
+
+
+class _Counter:
+    """
+    统计经过的元素个数，用于在流式写出的同时得到写入条数。
+    """
+
+    def __init__(self, items: Iterable) -> None:
+        self.items = items
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.items:
+            self.count += 1
+            yield item
+
+
+def _save_csv(papers: Iterable[Paper], path: Path) -> int:
+    counter = _Counter(papers)
+    _write_chunks(iter_csv((_paper_to_csv_row(p) for p in counter), CSV_FIELDS), path)
+    return counter.count
+
+
+def _save_json(papers: Iterable[Paper], path: Path) -> int:
+    counter = _Counter(papers)
+    _write_chunks(iter_json_array(_paper_to_dict(p) for p in counter), path)
+    return counter.count
 
 
-def _save_json(papers: Iterable[Paper], path: Path) -> None:
-    import json
+def _save_jsonl(papers: Iterable[Paper], path: Path) -> int:
+    counter = _Counter(papers)
+    _write_chunks(iter_jsonl(_paper_to_dict(p) for p in counter), path)
+    return counter.count
 
-    rows = [_paper_to_dict(p) for p in papers]
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(rows, f, ensure_ascii=False, indent=2)
 
+def _save_sqlite(papers: Iterable[Paper], path: Path) -> int:
+    from .sqlite_store import SQLitePaperStore
 
+    store = SQLitePaperStore(str(path))
+    try:
+        stats = store.upsert(papers)
+    finally:
+        store.close()
+    return stats["inserted"] + stats["updated"]
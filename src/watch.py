@@ -0,0 +1,204 @@
+"""
+监视查询（watch query）：定期重复执行的检索只获取上次运行之后的新论文。
+
+- 每个监视查询按 (查询词, 起始年份) 标识，可在配置的 watches 节点中命名保存；
+- 每个数据源单独保存高水位（BaseSource.harvest_incremental 产出）：
+  arXiv 为最后一篇的提交时间，CrossRef 为最后一条的索引时间，Semantic Scholar 为结果偏移量；
+- 新记录增量写入 SQLite 论文库（sqlite_store），高水位与论文保存在同一数据库文件中，
+  每批论文写入后才推进高水位，运行中断时下次从已保存的位置继续。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .dedup import Deduplicator
+from .sources.base import BaseSource
+from .sqlite_store import SQLitePaperStore
+
+
+@dataclass
+class WatchQuery:
+    """
+    一个监视查询。sources 为空时使用配置中启用的全部数据源。
+    """
+
+    name: str
+    query: str
+    from_year: Optional[int] = None
+    sources: List[str] = field(default_factory=list)
+
+    @property
+    def key(self) -> str:
+        # 高水位只与查询条件有关，改名不影响已保存的进度
+        normalized = " ".join(self.query.lower().split())
+        return f"{normalized}|{self.from_year if self.from_year is not None else ''}"
+
+
+class WatchStore:
+    """
+    各监视查询、各数据源的高水位（SQLite），线程安全。
+
+    参数:
+        path: SQLite 文件路径，通常与论文库相同
+    """
+
+    def __init__(self, path: str) -> None:
+        db_path = Path(path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=30.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS watches (
+                key TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                query TEXT NOT NULL,
+                from_year INTEGER,
+                last_run_at REAL,
+                last_stats TEXT
+            );
+            CREATE TABLE IF NOT EXISTS watch_marks (
+                watch_key TEXT NOT NULL,
+                source TEXT NOT NULL,
+                mark TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (watch_key, source)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def marks(self, watch: WatchQuery) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source, mark FROM watch_marks WHERE watch_key = ?",
+                (watch.key,),
+            ).fetchall()
+        return dict(rows)
+
+    def set_mark(self, watch: WatchQuery, source: str, mark: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watch_marks (watch_key, source, mark, updated_at) VALUES (?, ?, ?, ?)",
+                (watch.key, source, mark, time.time()),
+            )
+
+    def record_run(self, watch: WatchQuery, stats: Dict[str, Dict]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO watches (key, name, query, from_year, last_run_at, last_stats)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    name = excluded.name, last_run_at = excluded.last_run_at, last_stats = excluded.last_stats
+                """,
+                (watch.key, watch.name, watch.query, watch.from_year, time.time(), json.dumps(stats, ensure_ascii=False)),
+            )
+
+    def reset(self, watch: WatchQuery) -> None:
+        """
+        清除高水位，下次运行重新完整获取。
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM watch_marks WHERE watch_key = ?", (watch.key,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def run_incremental(
+    watch: WatchQuery,
+    sources: Sequence[BaseSource],
+    store: SQLitePaperStore,
+    marks: WatchStore,
+    limit: int = 1000,
+    fuzzy_dedup: bool = True,
+    batch_size: int = 500,
+) -> Dict[str, Dict]:
+    """
+    对每个数据源执行一次增量检索并写入论文库，返回各数据源的统计：
+    fetched（获取条数）、inserted / updated（写入论文库的新增 / 更新条数）、mark（新的高水位）。
+
+    同一次运行内跨数据源的重复记录只写入首次出现的一条（与 aggregate_harvest 一致）；
+    某个源失败时打印警告并继续下一个源，已写入部分的高水位保留。
+    """
+    saved = marks.marks(watch)
+    dedup = Deduplicator(fuzzy=fuzzy_dedup)
+    stats: Dict[str, Dict] = {}
+
+    for src in sources:
+        mark = saved.get(src.name)
+        result = {"fetched": 0, "inserted": 0, "updated": 0, "mark": mark}
+        stats[src.name] = result
+        batch = []
+        pending_mark = mark
+        # 数据源不能下推 from_year 时在本地过滤，被过滤的记录同样推进高水位
+        keep = _year_predicate(src, watch.from_year)
+
+        def _flush() -> None:
+            if batch:
+                counts = store.upsert(batch)
+                result["inserted"] += counts["inserted"]
+                result["updated"] += counts["updated"]
+                batch.clear()
+            if pending_mark and pending_mark != result["mark"]:
+                marks.set_mark(watch, src.name, pending_mark)
+                result["mark"] = pending_mark
+
+        try:
+            for paper, paper_mark in src.harvest_incremental(
+                query=watch.query,
+                mark=mark,
+                limit=limit,
+                from_year=watch.from_year,
+            ):
+                result["fetched"] += 1
+                pending_mark = paper_mark or pending_mark
+                if not keep(paper):
+                    continue
+                if dedup.add(paper) is None:
+                    batch.append(paper)
+                if len(batch) >= batch_size:
+                    _flush()
+            _flush()
+        except Exception as e:
+            _flush()
+            result["error"] = str(e)
+            print(f"[WARN] Source {src.name} failed: {e}")
+
+    marks.record_run(watch, stats)
+    return stats
+
+
+def _year_predicate(src: BaseSource, from_year: Optional[int]):
+    if from_year is None or "from_year" in src.supported_filters:
+        return lambda paper: True
+    return lambda paper: paper.published_at is not None and paper.published_at.year >= from_year
+
+
+def configured_watches(config: Dict) -> List[WatchQuery]:
+    """
+    读取配置的 watches 节点；未配置时以顶层 query / from_year 作为唯一的监视查询。
+    """
+    watches = []
+    for idx, item in enumerate(config.get("watches") or []):
+        watches.append(
+            WatchQuery(
+                name=str(item.get("name") or f"watch-{idx + 1}"),
+                query=str(item["query"]),
+                from_year=item.get("from_year"),
+                sources=list(item.get("sources") or []),
+            )
+        )
+    if not watches and config.get("query"):
+        watches.append(WatchQuery(name="default", query=str(config["query"]), from_year=config.get("from_year")))
+    return watches
@@ -0,0 +1,224 @@
+"""
+JSON 检索接口（供其他服务调用）。
+
+POST /api/search 执行一次聚合检索并把完整结果保存为快照（见 cache.ResultSnapshotStore），返回第一页；
+之后用响应中的 next_cursor 调用 GET /api/search?cursor=... 翻页，只读取快照，不再请求上游数据源。
+快照内容不可变，每页带 ETag，客户端携带 If-None-Match 重复请求同一页时返回 304。
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+
+from ..aggregator import aaggregate_search_detailed
+from ..models import Paper
+from .context import AppState, app_state
+
+
+router = APIRouter(prefix="/api", tags=["api"])
+
+
+class SearchRequest(BaseModel):
+    query: str = Field(..., min_length=1)
+    sources: Optional[List[str]] = Field(None, description="数据源名称，默认使用配置中的 enabled_sources")
+    from_year: Optional[int] = None
+    title_filter: Optional[str] = Field(None, description="题目包含的文字（忽略大小写）")
+    max_results: int = Field(30, ge=1, le=200, description="每个数据源最多返回的条数")
+    page_size: int = Field(20, ge=1, le=200)
+    local: bool = Field(False, description="只检索本地论文库，不访问远程数据源")
+
+
+class PaperModel(BaseModel):
+    id: str
+    title: str
+    abstract: Optional[str] = None
+    authors: List[str] = []
+    published_at: Optional[datetime] = None
+    source: str
+    url: Optional[str] = None
+    doi: Optional[str] = None
+    journal: Optional[str] = None
+    extra: Dict[str, Any] = {}
+
+
+class SourceStatusModel(BaseModel):
+    name: str
+    state: str
+    count: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    cached: bool = False
+
+
+class SearchPage(BaseModel):
+    snapshot: str = Field(..., description="结果快照 id")
+    total: int = Field(..., description="快照中的论文总数")
+    offset: int
+    items: List[PaperModel]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，已是最后一页时为 null")
+    sources: List[SourceStatusModel]
+    expires_at: datetime = Field(..., description="快照过期时间，之后游标失效（410）")
+
+
+class ErrorModel(BaseModel):
+    error: str
+
+
+@router.post("/search", response_model=SearchPage, responses={502: {"model": ErrorModel}})
+async def api_search(body: SearchRequest, request: Request) -> Response:
+    """
+    执行检索并返回第一页。相同检索条件在快照有效期内复用已有快照，不重复请求上游。
+    """
+    state = app_state()
+    snapshots = state.snapshot_store
+
+    request_key = _request_key(body)
+    snapshot_id = await run_in_threadpool(snapshots.find, request_key)
+    if snapshot_id is None:
+        try:
+            papers, statuses = await _run_search(state, body)
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=502)
+        # 有数据源失败时结果不完整，不供后续相同检索复用
+        complete = all(s["state"] == "ok" for s in statuses)
+        snapshot_id = await run_in_threadpool(
+            snapshots.create,
+            papers,
+            statuses,
+            request_key if complete else None,
+        )
+
+    return await _page(request, snapshot_id, 0, body.page_size)
+
+
+@router.get(
+    "/search",
+    response_model=SearchPage,
+    responses={304: {"description": "Not Modified"}, 400: {"model": ErrorModel}, 410: {"model": ErrorModel}},
+)
+async def api_search_page(cursor: str, request: Request) -> Response:
+    """
+    按游标翻页，只读取快照。快照过期后返回 410，需要重新 POST /api/search。
+    """
+    try:
+        snapshot_id, offset, limit = decode_cursor(cursor)
+    except ValueError:
+        return JSONResponse({"error": "invalid cursor"}, status_code=400)
+    return await _page(request, snapshot_id, offset, limit)
+
+
+def encode_cursor(snapshot_id: str, offset: int, limit: int) -> str:
+    raw = json.dumps([snapshot_id, offset, limit], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        snapshot_id, offset, limit = json.loads(raw)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(snapshot_id, str) or not isinstance(offset, int) or not isinstance(limit, int):
+        raise ValueError("invalid cursor")
+    if offset < 0 or not 1 <= limit <= 200:
+        raise ValueError("invalid cursor")
+    return snapshot_id, offset, limit
+
+
+async def _page(request: Request, snapshot_id: str, offset: int, limit: int) -> Response:
+    snapshot = await run_in_threadpool(app_state().snapshot_store.get, snapshot_id)
+    if snapshot is None:
+        return JSONResponse({"error": "snapshot expired, please search again"}, status_code=410)
+    expires_at, papers, statuses = snapshot
+
+    # 快照不可变，同一页的内容只由 (快照, 偏移, 页大小) 决定
+    etag = '"' + hashlib.sha1(f"{snapshot_id}:{offset}:{limit}".encode("utf-8")).hexdigest()[:20] + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max(0, int(expires_at - time.time()))}",
+    }
+    if etag in _if_none_match(request):
+        return Response(status_code=304, headers=headers)
+
+    end = offset + limit
+    page = SearchPage(
+        snapshot=snapshot_id,
+        total=len(papers),
+        offset=offset,
+        items=papers[offset:end],
+        next_cursor=encode_cursor(snapshot_id, end, limit) if end < len(papers) else None,
+        sources=statuses,
+        expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc),
+    )
+    return Response(page.model_dump_json(), media_type="application/json", headers=headers)
+
+
+def _if_none_match(request: Request) -> List[str]:
+    value = request.headers.get("if-none-match") or ""
+    return [tag.strip().removeprefix("W/") for tag in value.split(",") if tag.strip()]
+
+
+def _request_key(body: SearchRequest) -> str:
+    normalized = {
+        "query": " ".join(body.query.lower().split()),
+        "sources": sorted(body.sources or []),
+        "from_year": body.from_year,
+        "title_filter": (body.title_filter or "").strip().lower(),
+        "max_results": body.max_results,
+        "local": body.local,
+    }
+    return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def _run_search(state: AppState, body: SearchRequest) -> Tuple[List[Paper], List[dict]]:
+    store = state.paper_store
+    key = (body.title_filter or "").strip().lower()
+
+    if body.local:
+        if store is None:
+            raise RuntimeError("本地论文库未启用，请在配置文件中开启 local_index")
+        papers = await run_in_threadpool(
+            store.search,
+            body.query,
+            body.max_results,
+            body.from_year,
+            body.sources,
+            body.title_filter,
+        )
+        return papers, [{"name": "local", "state": "ok", "count": len(papers)}]
+
+    options = state.options
+    result = await aaggregate_search_detailed(
+        query=body.query,
+        sources=state.sources(body.sources),
+        max_results=body.max_results,
+        from_year=body.from_year,
+        deadline=options["deadline"],
+        cache=options["cache"],
+        fuzzy_dedup=options["fuzzy_dedup"],
+    )
+    if store is not None and result.papers:
+        await run_in_threadpool(store.upsert, result.papers)
+    papers = [p for p in result.papers if not key or key in (p.title or "").lower()]
+    statuses = [
+        {
+            "name": s.name,
+            "state": s.state,
+            "count": s.count,
+            "elapsed": round(s.elapsed, 3),
+            "error": s.error,
+            "cached": s.cached,
+        }
+        for s in result.statuses
+    ]
+    return papers, statuses
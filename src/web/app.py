@@ -1,16 +1,21 @@
 from pathlib import Path
-from typing import List, Optional
-import io
-import csv
+from typing import AsyncIterator, List, Optional
+import json
 
-from fastapi import FastAPI, Form, Request
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import Body, FastAPI, Form, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from ..aggregator import aggregate_search, build_sources
-from ..config import load_config
+from .. import http_client, metrics
+from ..aggregator import aaggregate_search_detailed, aiter_deduplicated_batches
+from ..jobs import JOB_HANDLERS
 from ..models import Paper
+from ..storage import EXPORT_CSV_FIELDS, csv_writer, drain, paper_to_export_row
+
+from .api import router as api_router
+from .context import app_state, get_app_context
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 TEMPLATES_DIR = BASE_DIR / "templates"
@@ -18,11 +23,39 @@ STATIC_DIR = BASE_DIR / "static"
 
 
 app = FastAPI(title="论文聚合搜索 Web 界面")
+app.include_router(api_router)
 
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 
+@app.on_event("startup")
+def load_app_context() -> None:
+    # 启动时加载配置并创建数据源，首个请求不必承担初始化开销；之后按文件修改时间热加载
+    get_app_context().get()
+
+
+@app.on_event("shutdown")
+def close_http_client() -> None:
+    # 关闭共享连接池
+    http_client.close()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    """
+    Prometheus 文本格式的进程内指标（配置 metrics.enabled 开启，未开启时返回 404）。
+
+    计数只保存在处理本次请求的 worker 进程内：uvicorn 以多个 worker 运行时，
+    一次抓取只反映其中一个 worker，且相邻两次抓取可能来自不同 worker。
+    需要完整数据时以单 worker 运行，或为每个 worker 单独启动实例分别抓取。
+    """
+    app_state()
+    if not metrics.enabled():
+        return PlainTextResponse("metrics disabled\n", status_code=404)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request) -> HTMLResponse:
     return templates.TemplateResponse(
@@ -36,11 +69,16 @@ async def index(request: Request) -> HTMLResponse:
             "sources": [],
             "available_sources": ["arxiv", "crossref", "semantic_scholar"],
             "papers": [],
+            "local": False,
             "error": None,
         },
     )
 
 
+def _truthy(value: Optional[str]) -> bool:
+    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
 @app.post("/search", response_class=HTMLResponse)
 async def search(
     request: Request,
@@ -49,10 +87,13 @@ async def search(
     title_filter: Optional[str] = Form(None),
     max_results: int = Form(30),
     sources: Optional[List[str]] = Form(None),
+    local: Optional[str] = Form(None),
 ) -> HTMLResponse:
-    cfg = load_config(None)
-    if sources:
-        cfg["enabled_sources"] = sources
+    """
+    检索论文。默认查询远程数据源，并把结果写入本地论文库；
+    local=1（表单字段或 /search?local=1）时只从本地全文索引返回结果，不访问远程接口。
+    """
+    state = app_state()
 
     # 处理 from_year: 空字符串或 None 转为 None，否则转为整数
     from_year_int: Optional[int] = None
@@ -62,20 +103,43 @@ async def search(
         except ValueError:
             from_year_int = None
 
+    local_mode = _truthy(local) or _truthy(request.query_params.get("local"))
+    store = state.paper_store
+
     try:
-        src_instances = build_sources(cfg)
-        papers: List[Paper] = aggregate_search(
-            query=query,
-            sources=src_instances,
-            max_results=max_results,
-            from_year=from_year_int,
-        )
-        # 题目进一步筛选
-        if title_filter and title_filter.strip():
-            key = title_filter.strip().lower()
-            papers = [
-                p for p in papers if key in (p.title or "").lower()
-            ]
+        if local_mode:
+            if store is None:
+                raise RuntimeError("本地论文库未启用，请在配置文件中开启 local_index")
+            # 题目筛选直接交给全文索引
+            papers: List[Paper] = await run_in_threadpool(
+                store.search,
+                query,
+                max_results,
+                from_year_int,
+                sources,
+                title_filter,
+            )
+        else:
+            options = state.options
+            result = await aaggregate_search_detailed(
+                query=query,
+                sources=state.sources(sources),
+                max_results=max_results,
+                from_year=from_year_int,
+                deadline=options["deadline"],
+                cache=options["cache"],
+                fuzzy_dedup=options["fuzzy_dedup"],
+            )
+            papers = result.papers
+            if store is not None and papers:
+                # 远程结果写入本地库，之后同类检索可直接走本地索引
+                await run_in_threadpool(store.upsert, papers)
+            # 题目进一步筛选
+            if title_filter and title_filter.strip():
+                key = title_filter.strip().lower()
+                papers = [
+                    p for p in papers if key in (p.title or "").lower()
+                ]
         error = None
     except Exception as e:
         papers = []
@@ -92,11 +156,84 @@ async def search(
             "sources": sources or [],
             "available_sources": ["arxiv", "crossref", "semantic_scholar"],
             "papers": papers,
+            "local": local_mode,
             "error": error,
         },
     )
 
 
+@app.get("/search/stream")
+async def search_stream(
+    query: str,
+    from_year: Optional[str] = None,
+    title_filter: Optional[str] = None,
+    max_results: int = 30,
+    sources: Optional[List[str]] = Query(None),
+) -> StreamingResponse:
+    """
+    流式检索（Server-Sent Events）：每个数据源返回后立即推送其中去重后的新论文，
+    首批结果的等待时间取决于最快的数据源，而不是最慢的。
+
+    事件：
+        start   {"sources": [...]}                     开始检索的数据源
+        papers  {"source": 名称, "papers": [...]}      新到达的论文（Paper.to_dict 格式）
+        source  {"name", "state", "count", "elapsed", "error", "cached"}  数据源完成或失败
+        done    {"total": 去重后总数}
+    """
+    state = app_state()
+
+    from_year_int: Optional[int] = None
+    if from_year and from_year.strip():
+        try:
+            from_year_int = int(from_year.strip())
+        except ValueError:
+            from_year_int = None
+
+    src_instances = state.sources(sources)
+    options = state.options
+    store = state.paper_store
+    key = title_filter.strip().lower() if title_filter and title_filter.strip() else ""
+
+    async def _events() -> AsyncIterator[str]:
+        yield _sse("start", {"sources": [src.name for src in src_instances]})
+        total = 0
+        async for status, batch in aiter_deduplicated_batches(
+            query=query,
+            sources=src_instances,
+            max_results=max_results,
+            from_year=from_year_int,
+            deadline=options["deadline"],
+            cache=options["cache"],
+            fuzzy_dedup=options["fuzzy_dedup"],
+        ):
+            if store is not None and batch:
+                await run_in_threadpool(store.upsert, batch)
+            papers = [p for p in batch if not key or key in (p.title or "").lower()]
+            if papers:
+                total += len(papers)
+                yield _sse("papers", {"source": status.name, "papers": [p.to_dict() for p in papers]})
+            yield _sse(
+                "source",
+                {
+                    "name": status.name,
+                    "state": status.state,
+                    "count": status.count,
+                    "elapsed": round(status.elapsed, 3),
+                    "error": status.error,
+                    "cached": status.cached,
+                },
+            )
+        yield _sse("done", {"total": total})
+
+    # 关闭反向代理（如 Nginx）的响应缓冲，事件才能即时送达浏览器
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(_events(), media_type="text/event-stream", headers=headers)
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
 @app.post("/download")
 async def download(
     request: Request,
@@ -108,10 +245,9 @@ async def download(
 ):
     """
     根据当前表单条件重新检索，并将结果导出为 CSV 文件下载。
+    以流式响应返回：任一数据源完成即开始发送，不在内存中拼出完整文件。
     """
-    cfg = load_config(None)
-    if sources:
-        cfg["enabled_sources"] = sources
+    state = app_state()
 
     from_year_int: Optional[int] = None
     if from_year and str(from_year).strip():
@@ -120,43 +256,111 @@ async def download(
         except ValueError:
             from_year_int = None
 
-    src_instances = build_sources(cfg)
-    papers: List[Paper] = aggregate_search(
-        query=query,
-        sources=src_instances,
-        max_results=max_results,
-        from_year=from_year_int,
-    )
+    src_instances = state.sources(sources)
+    options = state.options
+    key = title_filter.strip().lower() if title_filter and title_filter.strip() else ""
+
+    async def _csv_chunks() -> AsyncIterator[str]:
+        # 每个数据源完成后写出一批行，输出缓冲区随即清空
+        output, writer = csv_writer(EXPORT_CSV_FIELDS)
+        writer.writeheader()
+        yield drain(output)
+
+        async for _status, batch in aiter_deduplicated_batches(
+            query=query,
+            sources=src_instances,
+            max_results=max_results,
+            from_year=from_year_int,
+            deadline=options["deadline"],
+            cache=options["cache"],
+            fuzzy_dedup=options["fuzzy_dedup"],
+        ):
+            writer.writerows(
+                paper_to_export_row(p) for p in batch if not key or key in (p.title or "").lower()
+            )
+            yield drain(output)
 
-    if title_filter and title_filter.strip():
-        key = title_filter.strip().lower()
-        papers = [p for p in papers if key in (p.title or "").lower()]
-
-    # 生成内存中的 CSV
-    output = io.StringIO(newline="")
-    writer = csv.writer(output)
-    writer.writerow(["title", "authors", "year", "source", "doi", "url", "journal", "abstract"])
-    for p in papers:
-        authors = ", ".join(p.authors)
-        year = p.published_at.year if p.published_at else ""
-        writer.writerow(
-            [
-                p.title,
-                authors,
-                year,
-                p.source,
-                p.doi or "",
-                p.url or "",
-                p.journal or "",
-                (p.abstract or "").replace("\n", " "),
-            ]
-        )
-
-    output.seek(0)
     filename = f"papers_{query.replace(' ', '_')}.csv"
     headers = {
         "Content-Disposition": f'attachment; filename="{filename}"'
     }
-    return StreamingResponse(output, media_type="text/csv; charset=utf-8", headers=headers)
+    return StreamingResponse(_csv_chunks(), media_type="text/csv; charset=utf-8", headers=headers)
+
+
+@app.post("/open-access")
+async def open_access(dois: List[str] = Body(..., embed=True)) -> JSONResponse:
+    """
+    批量查询 DOI 的开放获取状态，供页面在结果渲染后延迟补全（crossref.unpaywall_mode: deferred）。
+    """
+    state = app_state()
+    client = state.unpaywall
+    if client is None:
+        return JSONResponse({})
+
+    concurrency = int(state.crossref_config.get("unpaywall_concurrency", 8))
+    results = await run_in_threadpool(client.check_open_access_many, dois[:200], concurrency)
+    return JSONResponse(
+        {
+            doi: {"is_oa": bool(r and r.get("is_oa")), "pdf_url": (r or {}).get("pdf_url")}
+            for doi, r in results.items()
+        }
+    )
+
+
+@app.post("/jobs")
+async def submit_job(kind: str = Body(...), params: dict = Body(default_factory=dict)) -> JSONResponse:
+    """
+    提交后台任务（harvest：深度检索导出；download：批量下载开放获取 PDF），立即返回任务 id。
+    任务由独立的 worker 进程执行（python -m src.jobs），通过 GET /jobs/{id} 查询进度。
+    """
+    if kind not in JOB_HANDLERS:
+        return JSONResponse({"error": f"unknown job kind: {kind}"}, status_code=400)
+    if kind == "harvest" and not params.get("query"):
+        return JSONResponse({"error": "params.query is required"}, status_code=400)
+    if kind == "download" and not (params.get("papers") or params.get("query")):
+        return JSONResponse({"error": "params.papers or params.query is required"}, status_code=400)
+
+    queue = app_state().job_queue
+    job_id = await run_in_threadpool(queue.submit, kind, params)
+    return JSONResponse({"id": job_id, "state": "queued", "status_url": f"/jobs/{job_id}"}, status_code=202)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> JSONResponse:
+    job = await run_in_threadpool(app_state().job_queue.get, job_id)
+    if job is None:
+        return JSONResponse({"error": "job not found"}, status_code=404)
+    result = dict(job["result"] or {})
+    # 结果文件路径只在服务端使用，对外给出下载地址
+    result.pop("path", None)
+    return JSONResponse(
+        {
+            "id": job["id"],
+            "kind": job["kind"],
+            "state": job["state"],
+            "progress": {
+                "done": job["progress_done"],
+                "total": job["progress_total"],
+                "message": job["message"],
+            },
+            "error": job["error"],
+            "result": result or None,
+            "result_url": f"/jobs/{job_id}/result" if job["state"] == "done" else None,
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+    )
 
 
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = await run_in_threadpool(app_state().job_queue.get, job_id)
+    if job is None:
+        return JSONResponse({"error": "job not found"}, status_code=404)
+    if job["state"] != "done":
+        return JSONResponse({"error": f"job is {job['state']}"}, status_code=409)
+    path = Path(job["result"]["path"])
+    if not path.exists():
+        return JSONResponse({"error": "result file no longer exists"}, status_code=410)
+    return FileResponse(path, filename=f"{job['kind']}_{job_id[:8]}{path.suffix}")
@@ -0,0 +1,219 @@
+"""
+Web 服务的应用级上下文。
+
+服务启动时加载一次配置，并创建长期存活的对象：数据源实例（及其限速器、Unpaywall 客户端）、
+检索选项、本地论文库等。请求处理直接复用这些对象，不再每次读取、解析 config.yml 并重建数据源。
+
+配置热加载：访问上下文时最多每 web.reload_interval 秒检查一次 config.yml 的修改时间和大小，
+文件变化后重新加载并整体替换 AppState；新配置无法加载时保留旧配置并打印警告。
+请求在开始时取得 AppState，处理过程中不受替换影响。
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .. import metrics
+from ..aggregator import build_source, build_sources, search_options
+from ..cache import ResultSnapshotStore, build_oa_cache, build_snapshot_store
+from ..config import load_config
+from ..jobs import JobQueue, build_job_queue
+from ..rate_limiter import RateLimiterRegistry, build_rate_limiters, with_default_backend
+from ..sources.base import BaseSource
+from ..sources.registry import resolve
+from ..sources.unpaywall import UNPAYWALL_API_URL, UnpaywallClient
+from ..sqlite_store import SQLitePaperStore, build_paper_store
+
+
+DEFAULT_CONFIG_PATH = "config.yml"
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+
+@dataclass
+class AppState:
+    """
+    一份配置及由它创建的全部长期对象。配置加载后视为只读，请求中不要修改 config。
+    """
+
+    config: Dict
+    limiters: RateLimiterRegistry
+    options: Dict
+    paper_store: Optional[SQLitePaperStore]
+    _sources: Dict[str, BaseSource] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "AppState":
+        # 多个 uvicorn worker 默认共享 SQLite 限速状态，否则每个 worker 各自拥有完整的每主机额度
+        config = with_default_backend(config)
+        metrics.configure(config.get("metrics"))
+        state = cls(
+            config=config,
+            limiters=build_rate_limiters(config),
+            options=search_options(config),
+            paper_store=build_paper_store(config),
+        )
+        for src in build_sources(config):
+            state._sources[src.name] = src
+        return state
+
+    @property
+    def enabled_sources(self) -> List[str]:
+        return list(self.config.get("enabled_sources", ["arxiv", "crossref"]))
+
+    def sources(self, names: Optional[Sequence[str]] = None) -> List[BaseSource]:
+        """
+        返回指定名称（默认为配置中启用的数据源）的实例。
+
+        启动时已创建启用的数据源；请求中勾选的其他数据源首次使用时创建，之后同样复用。
+        """
+        instances: List[BaseSource] = []
+        seen = set()
+        for name in names or self.enabled_sources:
+            entry = resolve(name)
+            key = entry.name if entry is not None else name
+            if key in seen:
+                continue
+            seen.add(key)
+            src = self._sources.get(key)
+            if src is None:
+                with self._lock:
+                    src = self._sources.get(key)
+                    if src is None:
+                        src = build_source(name, self.config, self.limiters)
+                        if src is None:
+                            continue
+                        self._sources[key] = src
+            instances.append(src)
+        return instances
+
+    @cached_property
+    def unpaywall(self) -> Optional[UnpaywallClient]:
+        """
+        供 /open-access 延迟补全使用的 Unpaywall 客户端；未配置 crossref.unpaywall_email 时为 None。
+        """
+        email = self.crossref_config.get("unpaywall_email")
+        if not email:
+            return None
+        return UnpaywallClient(
+            email=email,
+            rate_limiter=self.limiters.for_url(UNPAYWALL_API_URL),
+            cache=build_oa_cache(self.config),
+        )
+
+    @property
+    def crossref_config(self) -> Dict:
+        return (self.config.get("sources", {}) or {}).get("crossref") or {}
+
+    @cached_property
+    def snapshot_store(self) -> ResultSnapshotStore:
+        return build_snapshot_store(self.config)
+
+    @cached_property
+    def job_queue(self) -> JobQueue:
+        return build_job_queue(self.config)
+
+
+class AppContext:
+    """
+    持有当前 AppState，并在配置文件变化时重新加载。
+
+    参数:
+        path: 配置文件路径，默认读取当前目录下的 config.yml
+        reload_interval: 检查配置文件变化的最小间隔（秒），为空时读取配置的 web.reload_interval，0 表示不热加载
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: Optional[float] = None) -> None:
+        self.path = path or DEFAULT_CONFIG_PATH
+        self._reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._state: Optional[AppState] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+
+    @property
+    def reload_interval(self) -> float:
+        if self._reload_interval is not None:
+            return float(self._reload_interval)
+        web_cfg = (self._state.config.get("web") if self._state else None) or {}
+        return float(web_cfg.get("reload_interval", DEFAULT_RELOAD_INTERVAL))
+
+    def get(self) -> AppState:
+        """
+        返回当前 AppState。热路径上只做一次时间比较，到达检查间隔时才读取文件状态。
+        """
+        state = self._state
+        if state is not None and time.monotonic() < self._next_check:
+            return state
+        with self._lock:
+            if self._state is None:
+                self._load()
+            elif time.monotonic() >= self._next_check:
+                self._check()
+            return self._state
+
+    def reload(self) -> AppState:
+        """
+        立即重新加载配置文件（失败时抛出异常，保留原有状态）。
+        """
+        with self._lock:
+            self._load()
+            return self._state
+
+    def _check(self) -> None:
+        interval = self.reload_interval
+        if interval <= 0:
+            self._next_check = float("inf")
+            return
+        self._next_check = time.monotonic() + interval
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        try:
+            self._load()
+            print(f"[INFO] Reloaded config from {self.path}")
+        except Exception as e:
+            # 记下新的文件状态，避免在文件再次修改前反复尝试加载同一份有问题的配置
+            self._signature = signature
+            print(f"[WARN] Failed to reload config from {self.path}, keeping previous config: {e}")
+
+    def _load(self) -> None:
+        # 先取文件状态再读取内容：读取期间文件再次变化时，下次检查会重新加载
+        signature = self._file_signature()
+        state = AppState.from_config(load_config(self.path))
+        self._state = state
+        self._signature = signature
+        interval = self.reload_interval
+        self._next_check = time.monotonic() + interval if interval > 0 else float("inf")
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+_context: Optional[AppContext] = None
+_context_lock = threading.Lock()
+
+
+def get_app_context() -> AppContext:
+    """
+    进程内共享的 AppContext（uvicorn 多 worker 部署时每个 worker 进程各一个）。
+    """
+    global _context
+    if _context is None:
+        with _context_lock:
+            if _context is None:
+                _context = AppContext()
+    return _context
+
+
+def app_state() -> AppState:
+    return get_app_context().get()
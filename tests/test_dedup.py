@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import List, Optional
+
+from src.dedup import Deduplicator, deduplicate, normalize_title
+from src.models import Paper
+
+TITLE = "Deep Residual Learning for Image Recognition with Very Deep Convolutional Networks"
+
+
+def _paper(
+    source: str,
+    title: str = TITLE,
+    doi: Optional[str] = None,
+    year: Optional[int] = 2016,
+    authors: Optional[List[str]] = None,
+) -> Paper:
+    return Paper(
+        id=f"{source}-{title[:10]}",
+        title=title,
+        abstract=None,
+        authors=authors if authors is not None else ["Kaiming He", "Xiangyu Zhang"],
+        published_at=datetime(year, 1, 1) if year else None,
+        source=source,
+        doi=doi,
+    )
+
+
+def test_normalize_title():
+    assert normalize_title("  Déjà-Vu:  A  Study of   ÉCOLE_Models! ") == "deja vu a study of ecole models"
+    assert normalize_title(None) == ""
+
+
+def test_doi_match_ignores_title_and_case():
+    dedup = Deduplicator()
+    assert dedup.add(_paper("crossref", doi="10.1109/CVPR.2016.90")) is None
+    assert dedup.add(_paper("semantic_scholar", title="Something else entirely", doi="10.1109/cvpr.2016.90")) == 0
+
+
+def test_normalized_title_match():
+    dedup = Deduplicator(fuzzy=False)
+    assert dedup.add(_paper("crossref", doi="10.1109/CVPR.2016.90")) is None
+    assert dedup.add(_paper("arxiv", title=TITLE.upper() + ".", year=2015, authors=["He, Kaiming"])) == 0
+
+
+def test_minhash_near_duplicate_match():
+    near = TITLE.replace("Very Deep ", "Very Deep Stacked ")
+    assert normalize_title(near) != normalize_title(TITLE)
+
+    fuzzy = Deduplicator()
+    assert fuzzy.add(_paper("crossref")) is None
+    assert fuzzy.add(_paper("arxiv", title=near)) == 0
+
+    # 关闭模糊匹配时只做精确匹配
+    exact = Deduplicator(fuzzy=False)
+    assert exact.add(_paper("crossref")) is None
+    assert exact.add(_paper("arxiv", title=near)) is None
+
+
+def test_different_titles_are_kept():
+    dedup = Deduplicator()
+    assert dedup.add(_paper("crossref")) is None
+    assert dedup.add(_paper("arxiv", title="Identity Mappings in Deep Residual Networks")) is None
+    assert len(dedup) == 2
+
+
+def test_year_gap_guard():
+    dedup = Deduplicator(max_year_gap=2)
+    assert dedup.add(_paper("crossref", year=2016)) is None
+    assert dedup.add(_paper("arxiv", year=2014)) == 0
+    assert dedup.add(_paper("semantic_scholar", year=2020)) is None
+
+
+def test_author_overlap_guard():
+    dedup = Deduplicator()
+    assert dedup.add(_paper("crossref", authors=["Kaiming He"])) is None
+    assert dedup.add(_paper("arxiv", authors=["Jane Doe"])) is None
+    # 首位作者格式不同但有共同的词时视为同一作者
+    assert dedup.add(_paper("semantic_scholar", authors=["He, K."])) == 0
+    # 缺少作者时不作为冲突
+    assert dedup.add(_paper("semantic_scholar", authors=[])) == 0
+
+
+def test_conflicting_dois_are_not_merged_by_title():
+    dedup = Deduplicator()
+    assert dedup.add(_paper("crossref", doi="10.1/a")) is None
+    assert dedup.add(_paper("crossref", doi="10.1/b")) is None
+
+
+def test_duplicate_doi_is_registered_for_later_records():
+    dedup = Deduplicator()
+    assert dedup.add(_paper("arxiv")) is None
+    assert dedup.add(_paper("crossref", doi="10.1/a")) == 0
+    assert dedup.add(_paper("semantic_scholar", title="Renamed", doi="10.1/A")) == 0
+
+
+def test_deduplicate_merges_into_first_occurrence():
+    papers = [
+        _paper("arxiv"),
+        _paper("crossref", title="Identity Mappings in Deep Residual Networks"),
+        _paper("crossref", doi="10.1109/CVPR.2016.90"),
+    ]
+
+    result = deduplicate(papers)
+
+    assert [p.title for p in result] == [TITLE, "Identity Mappings in Deep Residual Networks"]
+    assert result[0].doi == "10.1109/CVPR.2016.90"
+    assert result[0].extra["sources"] == ["arxiv", "crossref"]
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from src.merge import merge_papers
+from src.models import Paper
+
+
+def _paper(source: str, **kwargs) -> Paper:
+    fields = {
+        "id": f"{source}-1",
+        "title": "Attention Is All You Need",
+        "abstract": None,
+        "authors": ["Ashish Vaswani"],
+        "published_at": None,
+        "source": source,
+    }
+    fields.update(kwargs)
+    return Paper(**fields)
+
+
+def test_field_precedence_and_provenance():
+    crossref = _paper(
+        "crossref",
+        title="Attention is all you need",
+        abstract="short",
+        published_at=datetime(2017, 12, 4),
+        url="https://doi.org/10.5555/3295222.3295349",
+        doi="10.5555/3295222.3295349",
+        journal="NeurIPS",
+    )
+    arxiv = _paper(
+        "arxiv",
+        abstract="The dominant sequence transduction models ...",
+        published_at=datetime(2017, 6, 12),
+        url="http://arxiv.org/abs/1706.03762v7",
+    )
+
+    merged = merge_papers(crossref, arxiv)
+
+    assert merged.id == "crossref-1"
+    assert merged.source == "crossref"
+    assert merged.title == "Attention is all you need"
+    assert merged.abstract.startswith("The dominant")
+    assert merged.published_at == datetime(2017, 12, 4)
+    assert merged.url == "http://arxiv.org/abs/1706.03762v7"
+    assert merged.journal == "NeurIPS"
+    assert merged.extra["sources"] == ["crossref", "arxiv"]
+    assert merged.extra["source_ids"] == {"crossref": "crossref-1", "arxiv": "arxiv-1"}
+    provenance = merged.extra["provenance"]
+    assert provenance["title"] == "crossref"
+    assert provenance["abstract"] == "arxiv"
+    assert provenance["url"] == "arxiv"
+    assert provenance["doi"] == "crossref"
+
+
+def test_empty_values_fall_back_to_other_source():
+    merged = merge_papers(_paper("crossref", doi=None), _paper("semantic_scholar", doi="10.1/x", abstract="abs"))
+
+    assert merged.doi == "10.1/x"
+    assert merged.abstract == "abs"
+    assert merged.extra["provenance"]["doi"] == "semantic_scholar"
+
+
+def test_merging_merged_record_keeps_sources_and_provenance():
+    first = merge_papers(_paper("crossref", doi="10.1/x"), _paper("arxiv", abstract="from arxiv"))
+    merged = merge_papers(first, _paper("semantic_scholar", abstract="from s2"))
+
+    assert merged.extra["sources"] == ["crossref", "arxiv", "semantic_scholar"]
+    assert set(merged.extra["source_ids"]) == {"crossref", "arxiv", "semantic_scholar"}
+    assert merged.abstract == "from arxiv"
+    assert merged.extra["provenance"]["abstract"] == "arxiv"
+
+
+def test_paywalled_publisher_pdf_does_not_imply_open_access():
+    crossref = _paper(
+        "crossref",
+        doi="10.1/x",
+        extra={"is_open_access": False, "pdf_url": "https://publisher.com/tdm.pdf", "oa_pending": True},
+    )
+
+    merged = merge_papers(crossref, _paper("semantic_scholar", doi="10.1/x"))
+
+    assert merged.extra["is_open_access"] is False
+    assert merged.extra["oa_pending"] is True
+
+
+def test_open_access_is_or_of_source_flags():
+    crossref = _paper(
+        "crossref",
+        extra={"is_open_access": False, "pdf_url": "https://publisher.com/tdm.pdf", "oa_pending": True},
+    )
+    s2 = _paper("semantic_scholar", extra={"is_open_access": True, "pdf_url": "https://oa.example.org/x.pdf"})
+
+    merged = merge_papers(crossref, s2)
+
+    assert merged.extra["is_open_access"] is True
+    # 已确认开放获取的一方的 PDF 链接优先于出版商链接
+    assert merged.extra["pdf_url"] == "https://oa.example.org/x.pdf"
+    assert merged.extra["provenance"]["extra.pdf_url"] == "semantic_scholar"
+    assert "oa_pending" not in merged.extra
+
+
+def test_arxiv_pdf_establishes_open_access():
+    crossref = _paper("crossref", extra={"is_open_access": False, "oa_pending": True})
+    arxiv = _paper("arxiv", extra={"pdf_url": "http://arxiv.org/pdf/1706.03762v7"})
+
+    merged = merge_papers(crossref, arxiv)
+
+    assert merged.extra["is_open_access"] is True
+    assert merged.extra["pdf_url"] == "http://arxiv.org/pdf/1706.03762v7"
+    assert merged.extra["provenance"]["extra.is_open_access"] == "arxiv"
+    assert "oa_pending" not in merged.extra
+
+
+def test_inputs_are_not_modified():
+    crossref = _paper("crossref", extra={"is_open_access": False})
+    arxiv = _paper("arxiv", extra={"pdf_url": "http://arxiv.org/pdf/1"})
+
+    merge_papers(crossref, arxiv)
+
+    assert crossref.extra == {"is_open_access": False}
+    assert arxiv.extra == {"pdf_url": "http://arxiv.org/pdf/1"}